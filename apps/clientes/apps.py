@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class ClientesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.clientes'
-    verbose_name = 'Clientes'
\ No newline at end of file
+    verbose_name = 'Clientes'
+
+    def ready(self):
+        from . import signals
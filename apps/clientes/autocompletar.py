@@ -0,0 +1,30 @@
+"""
+Búsqueda por prefijo de clientes (RUT o razón social) para los formularios
+de pedido. El RUT usa el índice único de la columna y la razón social el
+índice de razon_social_busqueda (minúsculas y sin tildes); ver
+ticashop/autocompletar.py.
+"""
+from ticashop.autocompletar import normalizar, rango_prefijo
+
+from .models import Cliente
+
+
+def buscar_clientes(texto, cantidad):
+    """Hasta `cantidad` clientes como dicts listos para JSON; primero los que coinciden por RUT."""
+    encontrados = []
+    rut = texto.upper().replace('.', '').replace('-', '')  # se guarda limpio (ver forms.validar_rut)
+    if rut[:1].isdigit():
+        encontrados = list(
+            Cliente.objects.filter(**rango_prefijo('rut', rut))
+            .order_by('rut').values('id', 'rut', 'razon_social')[:cantidad]
+        )
+    prefijo = normalizar(texto)
+    if prefijo and len(encontrados) < cantidad:
+        vistos = {c['id'] for c in encontrados}
+        encontrados += [
+            c for c in (
+                Cliente.objects.filter(**rango_prefijo('razon_social_busqueda', prefijo))
+                .order_by('razon_social_busqueda').values('id', 'rut', 'razon_social')[:cantidad]
+            ) if c['id'] not in vistos
+        ][:cantidad - len(encontrados)]
+    return [{**c, 'texto': f"{c['razon_social']} ({c['rut']})"} for c in encontrados]
@@ -1,6 +1,8 @@
 from django import forms
 from .models import Proveedor, Cliente
 from django.core.exceptions import ValidationError
+from django.urls import reverse_lazy
+from django.utils.html import format_html
 
 # --- FUNCIÓN CENTRAL DE VALIDACIÓN DE RUT ---
 def validar_rut(rut_completo):
@@ -118,4 +120,44 @@ class CompletarPerfilForm(forms.ModelForm):
     def clean_rut(self):
         """Aplica la validación de RUT al campo del formulario."""
         rut = self.cleaned_data.get('rut')
-        return validar_rut(rut) # Llama a la función externa
\ No newline at end of file
+        return validar_rut(rut) # Llama a la función externa
+
+
+# ====================================================================
+# WIDGET DE AUTOCOMPLETADO DE CLIENTES
+# ====================================================================
+class ClienteAutocompletar(forms.Widget):
+    """
+    Reemplaza al <select> con todos los clientes: un input oculto con el id
+    y un campo de texto que busca en clientes:buscar_clientes
+    (static/js/autocompletar.js). Solo consulta el cliente ya elegido.
+    """
+    url = reverse_lazy('clientes:buscar_clientes')
+
+    class Media:
+        js = ['js/autocompletar.js']
+
+    def texto(self, value):
+        if value in (None, ''):
+            return ''
+        try:
+            cliente = Cliente.objects.filter(pk=value).first()
+        except (ValueError, TypeError):
+            return ''
+        return str(cliente) if cliente else ''
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        id_oculto = attrs.get('id') or f'id_{name}'
+        return format_html(
+            '<input type="hidden" name="{}" id="{}" value="{}">'
+            '<input type="text" id="{}_buscar" class="{}" value="{}" autocomplete="off" '
+            'placeholder="Buscar por RUT o razón social" '
+            'data-autocompletar-url="{}" data-autocompletar-destino="{}">',
+            name, id_oculto, '' if value is None else value,
+            id_oculto, attrs.get('class', 'form-control'), self.texto(value),
+            self.url, id_oculto,
+        )
+
+    def id_for_label(self, id_):
+        return f'{id_}_buscar' if id_ else id_
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:37
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_alter_cliente_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(django.db.models.functions.text.Lower('razon_social'), name='clientes_razon_lower_idx'),
+        ),
+    ]
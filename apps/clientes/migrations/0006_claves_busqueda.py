@@ -0,0 +1,40 @@
+# Generated by Django 5.1.3 on 2026-10-17 20:24
+
+import ticashop.autocompletar
+from django.conf import settings
+from django.db import migrations, models
+from ticashop.autocompletar import normalizar
+
+
+def calcular_claves(apps, schema_editor):
+    """Clave de búsqueda de los clientes existentes (se calcula en Python, no con LOWER())."""
+    Cliente = apps.get_model('clientes', 'Cliente')
+    clientes = list(Cliente.objects.only('id', 'razon_social'))
+    for cliente in clientes:
+        cliente.razon_social_busqueda = normalizar(cliente.razon_social)[:255]
+    Cliente.objects.bulk_update(clientes, ['razon_social_busqueda'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0005_indices_autocompletar'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cliente',
+            name='clientes_razon_lower_idx',
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='razon_social_busqueda',
+            field=ticashop.autocompletar.ClaveBusquedaField(max_length=255, origen='razon_social'),
+        ),
+        migrations.RunPython(calcular_claves, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['razon_social_busqueda'], name='clientes_razon_busq_idx'),
+        ),
+    ]
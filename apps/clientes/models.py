@@ -1,6 +1,7 @@
 from django.db import models
 
 from apps.usuarios.models import Usuario  # <--- IMPORTACIÓN AÑADIDA
+from ticashop.autocompletar import ClaveBusquedaField, con_claves
 
 class Cliente(models.Model):
     # --- CAMPO AÑADIDO ---
@@ -16,17 +17,27 @@ class Cliente(models.Model):
     
     rut = models.CharField(max_length=12, unique=True)
     razon_social = models.CharField(max_length=255)
+    # Minúsculas y sin tildes, para el autocompletado por prefijo (ver autocompletar.py)
+    razon_social_busqueda = ClaveBusquedaField(max_length=255, origen='razon_social')
     giro = models.CharField(max_length=255, blank=True, null=True)
     direccion = models.TextField(blank=True, null=True)
     email_facturacion = models.EmailField(blank=True, null=True)
     
     def __str__(self):
         return f"{self.razon_social} ({self.rut})"
+
+    def save(self, *args, **kwargs):
+        kwargs['update_fields'] = con_claves(self, kwargs.get('update_fields'))
+        super().save(*args, **kwargs)
     
     class Meta:
         db_table = 'clientes'
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
+        indexes = [
+            # Autocompletado por razón social: rango por prefijo sobre la clave de búsqueda
+            models.Index(fields=['razon_social_busqueda'], name='clientes_razon_busq_idx'),
+        ]
 
 
 class Proveedor(models.Model):
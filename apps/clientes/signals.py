@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ticashop.autocompletar import cache_busquedas
+
+from .models import Cliente
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+def invalidar_busquedas_clientes(sender, **kwargs):
+    cache_busquedas.limpiar()
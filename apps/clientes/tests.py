@@ -1,3 +1,32 @@
 from django.test import TestCase
 
-# Create your tests here.
+from .autocompletar import buscar_clientes
+from .models import Cliente
+
+
+class AutocompletarClientesTests(TestCase):
+    def setUp(self):
+        for rut, razon_social in [('11111111-1', 'Ñandú Ltda'), ('22222222-2', 'Árbol SpA'),
+                                  ('33333333-3', 'Nancy Eventos'), ('44444444-4', 'Óptica Élite')]:
+            Cliente.objects.create(rut=rut, razon_social=razon_social)
+
+    def razones(self, texto):
+        return [c['razon_social'] for c in buscar_clientes(texto, 10)]
+
+    def test_prefijo_con_enie_y_tildes(self):
+        self.assertEqual(self.razones('Ñan'), ['Nancy Eventos', 'Ñandú Ltda'])
+        self.assertEqual(self.razones('ñandú'), ['Ñandú Ltda'])
+        self.assertEqual(self.razones('Ár'), ['Árbol SpA'])
+        self.assertEqual(self.razones('arbol'), ['Árbol SpA'])
+        self.assertEqual(self.razones('ÓPTICA É'), ['Óptica Élite'])
+
+    def test_la_clave_sigue_a_la_razon_social(self):
+        cliente = Cliente.objects.get(rut='22222222-2')
+        cliente.razon_social = 'Ébano SpA'
+        cliente.save(update_fields=['razon_social'])
+        self.assertEqual(self.razones('Ár'), [])
+        self.assertEqual(self.razones('éb'), ['Ébano SpA'])
+
+    def test_creados_con_bulk_create(self):
+        Cliente.objects.bulk_create([Cliente(rut='55555555-5', razon_social='Último Paso')])
+        self.assertEqual(self.razones('ult'), ['Último Paso'])
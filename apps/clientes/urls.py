@@ -15,6 +15,7 @@ urlpatterns = [
     path('proveedores/eliminar/<int:proveedor_id>/', views.eliminar_proveedor, name='eliminar_proveedor'),
 
     path('ajax/crear-cliente/', views.crear_cliente_ajax, name='crear_cliente_ajax'),
+    path('ajax/buscar-clientes/', views.buscar_clientes, name='buscar_clientes'),
 
     path('completar-perfil/', views.completar_perfil, name='completar_perfil'),
 ]
\ No newline at end of file
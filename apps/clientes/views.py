@@ -7,10 +7,15 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from .models import Proveedor, Cliente # <-- Asegúrate de importar Cliente
 from .forms import ProveedorForm, ClienteForm, CompletarPerfilForm # <-- Importa el nuevo form
+from .autocompletar import buscar_clientes as buscar_clientes_prefijo
+from ticashop import autocompletar
 
 def es_administrador(usuario):
     return usuario.rol == 'Administrador'
 
+def puede_buscar_clientes(usuario):
+    return usuario.rol in ['Administrador', 'Vendedor']
+
 @login_required
 def listar_proveedores(request):
     proveedores = Proveedor.objects.all()
@@ -51,6 +56,18 @@ def eliminar_proveedor(request, proveedor_id):
     messages.success(request, '🗑️ Proveedor eliminado correctamente.')
     return redirect('clientes:listar_proveedores')
 
+@login_required
+@user_passes_test(puede_buscar_clientes)
+def buscar_clientes(request):
+    """Clientes cuyo RUT o razón social empieza con ?q= (JSON, para los formularios de pedido)."""
+    texto = autocompletar.termino(request)
+    if not texto:
+        return autocompletar.respuesta([])
+    resultados = autocompletar.buscar_en_cache(
+        'clientes', texto.lower(), autocompletar.limite(request), buscar_clientes_prefijo
+    )
+    return autocompletar.respuesta(resultados)
+
 @login_required
 @require_POST # Esta vista solo acepta datos (POST), no se puede navegar a ella
 def crear_cliente_ajax(request):
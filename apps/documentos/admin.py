@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DocumentoVenta, DetalleDocumento, Pago
+from .models import DocumentoVenta, DetalleDocumento, Pago, RecordatorioPago, SecuenciaFolio
 
 class DetalleDocumentoInline(admin.TabularInline):
     model = DetalleDocumento
@@ -19,11 +19,12 @@ class DocumentoVentaAdmin(admin.ModelAdmin):
         'cliente', 
         'fecha_emision',
         'total', 
+        'monto_pagado',
         'estado',
     ]
     list_filter = ['tipo_documento', 'estado', 'fecha_emision']
     search_fields = ['folio', 'cliente__razon_social', 'cliente__rut']
-    readonly_fields = ['fecha_emision']
+    readonly_fields = ['fecha_emision', 'monto_pagado']
     inlines = [DetalleDocumentoInline, PagoInline]
     
     # FIELDSET SIMPLIFICADO - sin propiedades problemáticas
@@ -32,7 +33,7 @@ class DocumentoVentaAdmin(admin.ModelAdmin):
             'fields': ('tipo_documento', 'folio', 'cliente', 'vendedor', 'pedido')
         }),
         ('Montos', {
-            'fields': ('neto', 'iva', 'total')
+            'fields': ('neto', 'iva', 'total', 'monto_pagado')
         }),
         ('Fechas y Estado', {
             'fields': ('fecha_emision', 'fecha_vencimiento', 'estado', 'medio_de_pago')
@@ -50,4 +51,16 @@ class PagoAdmin(admin.ModelAdmin):
     list_display = ['id', 'documento', 'fecha_pago', 'monto_pagado', 'metodo_pago']
     list_filter = ['metodo_pago', 'fecha_pago']
     search_fields = ['documento__folio', 'referencia']
-    readonly_fields = ['fecha_pago']
\ No newline at end of file
+    readonly_fields = ['fecha_pago']
+
+@admin.register(RecordatorioPago)
+class RecordatorioPagoAdmin(admin.ModelAdmin):
+    list_display = ['documento', 'tipo', 'etapa', 'estado', 'fecha_envio']
+    list_filter = ['estado', 'tipo', 'etapa', 'fecha_envio']
+    search_fields = ['documento__folio']
+    list_select_related = ['documento']
+    raw_id_fields = ['documento']
+
+@admin.register(SecuenciaFolio)
+class SecuenciaFolioAdmin(admin.ModelAdmin):
+    list_display = ['tipo_documento', 'ultimo_folio']
\ No newline at end of file
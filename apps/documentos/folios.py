@@ -0,0 +1,95 @@
+"""
+Asignación de folios por tipo de documento.
+
+Cada tipo de documento tiene una fila en SecuenciaFolio. El folio se obtiene
+con un UPDATE atómico (ultimo_folio = ultimo_folio + n) seguido de la lectura
+de la misma fila dentro de la misma transacción: el UPDATE deja la fila
+bloqueada hasta el commit, así que dos ventas simultáneas nunca reciben el
+mismo folio y, si la venta hace rollback, el contador vuelve atrás (sin saltos).
+
+Opcionalmente (settings.FOLIOS_BLOQUE) un proceso puede reservar un bloque de
+folios de una sola vez y entregarlos desde memoria, para que la emisión masiva
+de boletas no se serialice sobre una única fila. En ese modo pueden quedar
+saltos en la numeración si un proceso termina sin usar su bloque completo.
+"""
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+
+# Primer folio cuando no existe ningún documento del tipo
+FOLIO_INICIAL = 1000
+
+# Bloques reservados por este proceso: {tipo_documento: [[desde, hasta], ...]}
+_bloques = {}
+_lock = threading.Lock()
+
+
+def tamano_bloque(tipo_documento):
+    """Cantidad de folios que reserva el proceso de una vez para el tipo."""
+    bloques = getattr(settings, 'FOLIOS_BLOQUE', {}) or {}
+    try:
+        return max(int(bloques.get(tipo_documento, 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def reservar_folios(tipo_documento, cantidad=1):
+    """
+    Incrementa la secuencia del tipo en `cantidad` y retorna el último folio
+    reservado. Los folios reservados son (ultimo - cantidad + 1) .. ultimo.
+    """
+    from .models import DocumentoVenta, SecuenciaFolio
+
+    secuencia = SecuenciaFolio.objects.filter(tipo_documento=tipo_documento)
+
+    with transaction.atomic():
+        if secuencia.update(ultimo_folio=F('ultimo_folio') + cantidad) == 0:
+            # Primera emisión del tipo: la secuencia parte desde el folio más alto existente
+            maximo = DocumentoVenta.objects.filter(
+                tipo_documento=tipo_documento
+            ).aggregate(m=Max('folio'))['m']
+            SecuenciaFolio.objects.get_or_create(
+                tipo_documento=tipo_documento,
+                defaults={'ultimo_folio': maximo or FOLIO_INICIAL - 1},
+            )
+            secuencia.update(ultimo_folio=F('ultimo_folio') + cantidad)
+
+        return secuencia.values_list('ultimo_folio', flat=True).get()
+
+
+def siguiente_folio(tipo_documento):
+    """Retorna el próximo folio para el tipo de documento."""
+    bloque = tamano_bloque(tipo_documento)
+    if bloque == 1:
+        return reservar_folios(tipo_documento, 1)
+
+    with _lock:
+        rangos = _bloques.get(tipo_documento)
+        if rangos:
+            rango = rangos[0]
+            folio = rango[0]
+            rango[0] += 1
+            if rango[0] > rango[1]:
+                rangos.pop(0)
+            return folio
+
+    ultimo = reservar_folios(tipo_documento, bloque)
+    primero = ultimo - bloque + 1
+
+    def publicar_resto():
+        with _lock:
+            _bloques.setdefault(tipo_documento, []).append([primero + 1, ultimo])
+
+    # El resto del bloque solo se ofrece a otras ventas cuando la reserva está
+    # confirmada: si la transacción externa hace rollback, el contador vuelve
+    # atrás y esos folios no deben entregarse.
+    transaction.on_commit(publicar_resto)
+    return primero
+
+
+def descartar_bloques():
+    """Olvida los bloques reservados por este proceso (los folios quedan sin usar)."""
+    with _lock:
+        _bloques.clear()
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from apps.clientes.models import Cliente
+from apps.documentos import folios
+from apps.documentos.models import DocumentoVenta
+from ticashop.benchmark import base_temporal, ejecutar_concurrente
+
+
+class Command(BaseCommand):
+    help = 'Mide cuántos documentos por segundo se emiten con N escritores concurrentes (base temporal).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, nargs='+', default=[8, 16, 32])
+        parser.add_argument('--documentos', type=int, default=50, help='Documentos por hilo')
+        parser.add_argument('--tipo', default='Boleta', choices=['Boleta', 'Factura'])
+        parser.add_argument('--bloque', type=int, nargs='+', default=[1, 50],
+                            help='Tamaños de bloque de folios a comparar')
+
+    def handle(self, *args, **options):
+        tipo = options['tipo']
+        por_hilo = options['documentos']
+
+        with base_temporal():
+            cliente = Cliente.objects.create(rut='BENCH-1', razon_social='Cliente Benchmark')
+
+            for bloque in options['bloque']:
+                for hilos in options['hilos']:
+                    DocumentoVenta.objects.all().delete()
+                    folios.descartar_bloques()
+
+                    def emitir(_indice):
+                        emitidos = 0
+                        for _ in range(por_hilo):
+                            with transaction.atomic():
+                                DocumentoVenta.objects.create(
+                                    tipo_documento=tipo, cliente=cliente, total=1190
+                                )
+                            emitidos += 1
+                        return emitidos
+
+                    with override_settings(FOLIOS_BLOQUE={tipo: bloque}):
+                        segundos, resultados, errores = ejecutar_concurrente(emitir, hilos)
+
+                    emitidos = sum(r or 0 for r in resultados)
+                    numeros = list(DocumentoVenta.objects.filter(tipo_documento=tipo).values_list('folio', flat=True))
+                    duplicados = len(numeros) - len(set(numeros))
+                    saltos = (max(numeros) - min(numeros) + 1 - len(numeros)) if numeros else 0
+
+                    self.stdout.write(
+                        f"bloque={bloque:<4} hilos={hilos:<3} emitidos={emitidos:<6} "
+                        f"docs/s={emitidos / segundos:>9.1f} errores={len(errores):<3} "
+                        f"duplicados={duplicados} saltos={saltos}"
+                    )
+                    for e in errores[:3]:
+                        self.stdout.write(self.style.WARNING(f"  {type(e).__name__}: {e}"))
+
+            folios.descartar_bloques()
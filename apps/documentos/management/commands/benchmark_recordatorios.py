@@ -0,0 +1,153 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from apps.clientes.models import Cliente
+from apps.documentos.models import DocumentoVenta
+from apps.documentos.recordatorios import (
+    ResultadoEnvio, enviar_en_lotes, enviar_recordatorios, mensajes_recordatorio,
+)
+from apps.usuarios.models import Usuario
+from ticashop.benchmark import base_temporal
+
+BACKEND_SIMULADO = 'apps.documentos.management.commands.benchmark_recordatorios.CorreoSimulado'
+
+
+class CorreoSimulado(BaseEmailBackend):
+    """Backend que imita la latencia de un servidor SMTP: abrir conexión (TLS + login) y enviar cada mensaje."""
+    latencia_conexion = 0.05
+    latencia_mensaje = 0.005
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.abierta = False
+
+    def open(self):
+        if self.abierta:
+            return False
+        time.sleep(self.latencia_conexion)
+        self.abierta = True
+        return True
+
+    def close(self):
+        self.abierta = False
+
+    def send_messages(self, email_messages):
+        nueva = self.open()
+        try:
+            for mensaje in email_messages:
+                mensaje.message()  # serializa el MIME, como el backend real
+                time.sleep(self.latencia_mensaje)
+        finally:
+            if nueva:
+                self.close()
+        return len(email_messages)
+
+
+def enviar_anterior(documentos):
+    """Un send_mail por factura (conexión nueva, render_to_string y cliente/usuario por fila), como antes."""
+    enviados = 0
+    for documento in documentos:
+        email = documento.cliente.email_facturacion or documento.cliente.user.email
+        cuerpo = render_to_string('documentos/email/recordatorio_vencida.txt', {
+            'cliente_nombre': documento.cliente.razon_social,
+            'folio': documento.folio,
+            'total': documento.total,
+            'saldo': documento.saldo_pendiente,
+            'fecha_vencimiento': documento.fecha_vencimiento,
+        })
+        send_mail(f"Aviso de Vencimiento: Tu Factura #{documento.folio} está vencida", cuerpo,
+                  settings.DEFAULT_FROM_EMAIL, [email], fail_silently=False)
+        enviados += 1
+    return enviados
+
+
+class Command(BaseCommand):
+    help = ('Compara el envío de recordatorios uno a uno (send_mail por factura) con el envío en lotes '
+            'por conexiones reutilizadas, contra un backend con latencia SMTP simulada, y mide corridas '
+            'repetidas con el registro de recordatorios (base temporal).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--facturas', type=int, default=50_000)
+        parser.add_argument('--clientes', type=int, default=5_000)
+        parser.add_argument('--muestra-anterior', type=int, default=300,
+                            help='Facturas enviadas con el método anterior (se extrapola al total)')
+        parser.add_argument('--lote', type=int, nargs='+', default=[100])
+        parser.add_argument('--hilos', type=int, nargs='+', default=[1, 4, 8])
+        parser.add_argument('--latencia-conexion', type=float, default=50, help='ms por conexión abierta')
+        parser.add_argument('--latencia-mensaje', type=float, default=5, help='ms por mensaje')
+
+    def generar(self, facturas, clientes):
+        azar = random.Random(3)
+        usuarios = Usuario.objects.bulk_create([
+            Usuario(username=f'bench_cliente_{i}', email=f'cliente{i}@example.com', rol='Cliente')
+            for i in range(clientes)
+        ], batch_size=2000)
+        perfiles = Cliente.objects.bulk_create([
+            Cliente(user=u, rut=f'BENCH-{i}', razon_social=f'Cliente {i}',
+                    email_facturacion=f'facturas{i}@example.com' if i % 3 else None)
+            for i, u in enumerate(usuarios)
+        ], batch_size=2000)
+        hoy = timezone.localdate()
+        DocumentoVenta.objects.bulk_create([
+            DocumentoVenta(tipo_documento='Factura', folio=1000 + i, cliente=azar.choice(perfiles),
+                           total=Decimal(azar.randint(10_000, 2_000_000)), estado='Emitida',
+                           fecha_emision=timezone.now() - timedelta(days=60),
+                           fecha_vencimiento=hoy - timedelta(days=azar.randint(1, 30)))
+            for i in range(facturas)
+        ], batch_size=5000)
+
+    def handle(self, *args, **options):
+        CorreoSimulado.latencia_conexion = options['latencia_conexion'] / 1000
+        CorreoSimulado.latencia_mensaje = options['latencia_mensaje'] / 1000
+
+        with base_temporal(), override_settings(EMAIL_BACKEND=BACKEND_SIMULADO):
+            self.stdout.write(f"Generando {options['facturas']} facturas vencidas...")
+            self.generar(options['facturas'], options['clientes'])
+            vencidas = DocumentoVenta.objects.filter(fecha_vencimiento__lt=timezone.localdate()).pendientes_de_pago()
+            total = vencidas.count()
+
+            muestra = list(DocumentoVenta.objects.order_by('pk')[:options['muestra_anterior']])
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                enviados = enviar_anterior(muestra)
+                segundos = time.perf_counter() - inicio
+            por_segundo = enviados / segundos
+            self.stdout.write(
+                f"anterior   (muestra {enviados}): {por_segundo:>8.0f} correos/s, {len(consultas)} consultas "
+                f"-> {total} facturas en ~{total / por_segundo / 60:.1f} min"
+            )
+
+            for lote in options['lote']:
+                for hilos in options['hilos']:
+                    resultado = ResultadoEnvio()
+                    with CaptureQueriesContext(connection) as consultas:
+                        enviar_en_lotes(mensajes_recordatorio(vencidas, 'vencida', resultado),
+                                        tamano_lote=lote, hilos=hilos, resultado=resultado)
+                    self.stdout.write(
+                        f"lotes={lote:<4} hilos={hilos:<3}: {resultado.por_segundo:>8.0f} correos/s, "
+                        f"{len(consultas)} consultas, {resultado.enviados} enviados, "
+                        f"{resultado.fallidos} fallidos en {resultado.segundos:.1f} s"
+                    )
+
+            # Con el registro de recordatorios: la primera corrida envía las etapas del día,
+            # la segunda no encuentra trabajo nuevo aunque la deuda vencida siga igual
+            for corrida in ('primera', 'segunda'):
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    resultado = enviar_recordatorios(hilos=max(options['hilos']), tamano_lote=options['lote'][0])
+                    segundos = time.perf_counter() - inicio
+                self.stdout.write(
+                    f"registro, {corrida} corrida: {resultado.enviados} enviados de {total} vencidas, "
+                    f"{len(consultas)} consultas, {segundos:.2f} s"
+                )
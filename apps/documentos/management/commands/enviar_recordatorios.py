@@ -1,100 +1,71 @@
 import logging
-from django.core.management.base import BaseCommand
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from datetime import timedelta
-from django.core.mail import send_mail
+from django.core.mail import get_connection, send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
-from apps.documentos.models import DocumentoVenta
+from apps.documentos.recordatorios import HILOS, TAMANO_BLOQUE, TAMANO_LOTE, enviar_recordatorios
 
 # Configurar un logger para ver qué pasa
 logger = logging.getLogger(__name__)
 
 class Command(BaseCommand):
-    help = 'Busca facturas por vencer y vencidas, y envía recordatorios por correo.'
+    help = ('Envía los recordatorios de pago que corresponden hoy según RECORDATORIOS_CADENCIA '
+            '(por vencer y vencidas). Lo ya enviado queda en RecordatorioPago y no se repite.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help='Día a procesar (AAAA-MM-DD); por defecto hoy')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Correos por envío (por conexión)')
+        parser.add_argument('--hilos', type=int, default=HILOS, help='Conexiones de correo simultáneas')
+        parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help='Facturas leídas por consulta')
+        parser.add_argument('--backend', default=None,
+                            help='EMAIL_BACKEND a usar en esta ejecución (ej. django.core.mail.backends.console.EmailBackend)')
+        parser.add_argument('--sin-resumen', action='store_true', help='No envía el resumen al administrador')
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Iniciando tarea de recordatorios de pago...'))
         
         hoy = timezone.localdate()
-        
-        # --- 1. Buscar facturas POR VENCER (Ej: vencen en 3 días) ---
-        fecha_limite_pronto = hoy + timedelta(days=3)
-        facturas_por_vencer = DocumentoVenta.objects.filter(
-            tipo_documento='Factura',
-            estado__in=['Emitida', 'Pago Parcial'], # Solo las pendientes
-            fecha_vencimiento=fecha_limite_pronto
-        )
-
-        for doc in facturas_por_vencer:
-            self.enviar_correo_recordatorio(doc, 'por_vencer')
+        if options['fecha']:
+            try:
+                hoy = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError('--fecha debe tener el formato AAAA-MM-DD.')
 
-        # --- 2. Buscar facturas VENCIDAS ---
-        facturas_vencidas = DocumentoVenta.objects.filter(
-            tipo_documento='Factura',
-            estado__in=['Emitida', 'Pago Parcial'], # Solo las pendientes
-            fecha_vencimiento__lt=hoy  # Fecha de vencimiento es anterior a hoy
+        resultado = enviar_recordatorios(
+            hoy, tamano_lote=options['lote'], hilos=options['hilos'],
+            backend=options['backend'], tamano_bloque=options['bloque'],
         )
-        
-        for doc in facturas_vencidas:
-            self.enviar_correo_recordatorio(doc, 'vencida')
+        self.reportar(resultado)
 
-        # --- 3. (Opcional) Enviar resumen al administrador ---
-        if facturas_por_vencer.count() > 0 or facturas_vencidas.count() > 0:
-            self.enviar_resumen_admin(facturas_por_vencer, facturas_vencidas)
+        # --- Resumen al administrador (con lo enviado en esta ejecución) ---
+        if resultado.enviados and not options['sin_resumen']:
+            self.enviar_resumen_admin(hoy, resultado, options['backend'])
 
         self.stdout.write(self.style.SUCCESS('Tarea de recordatorios finalizada.'))
 
-    def enviar_correo_recordatorio(self, documento, tipo_plantilla):
-        """
-        Prepara y envía un correo al cliente.
-        """
-        cliente = documento.cliente
-        # Intentamos obtener el email de facturación, si no, el del perfil de usuario
-        email_cliente = documento.cliente.email_facturacion or documento.cliente.user.email
-
-        if not email_cliente:
-            logger.warning(f"Factura #{documento.folio} no tiene email de cliente.")
-            return
+    def reportar(self, resultado):
+        linea = (f"Facturas: {resultado.documentos} (por vencer {resultado.por_tipo['por_vencer']}, "
+                 f"vencidas {resultado.por_tipo['vencida']}) | enviados: {resultado.enviados} | "
+                 f"fallidos: {resultado.fallidos} | sin email: {resultado.sin_email} | "
+                 f"lotes: {resultado.lotes} | {resultado.segundos:.1f} s ({resultado.por_segundo:.0f} correos/s)")
+        logger.info(linea)
+        self.stdout.write(self.style.WARNING(linea) if resultado.fallidos else linea)
+        for error in resultado.errores[:5]:
+            self.stdout.write(self.style.ERROR(f"  {error}"))
 
-        if tipo_plantilla == 'por_vencer':
-            asunto = f"Recordatorio: Tu Factura #{documento.folio} está por vencer"
-            template_txt = 'documentos/email/recordatorio_por_vencer.txt'
-        else: # 'vencida'
-            asunto = f"Aviso de Vencimiento: Tu Factura #{documento.folio} está vencida"
-            template_txt = 'documentos/email/recordatorio_vencida.txt'
-
-        context = {
-            'cliente_nombre': cliente.razon_social,
-            'folio': documento.folio,
-            'total': documento.total,
-            'fecha_vencimiento': documento.fecha_vencimiento,
-        }
-        
-        cuerpo_mensaje = render_to_string(template_txt, context)
-
-        try:
-            send_mail(
-                asunto,
-                cuerpo_mensaje,
-                settings.DEFAULT_FROM_EMAIL, # Tu email (ej: "ventas@ticashop.cl")
-                [email_cliente],             # Email del destinatario
-                fail_silently=False,
-            )
-            logger.info(f"Correo enviado para Factura #{documento.folio} a {email_cliente}")
-        except Exception as e:
-            logger.error(f"Error al enviar correo para Factura #{documento.folio}: {e}")
-
-    def enviar_resumen_admin(self, por_vencer, vencidas):
+    def enviar_resumen_admin(self, hoy, resultado, backend=None):
         """
         Envía un resumen de la cobranza a un correo de la empresa.
         """
-        asunto = f"Resumen de Cobranza TicaShop - {timezone.localdate()}"
+        asunto = f"Resumen de Cobranza TicaShop - {hoy}"
         context = {
-            'facturas_por_vencer': por_vencer,
-            'facturas_vencidas': vencidas,
-            'total_por_vencer': por_vencer.count(),
-            'total_vencidas': vencidas.count(),
+            'fecha': hoy,
+            'facturas_por_vencer': resultado.resumen['por_vencer'],
+            'facturas_vencidas': resultado.resumen['vencida'],
+            'total_por_vencer': resultado.por_tipo['por_vencer'],
+            'total_vencidas': resultado.por_tipo['vencida'],
         }
         cuerpo_mensaje = render_to_string('documentos/email/resumen_admin.txt', context)
         
@@ -102,5 +73,6 @@ class Command(BaseCommand):
             asunto,
             cuerpo_mensaje,
             settings.DEFAULT_FROM_EMAIL,
-            [settings.EMAIL_HOST_USER] # Se auto-envía al email de la empresa
-        )
\ No newline at end of file
+            [settings.EMAIL_HOST_USER], # Se auto-envía al email de la empresa
+            connection=get_connection(backend=backend),
+        )
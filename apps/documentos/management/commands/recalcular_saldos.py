@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.documentos.saldos import documentos_descuadrados, recalcular_monto_pagado
+
+
+class Command(BaseCommand):
+    help = ('Recalcula DocumentoVenta.monto_pagado desde la tabla de pagos (después de cargas masivas '
+            'o ediciones directas en la base). Con --verificar solo informa los documentos descuadrados.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true', help='No escribe; lista las diferencias')
+
+    def handle(self, *args, **options):
+        descuadrados = documentos_descuadrados()
+        if options['verificar']:
+            cantidad = descuadrados.count()
+            for doc in descuadrados.order_by('id')[:20]:
+                self.stdout.write(f"  {doc} (id {doc.id}): monto_pagado={doc.monto_pagado} pagos={doc.suma_real}")
+            estilo = self.style.SUCCESS if not cantidad else self.style.WARNING
+            self.stdout.write(estilo(f"{cantidad} documentos descuadrados."))
+            return
+
+        actualizados = recalcular_monto_pagado()
+        self.stdout.write(self.style.SUCCESS(f"monto_pagado recalculado en {actualizados} documentos."))
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-17 18:41
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def inicializar_secuencias(apps, schema_editor):
+    """Parte cada secuencia desde el folio más alto ya emitido."""
+    DocumentoVenta = apps.get_model('documentos', 'DocumentoVenta')
+    SecuenciaFolio = apps.get_model('documentos', 'SecuenciaFolio')
+    maximos = DocumentoVenta.objects.values('tipo_documento').annotate(m=Max('folio'))
+    for fila in maximos:
+        if fila['tipo_documento'] and fila['m']:
+            SecuenciaFolio.objects.update_or_create(
+                tipo_documento=fila['tipo_documento'],
+                defaults={'ultimo_folio': fila['m']},
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0006_alter_detallenotacredito_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaFolio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_documento', models.CharField(choices=[('Factura', 'Factura'), ('Boleta', 'Boleta')], max_length=7, unique=True)),
+                ('ultimo_folio', models.IntegerField(default=0, verbose_name='Último folio asignado')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Folio',
+                'verbose_name_plural': 'Secuencias de Folio',
+                'db_table': 'secuencias_folio',
+            },
+        ),
+        migrations.RunPython(inicializar_secuencias, migrations.RunPython.noop),
+    ]
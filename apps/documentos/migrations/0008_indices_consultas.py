@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_alter_cliente_user'),
+        ('documentos', '0007_secuenciafolio'),
+        ('ventas', '0004_indices_consultas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='documentoventa',
+            index=models.Index(fields=['tipo_documento', '-fecha_emision'], name='docs_tipo_emision_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentoventa',
+            index=models.Index(fields=['estado', 'fecha_vencimiento'], name='docs_estado_venc_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:21
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def calcular_monto_pagado(apps, schema_editor):
+    """Carga la suma de pagos existente de cada documento con un solo UPDATE."""
+    DocumentoVenta = apps.get_model('documentos', 'DocumentoVenta')
+    Pago = apps.get_model('documentos', 'Pago')
+    pagos = (
+        Pago.objects.filter(documento=OuterRef('pk')).order_by()
+        .values('documento').annotate(s=Sum('monto_pagado')).values('s')
+    )
+    monto = DecimalField(max_digits=12, decimal_places=2)
+    DocumentoVenta.objects.update(
+        monto_pagado=Coalesce(Subquery(pagos, output_field=monto), Value(Decimal('0')), output_field=monto)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0008_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentoventa',
+            name='monto_pagado',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Monto pagado'),
+        ),
+        migrations.RunPython(calcular_monto_pagado, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0009_monto_pagado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecordatorioPago',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('por_vencer', 'Por vencer'), ('vencida', 'Vencida')], max_length=10)),
+                ('etapa', models.SmallIntegerField(verbose_name='Días desde el vencimiento')),
+                ('fecha_envio', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de envío')),
+                ('documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recordatorios', to='documentos.documentoventa')),
+            ],
+            options={
+                'verbose_name': 'Recordatorio de Pago',
+                'verbose_name_plural': 'Recordatorios de Pago',
+                'db_table': 'recordatorios_pago',
+                'indexes': [models.Index(fields=['fecha_envio'], name='recordatorios_fecha_idx')],
+                'constraints': [models.UniqueConstraint(fields=('documento', 'etapa'), name='recordatorio_documento_etapa_unico')],
+            },
+        ),
+    ]
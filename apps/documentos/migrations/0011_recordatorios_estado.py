@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-17 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0010_recordatorios_pago'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recordatoriopago',
+            name='estado',
+            field=models.CharField(choices=[('Pendiente', 'Pendiente'), ('Enviado', 'Enviado')], default='Enviado', max_length=10),
+        ),
+    ]
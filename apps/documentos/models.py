@@ -1,9 +1,47 @@
 # apps/documentos/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 from django.conf import settings
 from decimal import Decimal
 
+
+def suma_pagos():
+    """Subconsulta correlacionada con la suma de pagos del documento de la fila externa."""
+    pagos = (
+        Pago.objects.filter(documento=OuterRef('pk'))
+        .order_by()
+        .values('documento')
+        .annotate(s=Sum('monto_pagado'))
+        .values('s')
+    )
+    monto = DecimalField(max_digits=12, decimal_places=2)
+    return Coalesce(Subquery(pagos, output_field=monto), Value(Decimal('0')), output_field=monto)
+
+
+class DocumentoVentaQuerySet(models.QuerySet):
+    def con_saldo(self):
+        """
+        Anota total_pagado y saldo (total menos pagos, mínimo 0) calculados en la
+        base, para filtrar y ordenar por saldo sin cargar los pagos.
+        Con settings.SALDO_DESNORMALIZADO se lee la columna monto_pagado; si no,
+        se suma la tabla de pagos con una subconsulta por fila.
+        """
+        monto = DecimalField(max_digits=12, decimal_places=2)
+        if getattr(settings, 'SALDO_DESNORMALIZADO', True):
+            pagado = F('monto_pagado')
+        else:
+            pagado = suma_pagos()
+        return self.annotate(total_pagado=pagado).annotate(
+            saldo=Greatest(F('total') - F('total_pagado'), Value(Decimal('0')), output_field=monto),
+        )
+
+    def pendientes_de_pago(self):
+        """Documentos Emitidos o con Pago Parcial que todavía tienen saldo."""
+        return self.filter(estado__in=['Emitida', 'Pago Parcial']).con_saldo().filter(saldo__gt=0)
+
+
 class DocumentoVenta(models.Model):
     TIPOS_DOCUMENTO = (
         ('Factura', 'Factura'),
@@ -51,13 +89,23 @@ class DocumentoVenta(models.Model):
     ciudad = models.CharField(max_length=100, blank=True, null=True)
     comuna = models.CharField(max_length=100, blank=True, null=True)
 
+    # Suma de los pagos, mantenida por Pago.save()/delete() (ver apps/documentos/saldos.py)
+    monto_pagado = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False,
+                                       verbose_name='Monto pagado')
+
+    objects = DocumentoVentaQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         if not self.folio:
-            ultimo = DocumentoVenta.objects.filter(tipo_documento=self.tipo_documento).order_by('-folio').first()
-            if ultimo and ultimo.folio:
-                self.folio = ultimo.folio + 1
-            else:
-                self.folio = 1000
+            # El folio sale de la secuencia por tipo (ver apps/documentos/folios.py)
+            from .folios import siguiente_folio
+            self.folio = siguiente_folio(self.tipo_documento)
+        # Un save() completo escribiría el monto_pagado leído antes y pisaría los pagos
+        # registrados entretanto (saldos.py lo mueve con F()): al actualizar no se escribe.
+        if not self._state.adding and self.pk and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != 'monto_pagado'
+            ]
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -65,11 +113,13 @@ class DocumentoVenta(models.Model):
 
     @property
     def saldo_pendiente(self):
-        try:
-            total_pagado = sum(pago.monto_pagado for pago in self.pagos.all())
-            return max(self.total - total_pagado, 0)
-        except:
-            return self.total
+        """Saldo por pagar: usa la anotación de con_saldo() si está, si no la columna monto_pagado."""
+        if hasattr(self, 'saldo'):
+            return self.saldo
+        if getattr(settings, 'SALDO_DESNORMALIZADO', True):
+            return max(self.total - self.monto_pagado, 0)
+        total_pagado = sum(pago.monto_pagado for pago in self.pagos.all())
+        return max(self.total - total_pagado, 0)
 
     def esta_vencida(self):
         try:
@@ -85,6 +135,27 @@ class DocumentoVenta(models.Model):
         verbose_name_plural = 'Documentos de Venta'
         unique_together = ['tipo_documento', 'folio']
         ordering = ['-fecha_emision']
+        indexes = [
+            # listar_documentos: tipo_documento='Factura' ordenado por fecha de emisión
+            models.Index(fields=['tipo_documento', '-fecha_emision'], name='docs_tipo_emision_idx'),
+            # Tesorería y enviar_recordatorios (estado IN pendientes + vencimiento) y conteos por estado.
+            # No es parcial: SQLite no usa un índice parcial cuando el IN llega como parámetros.
+            models.Index(fields=['estado', 'fecha_vencimiento'], name='docs_estado_venc_idx'),
+        ]
+
+
+class SecuenciaFolio(models.Model):
+    """Contador de folios: una fila por tipo de documento."""
+    tipo_documento = models.CharField(max_length=7, choices=DocumentoVenta.TIPOS_DOCUMENTO, unique=True)
+    ultimo_folio = models.IntegerField(default=0, verbose_name='Último folio asignado')
+
+    def __str__(self):
+        return f"{self.tipo_documento}: {self.ultimo_folio}"
+
+    class Meta:
+        db_table = 'secuencias_folio'
+        verbose_name = 'Secuencia de Folio'
+        verbose_name_plural = 'Secuencias de Folio'
 
 
 class DetalleDocumento(models.Model):
@@ -118,6 +189,45 @@ class Pago(models.Model):
     def __str__(self):
         return f"Pago #{self.id} - {self.monto_pagado}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores persistidos, para aplicar solo la diferencia a DocumentoVenta.monto_pagado
+        instance._documento_guardado = instance.__dict__.get('documento_id')
+        instance._monto_guardado = instance.__dict__.get('monto_pagado')
+        return instance
+
+    def _documento_en_memoria(self):
+        return self._meta.get_field('documento').get_cached_value(self, default=None)
+
+    def save(self, *args, **kwargs):
+        """Guarda el pago y aplica la diferencia al monto_pagado del documento en la misma transacción"""
+        from .saldos import aplicar_pago
+        documento_anterior = getattr(self, '_documento_guardado', None)
+        monto_anterior = getattr(self, '_monto_guardado', None) or Decimal('0')
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if documento_anterior and documento_anterior != self.documento_id:
+                aplicar_pago(documento_anterior, -monto_anterior)
+                monto_anterior = Decimal('0')
+            aplicar_pago(self.documento_id, Decimal(self.monto_pagado) - monto_anterior,
+                         self._documento_en_memoria())
+        self._documento_guardado = self.documento_id
+        self._monto_guardado = self.monto_pagado
+
+    def delete(self, *args, **kwargs):
+        """Descuenta el pago del monto_pagado del documento"""
+        from .saldos import aplicar_pago
+        documento_id = getattr(self, '_documento_guardado', None) or self.documento_id
+        monto = getattr(self, '_monto_guardado', None)
+        if monto is None:
+            monto = self.monto_pagado or Decimal('0')
+        with transaction.atomic(savepoint=False):
+            resultado = super().delete(*args, **kwargs)
+            aplicar_pago(documento_id, -monto,
+                         self._documento_en_memoria() if documento_id == self.documento_id else None)
+        return resultado
+
     class Meta:
         db_table = 'pagos'
         verbose_name = 'Pago'
@@ -125,6 +235,44 @@ class Pago(models.Model):
         ordering = ['-fecha_pago']
 
 
+class RecordatorioPago(models.Model):
+    """
+    Registro de recordatorios de pago enviados: uno por documento y etapa de
+    la cadencia (días respecto al vencimiento, ver RECORDATORIOS_CADENCIA).
+    La restricción única hace que enviar_recordatorios sea idempotente. Se
+    escribe 'Pendiente' antes de encolar el correo y pasa a 'Enviado' cuando
+    el lote se entregó; los pendientes se reintentan en la próxima ejecución.
+    """
+    TIPOS = (
+        ('por_vencer', 'Por vencer'),
+        ('vencida', 'Vencida'),
+    )
+    ESTADOS = (
+        ('Pendiente', 'Pendiente'),
+        ('Enviado', 'Enviado'),
+    )
+
+    documento = models.ForeignKey(DocumentoVenta, on_delete=models.CASCADE, related_name='recordatorios')
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    etapa = models.SmallIntegerField(verbose_name='Días desde el vencimiento')
+    fecha_envio = models.DateTimeField(default=timezone.now, verbose_name='Fecha de envío')
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='Enviado')
+
+    def __str__(self):
+        return f"{self.documento} - {self.tipo} ({self.etapa:+d} días)"
+
+    class Meta:
+        db_table = 'recordatorios_pago'
+        verbose_name = 'Recordatorio de Pago'
+        verbose_name_plural = 'Recordatorios de Pago'
+        constraints = [
+            models.UniqueConstraint(fields=['documento', 'etapa'], name='recordatorio_documento_etapa_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha_envio'], name='recordatorios_fecha_idx'),
+        ]
+
+
 class NotaCredito(models.Model):
     ESTADOS = [
         ('Emitida', 'Emitida'),
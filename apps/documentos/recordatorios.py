@@ -0,0 +1,304 @@
+"""
+Envío masivo de recordatorios de pago.
+
+Qué enviar: la cadencia (settings.RECORDATORIOS_CADENCIA) define etapas en
+días respecto al vencimiento. Cada día solo se consideran las facturas
+pendientes cuyo vencimiento cae en la ventana de alguna etapa y que no
+tienen ya un RecordatorioPago de esa etapa, así que el trabajo crece con
+los vencimientos nuevos y no con toda la deuda histórica. Los candidatos se
+recorren en bloques por clave (pk > último visto) y el registro de cada
+bloque se escribe como 'Pendiente' antes de encolar sus correos; pasa a
+'Enviado' solo después de que send_messages entregó su lote. Si un lote
+falla, o el proceso se cae o lo matan a mitad del envío, sus registros
+quedan pendientes y se reintentan en la próxima ejecución (un correo
+entregado justo antes de la caída puede repetirse, pero ninguno se pierde).
+
+Cómo enviar: los documentos se leen con cliente y usuario en la misma
+consulta, cada mensaje se arma con la plantilla ya compilada (get_template
+una sola vez por tipo) y los correos se envían en lotes de EmailMessage.
+El hilo principal produce los lotes (toda la lectura y escritura de la base
+ocurre ahí) y un grupo acotado de hilos los envía; cada hilo abre una sola
+conexión con get_connection() y la reutiliza para todos sus lotes. La cola
+entre ambos tiene tamaño fijo, así que la memoria no crece con la cantidad
+de facturas.
+
+Funciona con cualquier EMAIL_BACKEND (smtp, console, locmem).
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import DocumentoVenta, RecordatorioPago
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 100
+HILOS = 4
+TAMANO_BLOQUE = 2000  # documentos por consulta al recorrer los candidatos
+MAX_RESUMEN = 200  # facturas por tipo que se listan en el resumen al administrador
+
+PLANTILLAS = {
+    'por_vencer': ('Recordatorio: Tu Factura #{folio} está por vencer',
+                   'documentos/email/recordatorio_por_vencer.txt'),
+    'vencida': ('Aviso de Vencimiento: Tu Factura #{folio} está vencida',
+                'documentos/email/recordatorio_vencida.txt'),
+}
+
+_FIN = object()
+
+
+class ResultadoEnvio:
+    """Contadores del envío, compartidos entre los hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documentos = 0
+        self.sin_email = 0
+        self.enviados = 0
+        self.fallidos = 0
+        self.lotes = 0
+        self.errores = []
+        self.entregados = []  # (documento_id, etapa) enviados y aún no confirmados en la base
+        self.por_tipo = {tipo: 0 for tipo in PLANTILLAS}
+        self.resumen = {tipo: [] for tipo in PLANTILLAS}
+        self.segundos = 0.0
+
+    def sumar(self, enviados=0, fallidos=0, error=None, entregados=()):
+        with self._lock:
+            self.lotes += 1
+            self.entregados.extend(entregados)
+            self.enviados += enviados
+            self.fallidos += fallidos
+            if error and len(self.errores) < 20:
+                self.errores.append(error)
+
+    def tomar_entregados(self):
+        with self._lock:
+            entregados, self.entregados = self.entregados, []
+        return entregados
+
+    def encolado(self, tipo, documento):
+        """Cuenta el recordatorio y guarda (acotado) el documento para el resumen."""
+        self.por_tipo[tipo] += 1
+        if len(self.resumen[tipo]) < MAX_RESUMEN:
+            self.resumen[tipo].append(documento)
+
+    @property
+    def por_segundo(self):
+        return self.enviados / self.segundos if self.segundos else 0.0
+
+    def como_dict(self):
+        return {
+            'documentos': self.documentos, 'sin_email': self.sin_email, 'enviados': self.enviados,
+            'fallidos': self.fallidos, 'lotes': self.lotes, 'segundos': round(self.segundos, 2),
+            'por_segundo': round(self.por_segundo, 1), 'por_tipo': self.por_tipo, 'errores': self.errores,
+        }
+
+
+def email_documento(documento):
+    """Email de facturación del cliente o, si no tiene, el de su usuario."""
+    cliente = documento.cliente
+    if cliente.email_facturacion:
+        return cliente.email_facturacion
+    usuario = cliente.user
+    return usuario.email if usuario else None
+
+
+def _mensaje(tipo, plantilla, documento, email, etapa=None):
+    asunto = PLANTILLAS[tipo][0]
+    cuerpo = plantilla.render({
+        'cliente_nombre': documento.cliente.razon_social,
+        'folio': documento.folio,
+        'total': documento.total,
+        'saldo': documento.saldo_pendiente,
+        'fecha_vencimiento': documento.fecha_vencimiento,
+    })
+    mensaje = EmailMessage(asunto.format(folio=documento.folio), cuerpo, settings.DEFAULT_FROM_EMAIL, [email])
+    # Para confirmar el registro (documento y etapa) cuando el lote se entregue
+    mensaje.documento_id = documento.pk
+    mensaje.etapa = etapa
+    return mensaje
+
+
+def _con_email(documentos, resultado):
+    for documento in documentos:
+        resultado.documentos += 1
+        email = email_documento(documento)
+        if not email:
+            resultado.sin_email += 1
+            logger.warning(f"Factura #{documento.folio} no tiene email de cliente.")
+            continue
+        yield documento, email
+
+
+def mensajes_recordatorio(documentos, tipo, resultado):
+    """
+    Genera un EmailMessage por documento de `documentos` (queryset) con la
+    plantilla de `tipo` ('por_vencer' o 'vencida'), sin pasar por el registro.
+    """
+    plantilla = get_template(PLANTILLAS[tipo][1])
+    documentos = documentos.select_related('cliente__user').order_by('pk')
+    for documento, email in _con_email(documentos.iterator(chunk_size=TAMANO_BLOQUE), resultado):
+        yield _mensaje(tipo, plantilla, documento, email)
+
+
+# ========== CADENCIA Y REGISTRO ==========
+
+def tipo_etapa(etapa):
+    return 'por_vencer' if etapa <= 0 else 'vencida'
+
+
+def etapas(hoy, cadencia=None, ventana=None):
+    """
+    [(etapa, tipo, desde, hasta)]: para cada etapa de la cadencia, el rango de
+    fechas de vencimiento que hoy le corresponde. La ventana recupera
+    ejecuciones atrasadas sin solaparse con la etapa siguiente, así que cada
+    factura cae a lo más en una etapa por día.
+    """
+    cadencia = sorted(set(settings.RECORDATORIOS_CADENCIA if cadencia is None else cadencia))
+    ventana = max(1, settings.RECORDATORIOS_VENTANA if ventana is None else ventana)
+    resultado = []
+    for i, etapa in enumerate(cadencia):
+        dias = ventana if i + 1 == len(cadencia) else min(ventana, cadencia[i + 1] - etapa)
+        hasta = hoy - timedelta(days=etapa)
+        resultado.append((etapa, tipo_etapa(etapa), hasta - timedelta(days=dias - 1), hasta))
+    return resultado
+
+
+def documentos_por_recordar(etapa, desde, hasta):
+    """Facturas con saldo, vencimiento entre desde y hasta, y sin recordatorio enviado de esta etapa."""
+    enviados = RecordatorioPago.objects.filter(documento=OuterRef('pk'), etapa=etapa, estado='Enviado')
+    return (
+        DocumentoVenta.objects
+        .filter(tipo_documento='Factura', fecha_vencimiento__range=(desde, hasta))
+        .pendientes_de_pago()
+        .filter(~Exists(enviados))
+    )
+
+
+def por_bloques(documentos, tamano=TAMANO_BLOQUE):
+    """Recorre el queryset en bloques ordenados por pk (pk > último visto, sin OFFSET)."""
+    ultimo = 0
+    while True:
+        bloque = list(documentos.filter(pk__gt=ultimo).order_by('pk')[:tamano])
+        if not bloque:
+            return
+        yield bloque
+        ultimo = bloque[-1].pk
+
+
+def confirmar_entregados(resultado):
+    """Pasa a 'Enviado' los registros de los lotes ya entregados (un UPDATE por etapa)."""
+    por_etapa = {}
+    for documento_id, etapa in resultado.tomar_entregados():
+        por_etapa.setdefault(etapa, []).append(documento_id)
+    ahora = timezone.now()
+    for etapa, documento_ids in por_etapa.items():
+        for inicio in range(0, len(documento_ids), 500):
+            RecordatorioPago.objects.filter(
+                etapa=etapa, documento_id__in=documento_ids[inicio:inicio + 500], estado='Pendiente',
+            ).update(estado='Enviado', fecha_envio=ahora)
+
+
+def mensajes_pendientes(hoy, resultado, fecha_envio, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Genera los mensajes de todas las etapas que corresponden a `hoy`. Antes de
+    entregar los mensajes de un bloque registra sus RecordatorioPago como
+    pendientes y confirma los lotes que los hilos ya entregaron.
+    """
+    for etapa, tipo, desde, hasta in etapas(hoy):
+        plantilla = get_template(PLANTILLAS[tipo][1])
+        candidatos = documentos_por_recordar(etapa, desde, hasta).select_related('cliente__user')
+        for bloque in por_bloques(candidatos, tamano_bloque):
+            confirmar_entregados(resultado)
+            destinatarios = list(_con_email(bloque, resultado))
+            # Los pendientes de una ejecución anterior ya tienen su fila (ignore_conflicts)
+            RecordatorioPago.objects.bulk_create([
+                RecordatorioPago(documento=documento, tipo=tipo, etapa=etapa, fecha_envio=fecha_envio,
+                                 estado='Pendiente')
+                for documento, _ in destinatarios
+            ], ignore_conflicts=True)
+            for documento, email in destinatarios:
+                resultado.encolado(tipo, documento)
+                yield _mensaje(tipo, plantilla, documento, email, etapa)
+
+
+def enviar_recordatorios(hoy=None, tamano_lote=TAMANO_LOTE, hilos=HILOS, backend=None,
+                         tamano_bloque=TAMANO_BLOQUE):
+    """Envía los recordatorios que corresponden a `hoy` y retorna el ResultadoEnvio."""
+    hoy = hoy or timezone.localdate()
+    fecha_envio = timezone.now()
+    resultado = ResultadoEnvio()
+    enviar_en_lotes(mensajes_pendientes(hoy, resultado, fecha_envio, tamano_bloque),
+                    tamano_lote=tamano_lote, hilos=hilos, backend=backend, resultado=resultado)
+    # Lo que no se pudo enviar queda 'Pendiente' y se vuelve a intentar en la próxima ejecución
+    confirmar_entregados(resultado)
+    return resultado
+
+
+# ========== ENVÍO ==========
+
+def _enviar_lotes(cola, resultado, backend):
+    conexion = get_connection(backend=backend)
+    abierta = False
+    try:
+        while True:
+            lote = cola.get()
+            if lote is _FIN:
+                return
+            try:
+                if not abierta:
+                    conexion.open()
+                    abierta = True
+                enviados = conexion.send_messages(lote) or 0
+                # send_messages no dice cuáles fallaron: solo se confirma un lote entregado completo
+                entregados = [
+                    (m.documento_id, m.etapa) for m in lote
+                    if enviados == len(lote) and getattr(m, 'etapa', None) is not None
+                ]
+                resultado.sumar(enviados=enviados, fallidos=len(lote) - enviados, entregados=entregados)
+            except Exception as e:
+                # Se sigue consumiendo la cola (el productor no se bloquea) y se
+                # reabre la conexión para el siguiente lote
+                logger.error(f"Error al enviar un lote de {len(lote)} recordatorios: {e}")
+                resultado.sumar(fallidos=len(lote), error=str(e))
+                conexion.close()
+                abierta = False
+    finally:
+        conexion.close()
+
+
+def enviar_en_lotes(mensajes, tamano_lote=TAMANO_LOTE, hilos=HILOS, backend=None, resultado=None):
+    """
+    Envía el iterable `mensajes` en lotes de `tamano_lote` repartidos entre
+    `hilos` conexiones reutilizadas. Retorna el ResultadoEnvio.
+    """
+    resultado = resultado or ResultadoEnvio()
+    cola = queue.Queue(maxsize=hilos * 2)
+    trabajadores = [
+        threading.Thread(target=_enviar_lotes, args=(cola, resultado, backend), daemon=True)
+        for _ in range(hilos)
+    ]
+    inicio = time.perf_counter()
+    for hilo in trabajadores:
+        hilo.start()
+    try:
+        mensajes = iter(mensajes)
+        while lote := list(islice(mensajes, tamano_lote)):
+            cola.put(lote)
+    finally:
+        for _ in trabajadores:
+            cola.put(_FIN)
+        for hilo in trabajadores:
+            hilo.join()
+    resultado.segundos += time.perf_counter() - inicio
+    return resultado
@@ -0,0 +1,44 @@
+"""
+Monto pagado desnormalizado de DocumentoVenta.
+
+Cada Pago guardado o eliminado aplica su diferencia sobre
+DocumentoVenta.monto_pagado con un UPDATE usando F(), dentro de la misma
+transacción que el pago (igual que los totales de pedido en
+apps/ventas/totales.py). Las escrituras masivas (bulk_create, update) no
+pasan por Pago.save(): después de ellas se llama a recalcular_monto_pagado(),
+que es también la ruta de reconciliación del comando recalcular_saldos.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from apps.usuarios import metricas
+
+from .models import DocumentoVenta, suma_pagos
+
+
+def aplicar_pago(documento_id, delta, documento=None):
+    """Suma `delta` a monto_pagado del documento (y a la instancia en memoria, si se pasa)."""
+    if not delta or documento_id is None:
+        return
+    DocumentoVenta.objects.filter(pk=documento_id).update(monto_pagado=F('monto_pagado') + delta)
+    if documento is not None:
+        documento.monto_pagado = (documento.monto_pagado or Decimal('0')) + delta
+
+
+def recalcular_monto_pagado(documentos=None):
+    """
+    Recalcula monto_pagado desde la tabla de pagos con un solo UPDATE
+    (todos los documentos, o el queryset `documentos`). Retorna las filas actualizadas.
+    """
+    documentos = DocumentoVenta.objects.all() if documentos is None else documentos
+    with transaction.atomic():
+        metricas.invalidar_al_confirmar('documentos')
+        return documentos.order_by().update(monto_pagado=suma_pagos())
+
+
+def documentos_descuadrados(documentos=None):
+    """Documentos cuyo monto_pagado no coincide con la suma de sus pagos."""
+    documentos = DocumentoVenta.objects.all() if documentos is None else documentos
+    return documentos.annotate(suma_real=suma_pagos()).filter(~Q(monto_pagado=F('suma_real')))
@@ -1,3 +1,62 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from apps.clientes.models import Cliente
+
+from .models import DocumentoVenta, Pago
+from .saldos import documentos_descuadrados
+
+
+class MontoPagadoTests(TestCase):
+    def setUp(self):
+        cliente = Cliente.objects.create(rut='11111111-1', razon_social='Cliente Uno')
+        self.factura = DocumentoVenta.objects.create(tipo_documento='Factura', cliente=cliente, total=10000)
+        self.boleta = DocumentoVenta.objects.create(tipo_documento='Boleta', cliente=cliente, total=5000)
+
+    def pagar(self, documento, monto):
+        return Pago.objects.create(documento=documento, monto_pagado=Decimal(monto), metodo_pago='Efectivo')
+
+    def assertPagado(self, documento, monto):
+        self.assertEqual(DocumentoVenta.objects.get(pk=documento.pk).monto_pagado, Decimal(monto))
+        self.assertFalse(documentos_descuadrados().exists())
+
+    def test_crear_pagos(self):
+        self.pagar(self.factura, 3000)
+        self.pagar(self.factura, 2000)
+        self.assertPagado(self.factura, 5000)
+        self.assertPagado(self.boleta, 0)
+
+    def test_editar_monto(self):
+        pago = self.pagar(self.factura, 3000)
+        pago.monto_pagado = Decimal('4500')
+        pago.save()
+        self.assertPagado(self.factura, 4500)
+        # Una instancia leída de la base aplica solo su diferencia
+        leido = Pago.objects.get(pk=pago.pk)
+        leido.monto_pagado = Decimal('1000')
+        leido.save()
+        self.assertPagado(self.factura, 1000)
+
+    def test_mover_pago_a_otro_documento(self):
+        self.pagar(self.factura, 1000)
+        pago = Pago.objects.get(pk=self.pagar(self.factura, 3000).pk)
+        pago.documento = self.boleta
+        pago.monto_pagado = Decimal('2500')
+        pago.save()
+        self.assertPagado(self.factura, 1000)
+        self.assertPagado(self.boleta, 2500)
+
+    def test_eliminar_pago(self):
+        self.pagar(self.factura, 1000)
+        pago = Pago.objects.get(pk=self.pagar(self.factura, 3000).pk)
+        pago.delete()
+        self.assertPagado(self.factura, 1000)
+
+    def test_save_completo_de_documento_viejo_no_pisa_los_pagos(self):
+        viejo = DocumentoVenta.objects.get(pk=self.factura.pk)
+        self.pagar(self.factura, 3000)
+        viejo.estado = 'Pago Parcial'
+        viejo.save()
+        self.assertPagado(self.factura, 3000)
+        self.assertEqual(DocumentoVenta.objects.get(pk=self.factura.pk).estado, 'Pago Parcial')
@@ -8,6 +8,7 @@ from decimal import Decimal
 from .models import DocumentoVenta, DetalleDocumento, Pago
 from .forms import DocumentoVentaForm, DetalleDocumentoForm, PagoForm
 from apps.ventas.models import Pedido
+from apps.productos import inventario
 from apps.productos.models import Producto
 
 from django.shortcuts import render, get_object_or_404
@@ -70,6 +71,7 @@ def listar_documentos(request):
         consulta_base
         .select_related('cliente', 'vendedor')
         .annotate(nc_count=Count('notas_credito'))
+        .con_saldo()
         .order_by('-fecha_emision')
     )
 
@@ -105,12 +107,7 @@ def crear_documento_desde_pedido(request, pedido_id):
                 documento.pedido = pedido
                 documento.cliente = pedido.cliente
                 
-                # Generar folio automático
-                ultimo_folio = DocumentoVenta.objects.filter(
-                    tipo_documento=documento.tipo_documento
-                ).order_by('-folio').first()
-                
-                documento.folio = (ultimo_folio.folio + 1) if ultimo_folio else 1
+                # El folio lo asigna DocumentoVenta.save() desde la secuencia del tipo
                 
                 # Calcular totales
                 neto = Decimal('0')
@@ -269,14 +266,18 @@ def registrar_pago(request, documento_id):
         form = PagoForm(request.POST, documento=documento)
         if form.is_valid():
             pago = form.save(commit=False)
-            pago.documento = documento
-            
-            # Validar que no se pague más del saldo pendiente
-            if pago.monto_pagado > documento.saldo_pendiente:
-                messages.error(request, f'El monto excede el saldo pendiente (${documento.saldo_pendiente})')
-                return redirect('documentos:registrar_pago', documento_id=documento.id)
             
-            pago.save()
+            with transaction.atomic():
+                # Bloquear el documento: dos pagos simultáneos no pueden superar el saldo
+                documento = DocumentoVenta.objects.select_for_update().get(pk=documento.pk)
+                pago.documento = documento
+                
+                # Validar que no se pague más del saldo pendiente
+                if pago.monto_pagado > documento.saldo_pendiente:
+                    messages.error(request, f'El monto excede el saldo pendiente (${documento.saldo_pendiente})')
+                    return redirect('documentos:registrar_pago', documento_id=documento.id)
+                
+                pago.save()
             messages.success(request, 'Pago registrado exitosamente.')
             return redirect('documentos:detalle_documento', documento_id=documento.id)
     else:
@@ -484,8 +485,9 @@ def crear_nota_credito(request, factura_id):
                     nota.monto = monto_total
                     nota.save()
 
+                    devueltos = {}
                     for it in items_para_guardar:
-                        detalle_nc = DetalleNotaCredito.objects.create(
+                        DetalleNotaCredito.objects.create(
                             nota=nota,
                             producto=it['producto'],
                             descripcion=it['descripcion'],
@@ -493,17 +495,13 @@ def crear_nota_credito(request, factura_id):
                             precio_unitario=it['precio_unitario'],
                             subtotal=it['subtotal']
                         )
+                        if it['producto']:
+                            devueltos[it['producto'].id] = devueltos.get(it['producto'].id, 0) + int(it['cantidad'])
 
-                        # Reingresar stock: solo si el producto existe y tiene campo stock
-                        prod = it['producto']
-                        if prod:
-                            try:
-                                # Asegúrate de que tu modelo Producto tiene el campo 'stock'
-                                prod.stock = (prod.stock or 0) + int(it['cantidad'])
-                                prod.save()
-                            except Exception as e:
-                                # No fallamos la transacción por un problema de stock, pero lo registramos
-                                print(f"Warning: no se pudo actualizar stock para producto {prod.id}: {e}")
+                    # Reingresar stock por el libro de inventario, todos los productos de una vez;
+                    # si falla, falla la nota completa
+                    inventario.registrar(devueltos, 'Devolucion', referencia=f'nota_credito:{nota.id}',
+                                         usuario=request.user)
 
                     # Actualizar estado de la factura según monto devuelto vs total
                     if monto_total >= (factura.total or Decimal('0')):
@@ -627,15 +625,10 @@ def eliminar_detalle_nota_credito(request, nota_id, detalle_id):
             monto_anterior = nota.monto or Decimal('0')
             subtotal = detalle.subtotal or Decimal('0')
 
-            # Si el detalle fue creado y al crearse se reingresó stock, revertimos ese stock
-            prod = detalle.producto
-            if prod:
-                try:
-                    prod.stock = (prod.stock or 0) - int(detalle.cantidad)
-                    prod.save()
-                except Exception as e:
-                    # No bloqueamos la operación por problemas de stock
-                    print(f"Warning stock revertir fallo: {e}")
+            # Al crearse el detalle se reingresó su stock: se revierte con un movimiento en el libro
+            if detalle.producto_id:
+                inventario.registrar({detalle.producto_id: -int(detalle.cantidad)}, 'Reversa',
+                                     referencia=f'nota_credito:{nota.id}', usuario=request.user)
 
             detalle.delete()
 
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Categoria, Producto
+from .models import Categoria, Producto, ImportacionCostos, MovimientoInventario, ReservaStock
 
 @admin.register(Categoria)
 class CategoriaAdmin(admin.ModelAdmin):
@@ -11,14 +11,14 @@ class CategoriaAdmin(admin.ModelAdmin):
 
 @admin.register(Producto)
 class ProductoAdmin(admin.ModelAdmin):
-    list_display = ('codigo', 'nombre', 'foto_tag', 'precio_unitario', 'stock', 'activo')
-    readonly_fields = ('foto_preview',)
+    list_display = ('codigo', 'nombre', 'foto_tag', 'precio_unitario', 'stock', 'stock_reservado', 'activo')
+    readonly_fields = ('foto_preview', 'stock_reservado')
     fields = (
         'codigo', 'nombre', 'descripcion',
         'foto', 'foto_preview',
         'categoria', 'proveedor',
         'precio_unitario', 'costo_unitario',
-        'stock', 'stock_minimo',
+        'stock', 'stock_reservado', 'stock_minimo',
         'afecto_iva', 'activo',
     )
 
@@ -32,4 +32,43 @@ class ProductoAdmin(admin.ModelAdmin):
         if obj.foto:
             return format_html('<img src="{}" style="max-width:300px;max-height:300px;object-fit:contain;" />', obj.foto.url)
         return 'Sin imagen'
-    foto_preview.short_description = 'Vista previa'
\ No newline at end of file
+    foto_preview.short_description = 'Vista previa'
+
+
+@admin.register(ImportacionCostos)
+class ImportacionCostosAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nombre_archivo', 'usuario', 'simulacion', 'estado', 'filas_procesadas', 'actualizados', 'creado_en')
+    list_filter = ('estado', 'simulacion')
+    readonly_fields = ('resultado', 'creado_en', 'actualizado_en', 'terminado_en')
+
+
+@admin.register(ReservaStock)
+class ReservaStockAdmin(admin.ModelAdmin):
+    list_display = ('titular', 'producto', 'cantidad', 'vence_en', 'creada_en')
+    search_fields = ('titular', 'producto__codigo')
+    list_select_related = ('producto',)
+    # Se crean y liberan desde reservas.py, que mantiene Producto.stock_reservado
+    readonly_fields = ('titular', 'producto', 'cantidad', 'vence_en', 'creada_en')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MovimientoInventario)
+class MovimientoInventarioAdmin(admin.ModelAdmin):
+    list_display = ('creado_en', 'producto', 'tipo', 'cantidad', 'referencia', 'usuario')
+    list_filter = ('tipo',)
+    search_fields = ('producto__codigo', 'referencia')
+    list_select_related = ('producto', 'usuario')
+    date_hierarchy = 'creado_en'
+    # El libro solo crece: los ajustes se hacen editando el stock del producto
+    readonly_fields = ('producto', 'cantidad', 'tipo', 'referencia', 'usuario', 'creado_en')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class ProductosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.productos'
-    verbose_name = 'Productos'
\ No newline at end of file
+    verbose_name = 'Productos'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,41 @@
+"""
+Búsqueda por prefijo de productos activos para el autocompletado de pedidos.
+
+Primero los productos cuyo código empieza con el texto y después los que
+empiezan así por nombre, sin repetir. Ambas búsquedas son rangos sobre
+codigo_busqueda / nombre_busqueda (minúsculas y sin tildes), que tienen
+índices parciales (solo activos); ver ticashop/autocompletar.py.
+"""
+from ticashop.autocompletar import normalizar, rango_prefijo
+
+from .models import Producto
+
+CAMPOS = ('id', 'codigo', 'nombre', 'precio_unitario', 'stock', 'stock_reservado')
+
+
+def _por_prefijo(columna, prefijo, cantidad):
+    return list(
+        Producto.objects.filter(activo=True)
+        .filter(**rango_prefijo(columna, prefijo))
+        .order_by(columna)
+        .values(*CAMPOS)[:cantidad]
+    )
+
+
+def buscar_productos(texto, cantidad):
+    """Hasta `cantidad` productos activos como dicts listos para JSON."""
+    prefijo = normalizar(texto)
+    if not prefijo:
+        return []
+    encontrados = _por_prefijo('codigo_busqueda', prefijo, cantidad)
+    if len(encontrados) < cantidad:
+        vistos = {p['id'] for p in encontrados}
+        encontrados += [
+            p for p in _por_prefijo('nombre_busqueda', prefijo, cantidad) if p['id'] not in vistos
+        ][:cantidad - len(encontrados)]
+    return [
+        {'id': p['id'], 'texto': f"{p['codigo']} - {p['nombre']}", 'codigo': p['codigo'],
+         'nombre': p['nombre'], 'precio': float(p['precio_unitario']),
+         'stock': max(p['stock'] - p['stock_reservado'], 0)}
+        for p in encontrados
+    ]
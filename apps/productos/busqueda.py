@@ -0,0 +1,199 @@
+"""
+Búsqueda de texto completo sobre productos (código, nombre, descripción y
+categoría).
+
+En SQLite el índice es la tabla virtual FTS5 `productos_busqueda` (creada en
+la migración 0007), con rowid = id del producto y el tokenizador unicode61
+sin tildes, así que "bateria" encuentra "Batería". Cada palabra buscada se
+reduce a una raíz simple (plurales) y se consulta como prefijo, y los
+resultados se ordenan por bm25 con más peso para código y nombre.
+
+Los filtros (activo, categoría) también son términos del índice, en la
+columna `filtros` ("activo c12"), así que se resuelven dentro del MATCH y
+ni el total ni el ranking necesitan leer la tabla de productos.
+
+El índice se mantiene desde las señales de Producto y Categoria (ver
+signals.py); las cargas masivas que no emiten señales deben llamar a
+reconstruir_indice() (comando reconstruir_busqueda).
+
+En otros motores se usa icontains por palabra sobre los mismos campos.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Producto
+
+TABLA = 'productos_busqueda'
+
+# Peso de cada columna en bm25, en el orden de la tabla
+PESOS = {'codigo': 10.0, 'nombre': 5.0, 'descripcion': 1.0, 'categoria': 2.0, 'filtros': 0.0}
+CAMPOS_INDEXADOS = {'codigo', 'nombre', 'descripcion', 'categoria', 'activo'}
+
+_PALABRAS = re.compile(r'\w+')
+MAX_PALABRAS = 8
+
+_INDEXAR = f"""
+    INSERT INTO {TABLA} (rowid, codigo, nombre, descripcion, categoria, filtros)
+    SELECT p.id, p.codigo, p.nombre, COALESCE(p.descripcion, ''), COALESCE(c.nombre, ''),
+           CASE WHEN p.activo THEN 'activo ' ELSE '' END || COALESCE('c' || p.categoria_id, '')
+    FROM productos p LEFT JOIN categorias c ON c.id = p.categoria_id
+"""
+
+
+def disponible():
+    return connection.vendor == 'sqlite'
+
+
+def palabras(texto):
+    return _PALABRAS.findall(texto or '')[:MAX_PALABRAS]
+
+
+def raiz(palabra):
+    """Quita el plural español más común: motores -> motor, baterías -> batería."""
+    palabra = palabra.lower()
+    if len(palabra) > 4 and palabra.endswith('es'):
+        return palabra[:-2]
+    if len(palabra) > 3 and palabra.endswith('s'):
+        return palabra[:-1]
+    return palabra
+
+
+def consulta_fts(texto, activos=False, categoria_id=None):
+    """Expresión MATCH de FTS5: todas las palabras, cada una como prefijo, más los filtros."""
+    terminos = [f'"{raiz(p)}"*' for p in palabras(texto)]
+    if activos:
+        terminos.append('filtros:activo')
+    if categoria_id:
+        terminos.append(f'filtros:c{int(categoria_id)}')
+    return ' '.join(terminos)
+
+
+# ========== MANTENCIÓN DEL ÍNDICE ==========
+
+def _reindexar(where='', params=()):
+    with connection.cursor() as cursor:
+        if where:
+            cursor.execute(f"DELETE FROM {TABLA} WHERE rowid IN (SELECT p.id FROM productos p WHERE {where})", params)
+        else:
+            cursor.execute(f"DELETE FROM {TABLA}")
+        cursor.execute(f"{_INDEXAR} {'WHERE ' + where if where else ''}", params)
+
+
+def indexar_producto(producto_id):
+    if disponible():
+        _reindexar('p.id = %s', [producto_id])
+
+
+def quitar_producto(producto_id):
+    if disponible():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLA} WHERE rowid = %s", [producto_id])
+
+
+def indexar_categoria(categoria_id):
+    """Reindexa los productos de la categoría (o los sin categoría, con None)."""
+    if not disponible():
+        return
+    if categoria_id is None:
+        _reindexar('p.categoria_id IS NULL')
+    else:
+        _reindexar('p.categoria_id = %s', [categoria_id])
+
+
+def reconstruir_indice():
+    """Vuelve a cargar todo el índice desde la tabla de productos. Retorna la cantidad indexada."""
+    if not disponible():
+        return 0
+    _reindexar()
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLA} ({TABLA}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {TABLA}")
+        return cursor.fetchone()[0]
+
+
+def productos_desincronizados():
+    """Cantidad de productos sin fila en el índice más filas del índice sin producto."""
+    if not disponible():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT (SELECT count(*) FROM productos p WHERE NOT EXISTS (SELECT 1 FROM {TABLA} b WHERE b.rowid = p.id))
+                 + (SELECT count(*) FROM {TABLA} b WHERE NOT EXISTS (SELECT 1 FROM productos p WHERE p.id = b.rowid))
+        """)
+        return cursor.fetchone()[0]
+
+
+# ========== CONSULTA ==========
+
+class ResultadosBusqueda:
+    """
+    Resultados ordenados por relevancia, evaluados por página: soporta count()
+    y slicing, así que sirve directamente para Paginator. Cada página es una
+    consulta al índice (LIMIT/OFFSET sobre los ids) más una para cargar los
+    productos de `queryset`.
+    """
+
+    def __init__(self, consulta, queryset):
+        self.consulta = consulta
+        self.queryset = queryset
+        pesos = ', '.join(str(p) for p in PESOS.values())
+        self.orden = f"ORDER BY bm25({TABLA}, {pesos}), rowid"
+        self._total = None
+
+    def count(self):
+        if self._total is None:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT count(*) FROM {TABLA} WHERE {TABLA} MATCH %s", [self.consulta])
+                self._total = cursor.fetchone()[0]
+        return self._total
+
+    def __len__(self):
+        return self.count()
+
+    def ids(self, inicio, fin):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid FROM {TABLA} WHERE {TABLA} MATCH %s {self.orden} LIMIT %s OFFSET %s",
+                           [self.consulta, fin - inicio, inicio])
+            return [fila[0] for fila in cursor.fetchall()]
+
+    def __getitem__(self, indice):
+        if not isinstance(indice, slice):
+            return self[indice:indice + 1][0]
+        inicio, fin = indice.start or 0, indice.stop
+        if fin is None:
+            fin = self.count()
+        if fin <= inicio:
+            return []
+        ids = self.ids(inicio, fin)
+        productos = self.queryset.in_bulk(ids)
+        return [productos[i] for i in ids if i in productos]
+
+
+def _buscar_icontains(texto, queryset, activos, categoria_id):
+    for palabra in palabras(texto):
+        queryset = queryset.filter(
+            Q(codigo__icontains=palabra) | Q(nombre__icontains=palabra)
+            | Q(descripcion__icontains=palabra) | Q(categoria__nombre__icontains=palabra)
+        )
+    if activos:
+        queryset = queryset.filter(activo=True)
+    if categoria_id:
+        queryset = queryset.filter(categoria_id=categoria_id)
+    return queryset.order_by('nombre', 'id')
+
+
+def buscar(texto, queryset=None, activos=False, categoria_id=None):
+    """
+    Productos que contienen todas las palabras de `texto`, del más al menos
+    relevante. Retorna algo paginable (count() y slicing); None si `texto`
+    no tiene palabras.
+    """
+    if queryset is None:
+        queryset = Producto.objects.all()
+    if not palabras(texto):
+        return None
+    if not disponible():
+        return _buscar_icontains(texto, queryset, activos, categoria_id)
+    return ResultadosBusqueda(consulta_fts(texto, activos, categoria_id), queryset)
@@ -0,0 +1,124 @@
+"""
+Catálogo público paginado por cursor (keyset).
+
+Las páginas se piden con un cursor opaco que guarda la última clave vista
+(nombre, id) en lugar de un OFFSET, así que la página N cuesta lo mismo que la
+primera. El total de productos activos se guarda en caché y se invalida desde
+las señales de Producto (ver signals.py).
+
+Con texto de búsqueda el orden es por relevancia (busqueda.py) y el cursor
+es la posición en ese ranking.
+"""
+import base64
+import json
+import time
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from ticashop.autocompletar import cache_busquedas
+
+from . import busqueda
+from .models import Categoria, Producto
+
+TAMANO_PAGINA = 24
+TTL_TOTAL = 300
+CLAVE_VERSION = 'catalogo:version'
+
+
+def codificar_cursor(producto):
+    clave = json.dumps([producto.nombre, producto.id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(clave.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Retorna (nombre, id) o None si el cursor no es válido."""
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        nombre, producto_id = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode())
+        return str(nombre), int(producto_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+
+def productos_catalogo(categoria_id=None):
+    productos = Producto.objects.filter(activo=True)
+    if categoria_id:
+        productos = productos.filter(categoria_id=categoria_id)
+    return productos
+
+
+def pagina_catalogo(cursor=None, categoria_id=None, tamano=TAMANO_PAGINA):
+    """
+    Retorna (productos, siguiente_cursor). siguiente_cursor es None en la
+    última página.
+    """
+    productos = productos_catalogo(categoria_id).order_by('nombre', 'id')
+
+    clave = decodificar_cursor(cursor)
+    if clave:
+        nombre, producto_id = clave
+        productos = productos.filter(Q(nombre__gt=nombre) | Q(nombre=nombre, id__gt=producto_id))
+
+    pagina = list(productos[:tamano + 1])
+    siguiente = codificar_cursor(pagina[tamano - 1]) if len(pagina) > tamano else None
+    return pagina[:tamano], siguiente
+
+
+def pagina_busqueda(texto, cursor=None, categoria_id=None, tamano=TAMANO_PAGINA):
+    """
+    Como pagina_catalogo() pero con los productos activos que coinciden con
+    `texto`, por relevancia (ver busqueda.py). Retorna (productos,
+    siguiente_cursor, total); el cursor es la posición en el ranking.
+    """
+    resultados = busqueda.buscar(texto, productos_catalogo(), activos=True, categoria_id=categoria_id)
+    if resultados is None:
+        return [], None, 0
+    try:
+        inicio = max(0, int(cursor or 0))
+    except ValueError:
+        inicio = 0
+    pagina = list(resultados[inicio:inicio + tamano + 1])
+    siguiente = str(inicio + tamano) if len(pagina) > tamano else None
+    return pagina[:tamano], siguiente, resultados.count()
+
+
+def version_catalogo():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        # Valor inicial por tiempo para no reutilizar totales de una versión anterior
+        version = int(time.time())
+        cache.add(CLAVE_VERSION, version, None)
+    return version
+
+
+def total_catalogo(categoria_id=None):
+    """Cantidad de productos activos (cacheada)."""
+    clave = f"catalogo:total:{version_catalogo()}:{categoria_id or 'todas'}"
+    total = cache.get(clave)
+    if total is None:
+        total = productos_catalogo(categoria_id).count()
+        cache.set(clave, total, TTL_TOTAL)
+    return total
+
+
+def invalidar_catalogo():
+    """Invalida los totales cacheados de todas las categorías y las búsquedas del autocompletado."""
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, int(time.time()), None)
+    cache_busquedas.limpiar()
+
+
+def categorias_catalogo():
+    return Categoria.objects.filter(activa=True).order_by('nombre')
+
+
+def parsear_categoria(valor):
+    try:
+        return int(valor) if valor else None
+    except (TypeError, ValueError):
+        return None
@@ -17,9 +17,20 @@ class ProductoForm(forms.ModelForm):
 # --- AÑADE ESTE NUEVO FORMULARIO ---
 class ImportCostoForm(forms.Form):
     """
-    Formulario para subir el archivo Excel con los costos.
+    Formulario para subir el archivo Excel o CSV con los costos y precios.
     """
     archivo_excel = forms.FileField(
-        label="Seleccionar archivo Excel (.xlsx)",
-        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.xlsx'})
-    )
\ No newline at end of file
+        label="Seleccionar archivo (.xlsx o .csv)",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.xlsx,.csv'})
+    )
+    simular = forms.BooleanField(
+        label="Solo simular (mostrar los cambios sin guardarlos)",
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+    def clean_archivo_excel(self):
+        archivo = self.cleaned_data['archivo_excel']
+        if not archivo.name.lower().endswith(('.xlsx', '.csv')):
+            raise forms.ValidationError("El archivo debe ser .xlsx o .csv.")
+        return archivo
@@ -0,0 +1,293 @@
+"""
+Importación masiva de costos y precios de productos.
+
+El archivo (.xlsx o .csv, columnas CODIGO, COSTO_NETO, PRECIO_VENTA) se lee
+en streaming: openpyxl en modo read_only o el módulo csv. Las filas se
+procesan por lotes: los productos del lote se traen con una sola consulta
+por código y los que cambian se escriben con un bulk_update de solo
+costo_unitario / precio_unitario. Con `simular=True` se arma el mismo
+reporte de cambios sin escribir nada.
+
+Los archivos grandes se procesan en un hilo aparte (ImportacionCostos), que
+va guardando el avance para que la página de estado lo consulte. Si el
+proceso se reinicia a mitad, la importación deja de avanzar: el comando
+recuperar_importaciones la marca Fallida o la vuelve a ejecutar (aplicar el
+mismo archivo dos veces deja los mismos costos y precios).
+"""
+import csv
+import io
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+import openpyxl
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .catalogo import invalidar_catalogo
+from .models import ImportacionCostos, Producto
+
+TAMANO_LOTE = 1000
+MAX_DETALLE = 500  # cambios y errores que se guardan para el reporte
+MONTO_MAXIMO = Decimal('100000000')  # DecimalField(max_digits=10, decimal_places=2)
+
+
+class ResultadoImportacion:
+    """Contadores y detalle (acotado) de una importación."""
+
+    def __init__(self):
+        self.procesadas = 0
+        self.actualizados = 0
+        self.sin_cambios = 0
+        self.total_errores = 0
+        self.cambios = []
+        self.errores = []
+        self.no_encontrados = []
+
+    def agregar_error(self, fila, codigo, mensaje):
+        self.total_errores += 1
+        if len(self.errores) < MAX_DETALLE:
+            self.errores.append({'fila': fila, 'codigo': codigo, 'error': mensaje})
+
+    def como_dict(self):
+        return {
+            'procesadas': self.procesadas,
+            'actualizados': self.actualizados,
+            'sin_cambios': self.sin_cambios,
+            'total_errores': self.total_errores,
+            'cambios': self.cambios,
+            'errores': self.errores,
+            'no_encontrados': self.no_encontrados[:MAX_DETALLE],
+            'total_no_encontrados': len(self.no_encontrados),
+        }
+
+
+# ========== LECTURA ==========
+
+def _filas_xlsx(archivo):
+    libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    hoja = libro.active
+    total = (hoja.max_row - 1) if hoja.max_row else None
+
+    def filas():
+        try:
+            for numero, fila in enumerate(hoja.iter_rows(min_row=2, max_col=3, values_only=True), start=2):
+                yield numero, fila
+        finally:
+            libro.close()
+
+    return total, filas()
+
+
+def _filas_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    total = sum(1 for _ in texto) - 1
+    texto.seek(0)
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=';,\t')
+    except csv.Error:
+        dialecto = csv.excel
+
+    def filas():
+        lector = csv.reader(texto, dialecto)
+        next(lector, None)  # encabezados
+        for numero, fila in enumerate(lector, start=2):
+            yield numero, fila
+
+    return max(total, 0), filas()
+
+
+def abrir_filas(archivo, nombre):
+    """
+    Retorna (filas estimadas, iterador de (número de fila, valores)) según la
+    extensión de `nombre`. `archivo` es un archivo binario abierto.
+    """
+    if os.path.splitext(nombre)[1].lower() == '.csv':
+        return _filas_csv(archivo)
+    return _filas_xlsx(archivo)
+
+
+def _monto(valor):
+    """Convierte la celda a Decimal con 2 decimales; None si viene vacía."""
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        return None
+    texto = str(valor).strip().replace('$', '').replace(' ', '')
+    if ',' in texto and '.' not in texto:
+        texto = texto.replace(',', '.')
+    try:
+        monto = Decimal(texto).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"monto inválido: {valor!r}")
+    if not monto.is_finite() or monto < 0 or monto >= MONTO_MAXIMO:
+        raise ValueError(f"monto fuera de rango: {valor!r}")
+    return monto
+
+
+# ========== PROCESAMIENTO ==========
+
+def _procesar_lote(lote, resultado, simular):
+    # Último valor por código dentro del lote (igual que guardar fila por fila)
+    valores = {}
+    for numero, fila in lote:
+        codigo = str(fila[0]).strip() if fila and fila[0] is not None else ''
+        if not codigo:
+            continue
+        resultado.procesadas += 1
+        try:
+            costo = _monto(fila[1] if len(fila) > 1 else None)
+            precio = _monto(fila[2] if len(fila) > 2 else None)
+        except ValueError as e:
+            resultado.agregar_error(numero, codigo, str(e))
+            continue
+        if costo is None and precio is None:
+            resultado.sin_cambios += 1
+            continue
+        valores[codigo] = (costo, precio)
+
+    productos = Producto.objects.only('id', 'codigo', 'costo_unitario', 'precio_unitario').in_bulk(
+        list(valores), field_name='codigo'
+    )
+
+    modificados = []
+    ahora = timezone.now()
+    for codigo, (costo, precio) in valores.items():
+        producto = productos.get(codigo)
+        if producto is None:
+            resultado.no_encontrados.append(codigo)
+            continue
+        nuevo_costo = costo if costo is not None else producto.costo_unitario
+        nuevo_precio = precio if precio is not None else producto.precio_unitario
+        if nuevo_costo == producto.costo_unitario and nuevo_precio == producto.precio_unitario:
+            resultado.sin_cambios += 1
+            continue
+
+        if len(resultado.cambios) < MAX_DETALLE:
+            resultado.cambios.append({
+                'codigo': codigo,
+                'costo_anterior': str(producto.costo_unitario), 'costo_nuevo': str(nuevo_costo),
+                'precio_anterior': str(producto.precio_unitario), 'precio_nuevo': str(nuevo_precio),
+            })
+        producto.costo_unitario = nuevo_costo
+        producto.precio_unitario = nuevo_precio
+        producto.fecha_actualizacion = ahora
+        modificados.append(producto)
+
+    if modificados and not simular:
+        with transaction.atomic():
+            Producto.objects.bulk_update(
+                modificados, ['costo_unitario', 'precio_unitario', 'fecha_actualizacion'], batch_size=500
+            )
+    resultado.actualizados += len(modificados)
+
+
+def importar_costos(filas, simular=False, progreso=None, tamano_lote=TAMANO_LOTE):
+    """
+    Aplica (o simula) las filas de abrir_filas(). `progreso(resultado)` se
+    llama después de cada lote. Retorna un ResultadoImportacion.
+    """
+    resultado = ResultadoImportacion()
+    while True:
+        lote = list(islice(filas, tamano_lote))
+        if not lote:
+            break
+        _procesar_lote(lote, resultado, simular)
+        if progreso:
+            progreso(resultado)
+
+    # bulk_update no emite post_save: el catálogo se invalida una sola vez
+    if resultado.actualizados and not simular:
+        invalidar_catalogo()
+    return resultado
+
+
+# ========== SEGUNDO PLANO ==========
+
+def crear_importacion(archivo, usuario, simular=False):
+    """Copia el archivo subido a disco y deja la importación lista para iniciar_importacion()."""
+    extension = os.path.splitext(archivo.name)[1].lower()
+    with tempfile.NamedTemporaryFile(prefix='importacion_costos_', suffix=extension, delete=False) as destino:
+        for bloque in archivo.chunks():
+            destino.write(bloque)
+    return ImportacionCostos.objects.create(
+        usuario=usuario, nombre_archivo=archivo.name, ruta_temporal=destino.name, simulacion=simular,
+    )
+
+
+def _borrar_archivo(ruta):
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+def procesar_importacion(importacion_id):
+    """
+    Ejecuta una importación Pendiente. Retorna False si otro proceso ya la
+    tomó (el paso a Procesando es un UPDATE condicionado al estado).
+    """
+    filtro = ImportacionCostos.objects.filter(pk=importacion_id)
+    if not filtro.filter(estado='Pendiente').update(estado='Procesando', actualizado_en=timezone.now()):
+        return False
+    importacion = ImportacionCostos.objects.get(pk=importacion_id)
+
+    def progreso(resultado):
+        filtro.update(filas_procesadas=resultado.procesadas, actualizados=resultado.actualizados,
+                      actualizado_en=timezone.now())
+
+    try:
+        with open(importacion.ruta_temporal, 'rb') as archivo:
+            total, filas = abrir_filas(archivo, importacion.nombre_archivo)
+            filtro.update(filas_totales=total, filas_procesadas=0, actualizados=0, actualizado_en=timezone.now())
+            resultado = importar_costos(filas, importacion.simulacion, progreso)
+        filtro.update(
+            estado='Completada', filas_procesadas=resultado.procesadas, actualizados=resultado.actualizados,
+            resultado=resultado.como_dict(), actualizado_en=timezone.now(), terminado_en=timezone.now(),
+        )
+    except Exception as e:
+        filtro.update(estado='Fallida', resultado={'error': str(e)}, terminado_en=timezone.now())
+    finally:
+        _borrar_archivo(importacion.ruta_temporal)
+    return True
+
+
+def _ejecutar(importacion_id):
+    try:
+        procesar_importacion(importacion_id)
+    finally:
+        connection.close()
+
+
+def iniciar_importacion(importacion):
+    """Procesa la importación en un hilo aparte una vez confirmada la transacción actual."""
+    hilo = threading.Thread(target=_ejecutar, args=(importacion.pk,), daemon=True)
+    transaction.on_commit(hilo.start)
+    return hilo
+
+
+def abandonadas(minutos):
+    """Importaciones Pendientes o Procesando que no avanzan hace más de `minutos`."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return ImportacionCostos.objects.filter(estado__in=['Pendiente', 'Procesando'], actualizado_en__lt=limite)
+
+
+def recuperar_importacion(importacion, reintentar=False):
+    """
+    Importación abandonada (su hilo murió con el proceso): la deja Fallida o,
+    con `reintentar` y si el archivo sigue en disco, la vuelve a Pendiente y
+    la ejecuta desde el principio en este proceso. Retorna el estado final.
+    """
+    filtro = ImportacionCostos.objects.filter(
+        pk=importacion.pk, estado=importacion.estado, actualizado_en=importacion.actualizado_en,
+    )
+    if reintentar and os.path.exists(importacion.ruta_temporal):
+        if filtro.update(estado='Pendiente', actualizado_en=timezone.now()):
+            procesar_importacion(importacion.pk)
+    elif filtro.update(estado='Fallida', terminado_en=timezone.now(),
+                       resultado={'error': 'Interrumpida: el proceso que la ejecutaba terminó antes de completarla'}):
+        _borrar_archivo(importacion.ruta_temporal)
+    return ImportacionCostos.objects.values_list('estado', flat=True).get(pk=importacion.pk)
@@ -0,0 +1,133 @@
+"""
+Libro de inventario: movimientos de stock, solo de inserción.
+
+Toda entrada o salida de stock (venta, devolución por nota de crédito, su
+reversa, ajustes manuales) se escribe como filas de MovimientoInventario
+con bulk_create, una por producto, y en la misma transacción se suma a
+Producto.stock con un solo UPDATE. Producto.stock queda como caché del
+libro: se sigue leyendo en la fila porque las reservas (reservas.py) la
+necesitan para su UPDATE condicional, y reconstruir_stock la verifica o la
+vuelve a calcular desde el libro.
+
+Los cierres (SaldoInventario, comando cerrar_inventario) guardan el stock de
+cada producto a una fecha de corte, así que el stock a cualquier fecha es el
+último cierre anterior más los movimientos desde ese corte: dos consultas
+indexadas, sin recorrer todo el historial.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Sum, Value, When
+from django.utils import timezone
+
+from apps.usuarios import metricas
+from ticashop.fechas import inicio_dia
+
+from .models import MovimientoInventario, Producto, SaldoInventario
+
+
+def registrar(cambios, tipo, referencia='', usuario=None, actualizar_stock=True):
+    """
+    Escribe un movimiento por producto ({producto_id: cantidad con signo}) y,
+    si actualizar_stock, aplica la suma a Producto.stock en un UPDATE.
+    Quien ya descontó el stock en su propio UPDATE (reservas.consumir) pasa
+    actualizar_stock=False. Retorna los movimientos creados.
+    """
+    cambios = {int(pid): int(cantidad) for pid, cantidad in cambios.items() if cantidad}
+    if not cambios:
+        return []
+    with transaction.atomic():
+        ahora = timezone.now()
+        movimientos = MovimientoInventario.objects.bulk_create([
+            MovimientoInventario(producto_id=pid, cantidad=cantidad, tipo=tipo, referencia=referencia,
+                                 usuario=usuario, creado_en=ahora)
+            for pid, cantidad in cambios.items()
+        ])
+        if actualizar_stock:
+            metricas.invalidar_al_confirmar('productos')
+            Producto.objects.filter(id__in=list(cambios)).update(stock=F('stock') + Case(
+                *[When(id=pid, then=Value(cantidad)) for pid, cantidad in cambios.items()],
+                default=Value(0), output_field=IntegerField(),
+            ))
+    return movimientos
+
+
+def registrar_iniciales(productos):
+    """Movimiento 'Inicial' de productos creados con bulk_create (que no pasa por save())."""
+    return registrar({p.pk: p.stock for p in productos}, 'Inicial', actualizar_stock=False)
+
+
+# ========== STOCK A UNA FECHA ==========
+
+def _momento(cuando):
+    """Una fecha se toma hasta el final del día local; None es ahora."""
+    if cuando is None:
+        return timezone.now()
+    if isinstance(cuando, date) and not hasattr(cuando, 'hour'):
+        return inicio_dia(cuando + timedelta(days=1))
+    return cuando
+
+
+def ultimo_corte(momento):
+    return SaldoInventario.objects.filter(corte__lte=momento).aggregate(c=Max('corte'))['c']
+
+
+def stock_al(cuando=None, producto_ids=None):
+    """
+    Stock de cada producto con los movimientos anteriores a `cuando`
+    (datetime, o date = al cierre de ese día): {producto_id: stock}, sin los
+    productos en 0.
+    """
+    momento = _momento(cuando)
+    corte = ultimo_corte(momento)
+    saldos = SaldoInventario.objects.filter(corte=corte) if corte else SaldoInventario.objects.none()
+    movimientos = MovimientoInventario.objects.filter(creado_en__lt=momento)
+    if corte:
+        movimientos = movimientos.filter(creado_en__gte=corte)
+    if producto_ids is not None:
+        saldos = saldos.filter(producto_id__in=producto_ids)
+        movimientos = movimientos.filter(producto_id__in=producto_ids)
+
+    stock = dict(saldos.values_list('producto_id', 'stock'))
+    for producto_id, delta in movimientos.values('producto_id').annotate(s=Sum('cantidad')).values_list('producto_id', 's'):
+        stock[producto_id] = stock.get(producto_id, 0) + delta
+    return {pid: cantidad for pid, cantidad in stock.items() if cantidad}
+
+
+@transaction.atomic
+def cerrar(corte):
+    """
+    Guarda el saldo de cada producto con stock al `corte` (datetime). Si ya
+    había un cierre con ese corte lo reemplaza. Retorna cuántos saldos guardó.
+    """
+    SaldoInventario.objects.filter(corte=corte).delete()
+    saldos = stock_al(corte)
+    SaldoInventario.objects.bulk_create(
+        [SaldoInventario(producto_id=pid, corte=corte, stock=cantidad) for pid, cantidad in saldos.items()],
+        batch_size=1000,
+    )
+    return len(saldos)
+
+
+# ========== VERIFICACIÓN ==========
+
+def desajustes(producto_ids=None):
+    """Productos cuyo stock no coincide con el libro: [(id, stock, libro)]."""
+    libro = stock_al(producto_ids=producto_ids)
+    productos = Producto.objects.all()
+    if producto_ids is not None:
+        productos = productos.filter(id__in=producto_ids)
+    return [
+        (pid, stock, libro.get(pid, 0))
+        for pid, stock in productos.values_list('id', 'stock').iterator()
+        if stock != libro.get(pid, 0)
+    ]
+
+
+@transaction.atomic
+def reconstruir_stock(producto_ids=None):
+    """Reescribe Producto.stock desde el libro donde no coincide. Retorna cuántos productos corrigió."""
+    corregidos = desajustes(producto_ids)
+    for producto_id, _, libro in corregidos:
+        Producto.objects.filter(id=producto_id).update(stock=libro)
+    return len(corregidos)
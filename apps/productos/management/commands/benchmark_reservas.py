@@ -0,0 +1,158 @@
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.productos import reservas
+from apps.productos.models import Producto, ReservaStock
+from ticashop.benchmark import base_temporal, ejecutar_concurrente
+
+MODOS = ['save', 'carrito', 'reservas']
+
+
+class Command(BaseCommand):
+    help = ('Muchos compradores concurrentes contra unos pocos productos con poco stock (base temporal). '
+            'Compara la validación anterior (leer stock y save(); o revisar al agregar al carrito y descontar '
+            'al pagar) con las reservas de reservas.py: compras, rechazos, fallas al pagar y sobreventa.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=16)
+        parser.add_argument('--compras', type=int, default=50, help='Intentos de compra por hilo')
+        parser.add_argument('--productos', type=int, default=3, help='Productos disputados')
+        parser.add_argument('--stock', type=int, default=200, help='Stock inicial de cada producto')
+        parser.add_argument('--abandono', type=float, default=0.3, help='Fracción de carritos que no se pagan')
+        parser.add_argument('--ttl', type=float, default=2.0, help='Segundos de vida de una reserva')
+        parser.add_argument('--modos', nargs='+', choices=MODOS, default=MODOS)
+
+    # ---------- Un comprador: agregar al carrito, pensar, pagar o abandonar ----------
+
+    def comprar_save(self, producto_id, cantidad, paga):
+        # Como agregar_productos_pedido antes: leer, validar, restar y save() (que escribía el valor calculado)
+        stock = Producto.objects.values_list('stock', flat=True).get(id=producto_id)
+        if stock < cantidad:
+            return 'rechazada'
+        time.sleep(0.001)
+        if not paga:
+            return 'abandonada'
+        Producto.objects.filter(id=producto_id).update(stock=stock - cantidad)
+        return 'vendida'
+
+    def comprar_carrito(self, producto_id, cantidad, paga):
+        # Como cliente_add_to_cart + checkout antes: revisar al agregar, UPDATE condicional al pagar
+        if Producto.objects.get(id=producto_id).stock < cantidad:
+            return 'rechazada'
+        time.sleep(0.001)
+        if not paga:
+            return 'abandonada'
+        filas = Producto.objects.filter(id=producto_id, stock__gte=cantidad).update(stock=F('stock') - cantidad)
+        return 'vendida' if filas else 'falla_pago'
+
+    def comprar_reservas(self, producto_id, cantidad, paga, titular, ttl):
+        try:
+            reservas.fijar(titular, {producto_id: cantidad}, ttl)
+        except reservas.StockInsuficiente:
+            return 'rechazada'
+        time.sleep(0.001)
+        if not paga:
+            return 'abandonada'  # la reserva queda hasta que venza
+        try:
+            reservas.consumir(titular, {producto_id: cantidad})
+        except reservas.StockInsuficiente:
+            return 'falla_pago'
+        return 'vendida'
+
+    def correr(self, modo, producto_ids, options):
+        Producto.objects.filter(id__in=producto_ids).update(stock=options['stock'], stock_reservado=0)
+        ReservaStock.objects.all().delete()
+        vendidas = [0] * options['hilos']
+        terminado = threading.Event()
+
+        def liberar_periodicamente():
+            try:
+                while not terminado.wait(options['ttl'] / 2):
+                    reservas.liberar_vencidas()
+            finally:
+                connection.close()
+
+        def trabajo(indice):
+            azar = random.Random(indice)
+            conteo = {'vendida': 0, 'rechazada': 0, 'abandonada': 0, 'falla_pago': 0, 'locked': 0}
+            for intento in range(options['compras']):
+                producto_id = azar.choice(producto_ids)
+                cantidad = azar.randint(1, 3)
+                paga = azar.random() >= options['abandono']
+                try:
+                    if modo == 'save':
+                        resultado = self.comprar_save(producto_id, cantidad, paga)
+                    elif modo == 'carrito':
+                        resultado = self.comprar_carrito(producto_id, cantidad, paga)
+                    else:
+                        resultado = self.comprar_reservas(producto_id, cantidad, paga,
+                                                          f'bench:{indice}:{intento}', options['ttl'])
+                except OperationalError:
+                    resultado = 'locked'
+                conteo[resultado] += 1
+                if resultado == 'vendida':
+                    vendidas[indice] += cantidad
+            return conteo
+
+        reaper = None
+        if modo == 'reservas':
+            reaper = threading.Thread(target=liberar_periodicamente, daemon=True)
+            reaper.start()
+        try:
+            segundos, resultados, errores = ejecutar_concurrente(trabajo, options['hilos'])
+        finally:
+            terminado.set()
+            if reaper:
+                reaper.join()
+
+        total = {}
+        for conteo in filter(None, resultados):
+            for clave, valor in conteo.items():
+                total[clave] = total.get(clave, 0) + valor
+        restante = Producto.objects.filter(id__in=producto_ids).aggregate(
+            stock=Sum('stock'), reservado=Sum('stock_reservado')
+        )
+        descontado = options['stock'] * len(producto_ids) - restante['stock']
+        return segundos, total, sum(vendidas), descontado, restante, errores
+
+    def handle(self, *args, **options):
+        with base_temporal():
+            producto_ids = [
+                Producto.objects.create(codigo=f'HOT-{i}', nombre=f'Producto disputado {i}',
+                                        precio_unitario=1190, costo_unitario=500).id
+                for i in range(options['productos'])
+            ]
+            intentos = options['hilos'] * options['compras']
+            self.stdout.write(
+                f"{options['hilos']} compradores x {options['compras']} intentos sobre {options['productos']} "
+                f"productos con stock {options['stock']} c/u\n"
+            )
+            self.stdout.write(
+                f"{'modo':<9} {'intentos/s':>10} {'vendidas':>9} {'rechazos':>9} {'falla pago':>11} "
+                f"{'locked':>7} {'unid. vendidas':>15} {'stock desc.':>12} {'sobreventa':>11} {'reservado fin':>14}"
+            )
+            for modo in options['modos']:
+                segundos, total, vendidas, descontado, restante, errores = self.correr(modo, producto_ids, options)
+                # Vendido pero no descontado: actualizaciones perdidas entre la lectura y el save()
+                sobreventa = vendidas - descontado
+                if modo == 'reservas':
+                    reservas.liberar_vencidas(ahora=timezone.now() + timedelta(hours=1))
+                    restante['reservado'] = Producto.objects.filter(id__in=producto_ids).aggregate(
+                        s=Sum('stock_reservado'))['s']
+                self.stdout.write(
+                    f"{modo:<9} {intentos / segundos:>10.1f} {total.get('vendida', 0):>9} "
+                    f"{total.get('rechazada', 0):>9} {total.get('falla_pago', 0):>11} {total.get('locked', 0):>7} "
+                    f"{vendidas:>15} {descontado:>12} {sobreventa:>11} {restante['reservado']:>14}"
+                )
+                for e in errores[:3]:
+                    self.stdout.write(self.style.WARNING(f"  {type(e).__name__}: {e}"))
+            self.stdout.write('\n"falla pago": el carrito se aceptó pero al pagar ya no había stock. "sobreventa": '
+                              'unidades vendidas que no se descontaron del stock. "reservado fin" debe ser 0 '
+                              'después de liberar las reservas vencidas.')
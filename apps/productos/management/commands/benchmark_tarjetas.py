@@ -0,0 +1,84 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+
+from apps.productos import catalogo, tarjetas
+from apps.productos.models import Producto
+from ticashop.benchmark import base_temporal, percentil
+
+# _catalogo_pagina.html antes de la caché: un include por tarjeta, renderizado en cada request
+PAGINA_ANTERIOR = """{% for producto in productos %}
+{% include 'dashboard/_producto_card.html' %}
+{% endfor %}"""
+
+
+class Command(BaseCommand):
+    help = ('Tiempo de render de las tarjetas del catálogo: include por tarjeta (antes) contra la caché de '
+            'tarjetas de apps/productos/tarjetas.py, en frío y con la caché caliente, para varios tamaños de '
+            'catálogo; y la tienda completa (GET al dashboard) con caché caliente (base temporal).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--productos', type=int, nargs='+', default=[100, 1000, 5000])
+        parser.add_argument('--paginas', type=int, default=20, help='Páginas del catálogo recorridas por medición')
+
+    def paginas(self, maximo):
+        """Las primeras `maximo` páginas del catálogo, como listas de productos."""
+        resultado, cursor = [], None
+        while len(resultado) < maximo:
+            productos, cursor = catalogo.pagina_catalogo(cursor=cursor)
+            resultado.append(productos)
+            if not cursor:
+                break
+        return resultado
+
+    def medir(self, paginas, render):
+        tiempos = []
+        for productos in paginas:
+            inicio = time.perf_counter()
+            render(productos)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        return tiempos
+
+    def handle(self, *args, **options):
+        hosts = ['testserver'] + list(settings.ALLOWED_HOSTS)
+        with base_temporal(), override_settings(ALLOWED_HOSTS=hosts):
+            request = RequestFactory().get('/usuarios/dashboard/')
+            anterior = engines.all()[0].from_string(PAGINA_ANTERIOR)
+            client = Client()
+            creados = 0
+
+            self.stdout.write(f"{'productos':>9} {'modo':<14} {'p50 ms/página':>14} {'p95 ms/página':>14}")
+            for total in sorted(options['productos']):
+                Producto.objects.bulk_create([
+                    Producto(codigo=f'BENCH-{i:06d}', nombre=f'Producto {i:06d}',
+                             descripcion='Descripción de prueba para la tarjeta del producto ' * 2,
+                             precio_unitario=1190 + i, costo_unitario=500, stock=i % 7)
+                    for i in range(creados, total)
+                ])
+                creados = total
+                paginas = self.paginas(options['paginas'])
+                caches['plantillas'].clear()
+
+                mediciones = [
+                    ('include', self.medir(paginas, lambda p: anterior.render({'productos': p}, request))),
+                    ('tarjetas frío', self.medir(paginas, lambda p: tarjetas.renderizar(p, request))),
+                    ('tarjetas', self.medir(paginas, lambda p: tarjetas.renderizar(p, request))),
+                ]
+                tienda = []
+                for _ in range(options['paginas']):
+                    inicio = time.perf_counter()
+                    client.get('/usuarios/dashboard/')
+                    tienda.append((time.perf_counter() - inicio) * 1000)
+                mediciones.append(('tienda (GET)', tienda))
+
+                for modo, tiempos in mediciones:
+                    self.stdout.write(
+                        f"{total:>9} {modo:<14} {percentil(tiempos, 50):>14.2f} {percentil(tiempos, 95):>14.2f}"
+                    )
+            self.stdout.write(f'\nPáginas de {catalogo.TAMANO_PAGINA} productos. "tarjetas frío" renderiza y guarda '
+                              'cada tarjeta; "tarjetas" las lee todas con un get_many.')
@@ -0,0 +1,27 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.productos import inventario
+from ticashop.fechas import inicio_dia
+
+
+class Command(BaseCommand):
+    help = ('Guarda el cierre de inventario (saldo de cada producto) al inicio del día indicado, por defecto '
+            'hoy: incluye los movimientos hasta el final de ayer. inventario.stock_al() parte del último '
+            'cierre, así que correrlo a diario mantiene acotadas las consultas de stock a una fecha.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help='Día del corte (AAAA-MM-DD); por defecto hoy')
+
+    def handle(self, *args, **options):
+        try:
+            fecha = date.fromisoformat(options['fecha']) if options['fecha'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('--fecha debe tener el formato AAAA-MM-DD.')
+        corte = inicio_dia(fecha)
+        saldos = inventario.cerrar(corte)
+        self.stdout.write(self.style.SUCCESS(
+            f"Cierre al {timezone.localtime(corte):%Y-%m-%d %H:%M}: {saldos} productos con stock."
+        ))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.productos import reservas
+
+
+class Command(BaseCommand):
+    help = ('Libera las reservas de stock vencidas (carritos y borradores abandonados) y devuelve sus '
+            'unidades al disponible. Con --intervalo queda corriendo; con --verificar compara '
+            'Producto.stock_reservado con la suma de las reservas y corrige las diferencias.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=int, default=0, help='Segundos entre pasadas (0 = una vez)')
+        parser.add_argument('--lote', type=int, default=500, help='Reservas por transacción')
+        parser.add_argument('--verificar', action='store_true',
+                            help='Además, recalcula stock_reservado donde no cuadre con las reservas')
+
+    def handle(self, *args, **options):
+        while True:
+            inicio = time.perf_counter()
+            liberadas = reservas.liberar_vencidas(lote=options['lote'])
+            self.stdout.write(f"{liberadas} reservas vencidas liberadas en {time.perf_counter() - inicio:.2f} s")
+
+            if options['verificar']:
+                diferencias = reservas.desajustes()
+                for producto_id, guardado, real in diferencias[:20]:
+                    self.stdout.write(self.style.WARNING(
+                        f"  producto {producto_id}: stock_reservado={guardado}, reservas={real}"
+                    ))
+                corregidos = reservas.recalcular_reservado() if diferencias else 0
+                estilo = self.style.SUCCESS if not corregidos else self.style.WARNING
+                self.stdout.write(estilo(f"{corregidos} productos con stock_reservado corregido."))
+
+            if options['intervalo'] <= 0:
+                return
+            close_old_connections()
+            time.sleep(options['intervalo'])
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.productos import busqueda
+
+
+class Command(BaseCommand):
+    help = ('Reconstruye el índice de búsqueda de productos (tabla FTS5) desde la tabla de productos, '
+            'después de cargas masivas o ediciones directas en la base. Con --verificar solo informa '
+            'cuántos productos están desincronizados.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true', help='No escribe; cuenta las diferencias')
+
+    def handle(self, *args, **options):
+        if not busqueda.disponible():
+            raise CommandError('El índice de búsqueda solo existe en SQLite; en este motor se usa icontains.')
+
+        if options['verificar']:
+            cantidad = busqueda.productos_desincronizados()
+            estilo = self.style.SUCCESS if not cantidad else self.style.WARNING
+            self.stdout.write(estilo(f"{cantidad} productos desincronizados."))
+            return
+
+        indexados = busqueda.reconstruir_indice()
+        self.stdout.write(self.style.SUCCESS(f"Índice de búsqueda reconstruido con {indexados} productos."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.productos import inventario
+
+
+class Command(BaseCommand):
+    help = ('Compara Producto.stock con el libro de inventario (último cierre más movimientos) y reescribe '
+            'el stock de los productos que no coinciden. Con --verificar solo informa las diferencias. '
+            'Conviene correrlo sin ventas en curso.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true', help='No escribe; lista las diferencias')
+
+    def handle(self, *args, **options):
+        diferencias = inventario.desajustes()
+        for producto_id, stock, libro in diferencias[:20]:
+            self.stdout.write(self.style.WARNING(f"  producto {producto_id}: stock={stock}, libro={libro}"))
+        if len(diferencias) > 20:
+            self.stdout.write(f"  ... y {len(diferencias) - 20} más")
+
+        if options['verificar']:
+            estilo = self.style.SUCCESS if not diferencias else self.style.WARNING
+            self.stdout.write(estilo(f"{len(diferencias)} productos con stock distinto al libro."))
+            return
+
+        corregidos = inventario.reconstruir_stock()
+        self.stdout.write(self.style.SUCCESS(f"Stock reconstruido desde el libro en {corregidos} productos."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.productos import importacion
+
+
+class Command(BaseCommand):
+    help = ('Importaciones de costos en segundo plano que quedaron Pendientes o Procesando porque el proceso '
+            'que las ejecutaba se reinició: las marca Fallida o, con --reintentar, las vuelve a ejecutar '
+            'desde el principio en este proceso (si el archivo sigue en disco).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutos', type=int, default=30,
+                            help='Sin avance hace más de estos minutos se considera abandonada')
+        parser.add_argument('--reintentar', action='store_true',
+                            help='Volver a ejecutarlas en vez de marcarlas Fallida')
+
+    def handle(self, *args, **options):
+        pendientes = list(importacion.abandonadas(options['minutos']).order_by('creado_en'))
+        if not pendientes:
+            self.stdout.write('No hay importaciones abandonadas.')
+            return
+
+        for item in pendientes:
+            estado = importacion.recuperar_importacion(item, reintentar=options['reintentar'])
+            estilo = self.style.SUCCESS if estado == 'Completada' else self.style.WARNING
+            self.stdout.write(estilo(f"Importación #{item.pk} ({item.nombre_archivo}): {item.estado} -> {estado}"))
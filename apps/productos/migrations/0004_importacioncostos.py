@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0003_alter_producto_foto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacionCostos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre_archivo', models.CharField(max_length=255, verbose_name='Archivo')),
+                ('ruta_temporal', models.CharField(blank=True, max_length=500)),
+                ('simulacion', models.BooleanField(default=False, verbose_name='Simulación')),
+                ('estado', models.CharField(choices=[('Pendiente', 'Pendiente'), ('Procesando', 'Procesando'), ('Completada', 'Completada'), ('Fallida', 'Fallida')], default='Pendiente', max_length=10)),
+                ('filas_totales', models.IntegerField(blank=True, null=True)),
+                ('filas_procesadas', models.IntegerField(default=0)),
+                ('actualizados', models.IntegerField(default=0)),
+                ('resultado', models.JSONField(blank=True, default=dict)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('terminado_en', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Importación de costos',
+                'verbose_name_plural': 'Importaciones de costos',
+                'db_table': 'importaciones_costos',
+                'ordering': ['-creado_en'],
+            },
+        ),
+    ]
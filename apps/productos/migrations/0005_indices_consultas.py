@@ -0,0 +1,22 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_alter_cliente_user'),
+        ('productos', '0004_importacioncostos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['nombre', 'id'], name='productos_activos_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True), ('stock__lte', models.F('stock_minimo'))), fields=['stock'], name='productos_stock_bajo_idx'),
+        ),
+    ]
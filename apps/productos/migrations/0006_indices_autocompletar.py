@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:37
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0005_indices_autocompletar'),
+        ('productos', '0005_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(django.db.models.functions.text.Lower('codigo'), condition=models.Q(('activo', True)), name='productos_codigo_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(django.db.models.functions.text.Lower('nombre'), condition=models.Q(('activo', True)), name='productos_nombre_lower_idx'),
+        ),
+    ]
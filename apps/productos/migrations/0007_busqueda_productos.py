@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def crear_indice(apps, schema_editor):
+    """Tabla FTS5 de búsqueda (solo SQLite) cargada con los productos existentes."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("""
+        CREATE VIRTUAL TABLE productos_busqueda USING fts5(
+            codigo, nombre, descripcion, categoria, filtros,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    schema_editor.execute("""
+        INSERT INTO productos_busqueda (rowid, codigo, nombre, descripcion, categoria, filtros)
+        SELECT p.id, p.codigo, p.nombre, COALESCE(p.descripcion, ''), COALESCE(c.nombre, ''),
+               CASE WHEN p.activo THEN 'activo ' ELSE '' END || COALESCE('c' || p.categoria_id, '')
+        FROM productos p LEFT JOIN categorias c ON c.id = p.categoria_id
+    """)
+
+
+def eliminar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS productos_busqueda")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0006_indices_autocompletar'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
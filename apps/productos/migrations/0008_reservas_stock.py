@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0007_busqueda_productos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='stock_reservado',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Stock reservado'),
+        ),
+        migrations.CreateModel(
+            name='ReservaStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titular', models.CharField(max_length=64)),
+                ('cantidad', models.PositiveIntegerField()),
+                ('vence_en', models.DateTimeField(blank=True, null=True)),
+                ('creada_en', models.DateTimeField(auto_now_add=True)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas', to='productos.producto')),
+            ],
+            options={
+                'verbose_name': 'Reserva de stock',
+                'verbose_name_plural': 'Reservas de stock',
+                'db_table': 'reservas_stock',
+                'indexes': [models.Index(condition=models.Q(('vence_en__isnull', False)), fields=['vence_en'], name='reservas_vence_idx')],
+                'constraints': [models.UniqueConstraint(fields=('titular', 'producto'), name='reservas_titular_producto_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def movimientos_iniciales(apps, schema_editor):
+    """El stock actual de cada producto entra al libro como movimiento 'Inicial'."""
+    Producto = apps.get_model('productos', 'Producto')
+    MovimientoInventario = apps.get_model('productos', 'MovimientoInventario')
+    ahora = django.utils.timezone.now()
+    lote = []
+    for producto_id, stock in Producto.objects.exclude(stock=0).values_list('id', 'stock').iterator():
+        lote.append(MovimientoInventario(producto_id=producto_id, cantidad=stock, tipo='Inicial',
+                                         referencia='migración', creado_en=ahora))
+        if len(lote) == 1000:
+            MovimientoInventario.objects.bulk_create(lote)
+            lote = []
+    MovimientoInventario.objects.bulk_create(lote)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0008_reservas_stock'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.IntegerField(help_text='Positiva: entrada; negativa: salida')),
+                ('tipo', models.CharField(choices=[('Inicial', 'Inicial'), ('Venta', 'Venta'), ('Devolucion', 'Devolución'), ('Reversa', 'Reversa de devolución'), ('Ajuste', 'Ajuste')], max_length=10)),
+                ('referencia', models.CharField(blank=True, max_length=64)),
+                ('creado_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to='productos.producto')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de inventario',
+                'verbose_name_plural': 'Movimientos de inventario',
+                'db_table': 'movimientos_inventario',
+                'indexes': [models.Index(fields=['creado_en'], name='movimientos_creado_idx'), models.Index(fields=['producto', 'creado_en'], name='movimientos_producto_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('corte', models.DateTimeField()),
+                ('stock', models.IntegerField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='productos.producto')),
+            ],
+            options={
+                'verbose_name': 'Saldo de inventario',
+                'verbose_name_plural': 'Saldos de inventario',
+                'db_table': 'saldos_inventario',
+                'constraints': [models.UniqueConstraint(fields=('corte', 'producto'), name='saldos_corte_producto_uniq')],
+            },
+        ),
+        migrations.RunPython(movimientos_iniciales, migrations.RunPython.noop),
+    ]
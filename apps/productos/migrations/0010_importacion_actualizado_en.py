@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-17 20:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0009_libro_inventario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importacioncostos',
+            name='actualizado_en',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.3 on 2026-10-17 20:24
+
+import ticashop.autocompletar
+from django.db import migrations, models
+from ticashop.autocompletar import normalizar
+
+
+def calcular_claves(apps, schema_editor):
+    """Claves de búsqueda de los productos existentes (se calculan en Python, no con LOWER())."""
+    Producto = apps.get_model('productos', 'Producto')
+    productos = list(Producto.objects.only('id', 'codigo', 'nombre'))
+    for producto in productos:
+        producto.codigo_busqueda = normalizar(producto.codigo)[:50]
+        producto.nombre_busqueda = normalizar(producto.nombre)[:255]
+    Producto.objects.bulk_update(productos, ['codigo_busqueda', 'nombre_busqueda'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0006_claves_busqueda'),
+        ('productos', '0010_importacion_actualizado_en'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='productos_codigo_lower_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='productos_nombre_lower_idx',
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='codigo_busqueda',
+            field=ticashop.autocompletar.ClaveBusquedaField(max_length=50, origen='codigo'),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='nombre_busqueda',
+            field=ticashop.autocompletar.ClaveBusquedaField(max_length=255, origen='nombre'),
+        ),
+        migrations.RunPython(calcular_claves, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['codigo_busqueda'], name='productos_codigo_busq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['nombre_busqueda'], name='productos_nombre_busq_idx'),
+        ),
+    ]
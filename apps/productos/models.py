@@ -1,4 +1,8 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from ticashop.autocompletar import ClaveBusquedaField, con_claves
 
 class Categoria(models.Model):
     nombre = models.CharField(max_length=100, unique=True)
@@ -19,6 +23,9 @@ class Producto(models.Model):
     codigo = models.CharField(max_length=50, unique=True, verbose_name='Código')
     nombre = models.CharField(max_length=255)
     descripcion = models.TextField(blank=True, null=True, verbose_name='Descripción')
+    # Minúsculas y sin tildes, para el autocompletado por prefijo (ver autocompletar.py)
+    codigo_busqueda = ClaveBusquedaField(max_length=50, origen='codigo')
+    nombre_busqueda = ClaveBusquedaField(max_length=255, origen='nombre')
     foto = models.ImageField(upload_to='images/', blank=True, null=True, verbose_name='Foto')
     
     # Categorización
@@ -45,6 +52,8 @@ class Producto(models.Model):
     # Inventario
     stock = models.IntegerField(default=0, verbose_name='Stock disponible')
     stock_minimo = models.IntegerField(default=0, verbose_name='Stock mínimo')
+    # Suma de las reservas vigentes (ReservaStock); solo la modifican los UPDATE de reservas.py
+    stock_reservado = models.IntegerField(default=0, editable=False, verbose_name='Stock reservado')
     
     # Proveedor
     proveedor = models.ForeignKey(
@@ -65,6 +74,56 @@ class Producto(models.Model):
     
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Stock leído: save() registra la diferencia como movimiento (ver inventario.py)
+        instancia._stock_cargado = instancia.__dict__.get('stock')
+        return instancia
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None or 'stock' in fields:
+            self._stock_cargado = self.stock
+
+    def save(self, *args, **kwargs):
+        from . import inventario
+
+        if self._state.adding or not self.pk:
+            super().save(*args, **kwargs)
+            if self.stock:
+                inventario.registrar({self.pk: self.stock}, 'Inicial', actualizar_stock=False)
+            self._stock_cargado = self.stock
+            return
+
+        # Un save() completo escribiría el stock_reservado leído antes y pisaría las
+        # reservas hechas entretanto: al actualizar se guardan todos los campos menos ese.
+        update_fields = con_claves(self, kwargs.get('update_fields'))
+        if update_fields is None:
+            update_fields = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != 'stock_reservado'
+            ]
+        # Lo mismo con el stock: el cambio respecto de lo leído se registra como ajuste en
+        # el libro de inventario, que lo suma a la columna (sin pisar ventas concurrentes).
+        ajuste = 0
+        cargado = getattr(self, '_stock_cargado', None)
+        if 'stock' in update_fields and cargado is not None:
+            ajuste = self.stock - cargado
+            update_fields = [f for f in update_fields if f != 'stock']
+        kwargs['update_fields'] = update_fields
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if ajuste:
+                inventario.registrar({self.pk: ajuste}, 'Ajuste')
+                self.refresh_from_db(fields=['stock'])
+        self._stock_cargado = self.stock
+
+    @property
+    def stock_disponible(self):
+        """Stock que se puede vender o reservar: el físico menos lo reservado"""
+        return max(self.stock - self.stock_reservado, 0)
     
     @property
     def tiene_stock_bajo(self):
@@ -82,4 +141,146 @@ class Producto(models.Model):
         db_table = 'productos'
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
-        ordering = ['codigo']
\ No newline at end of file
+        ordering = ['codigo']
+        indexes = [
+            # Catálogo: solo productos activos, ordenados por (nombre, id) para el cursor.
+            # Índices parciales: PostgreSQL y SQLite (MySQL los omite).
+            models.Index(fields=['nombre', 'id'], condition=models.Q(activo=True), name='productos_activos_nombre_idx'),
+            # Stock bajo: la comparación stock <= stock_minimo no usa un índice común,
+            # así que se indexan solo las filas que la cumplen, ordenadas por stock.
+            models.Index(
+                fields=['stock'],
+                condition=models.Q(activo=True, stock__lte=models.F('stock_minimo')),
+                name='productos_stock_bajo_idx',
+            ),
+            # Autocompletado de pedidos: rangos por prefijo sobre las claves de búsqueda (ver autocompletar.py).
+            models.Index(fields=['codigo_busqueda'], condition=models.Q(activo=True), name='productos_codigo_busq_idx'),
+            models.Index(fields=['nombre_busqueda'], condition=models.Q(activo=True), name='productos_nombre_busq_idx'),
+        ]
+
+class ReservaStock(models.Model):
+    """
+    Unidades apartadas para un carrito o un pedido en borrador hasta `vence_en`
+    (sin vencimiento: hasta que el pedido se confirme o cancele). La suma por
+    producto se mantiene en Producto.stock_reservado; ver reservas.py.
+    """
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='reservas')
+    # 'carrito:<usuario_id>' o 'pedido:<id>'
+    titular = models.CharField(max_length=64)
+    cantidad = models.PositiveIntegerField()
+    vence_en = models.DateTimeField(null=True, blank=True)
+    creada_en = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.titular}: {self.cantidad} x {self.producto_id}"
+
+    class Meta:
+        db_table = 'reservas_stock'
+        verbose_name = 'Reserva de stock'
+        verbose_name_plural = 'Reservas de stock'
+        constraints = [
+            models.UniqueConstraint(fields=['titular', 'producto'], name='reservas_titular_producto_uniq'),
+        ]
+        indexes = [
+            # Comando liberar_reservas: solo las que vencen
+            models.Index(fields=['vence_en'], condition=models.Q(vence_en__isnull=False), name='reservas_vence_idx'),
+        ]
+
+
+class MovimientoInventario(models.Model):
+    """
+    Libro de inventario: cada entrada o salida de stock, solo se agregan filas.
+    Producto.stock es la suma de los movimientos del producto (ver inventario.py).
+    """
+    TIPOS = [
+        ('Inicial', 'Inicial'),
+        ('Venta', 'Venta'),
+        ('Devolucion', 'Devolución'),
+        ('Reversa', 'Reversa de devolución'),
+        ('Ajuste', 'Ajuste'),
+    ]
+
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='movimientos')
+    cantidad = models.IntegerField(help_text='Positiva: entrada; negativa: salida')
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    # 'pedido:<id>', 'nota_credito:<id>', ...
+    referencia = models.CharField(max_length=64, blank=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Usuario'
+    )
+    creado_en = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.tipo} {self.cantidad:+d} x {self.producto_id}"
+
+    class Meta:
+        db_table = 'movimientos_inventario'
+        verbose_name = 'Movimiento de inventario'
+        verbose_name_plural = 'Movimientos de inventario'
+        indexes = [
+            # Stock a una fecha: movimientos entre el último cierre y esa fecha
+            models.Index(fields=['creado_en'], name='movimientos_creado_idx'),
+            # Historial de un producto
+            models.Index(fields=['producto', 'creado_en'], name='movimientos_producto_idx'),
+        ]
+
+
+class SaldoInventario(models.Model):
+    """Cierre de inventario: stock de cada producto con los movimientos anteriores a `corte`."""
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='saldos')
+    corte = models.DateTimeField()
+    stock = models.IntegerField()
+
+    def __str__(self):
+        return f"{self.producto_id} al {self.corte:%Y-%m-%d %H:%M}: {self.stock}"
+
+    class Meta:
+        db_table = 'saldos_inventario'
+        verbose_name = 'Saldo de inventario'
+        verbose_name_plural = 'Saldos de inventario'
+        constraints = [
+            models.UniqueConstraint(fields=['corte', 'producto'], name='saldos_corte_producto_uniq'),
+        ]
+
+
+class ImportacionCostos(models.Model):
+    """Importación masiva de costos/precios ejecutada en segundo plano."""
+    ESTADOS = [
+        ('Pendiente', 'Pendiente'),
+        ('Procesando', 'Procesando'),
+        ('Completada', 'Completada'),
+        ('Fallida', 'Fallida'),
+    ]
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Usuario'
+    )
+    nombre_archivo = models.CharField(max_length=255, verbose_name='Archivo')
+    ruta_temporal = models.CharField(max_length=500, blank=True)
+    simulacion = models.BooleanField(default=False, verbose_name='Simulación')
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='Pendiente')
+    filas_totales = models.IntegerField(null=True, blank=True)
+    filas_procesadas = models.IntegerField(default=0)
+    actualizados = models.IntegerField(default=0)
+    resultado = models.JSONField(default=dict, blank=True)
+    creado_en = models.DateTimeField(auto_now_add=True)
+    # Último avance guardado: una en curso que no avanza quedó huérfana (ver recuperar_importaciones)
+    actualizado_en = models.DateTimeField(default=timezone.now)
+    terminado_en = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Importación #{self.pk} - {self.nombre_archivo} ({self.estado})"
+
+    @property
+    def porcentaje(self):
+        if self.estado == 'Completada':
+            return 100
+        if not self.filas_totales:
+            return 0
+        return min(99, int(self.filas_procesadas * 100 / self.filas_totales))
+
+    class Meta:
+        db_table = 'importaciones_costos'
+        verbose_name = 'Importación de costos'
+        verbose_name_plural = 'Importaciones de costos'
+        ordering = ['-creado_en']
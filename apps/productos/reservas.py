@@ -0,0 +1,230 @@
+"""
+Reservas de stock para carritos y pedidos en borrador.
+
+Agregar un producto al carrito (o una línea a un borrador) aparta las
+unidades con un UPDATE condicional sobre Producto.stock_reservado:
+
+    UPDATE productos SET stock_reservado = stock_reservado + n
+    WHERE id = ... AND stock - stock_reservado >= n
+
+Si no hay disponible, el UPDATE no toca la fila y se lanza StockInsuficiente;
+no hay lectura previa que pueda quedar vieja. Varios productos van en un
+solo UPDATE (CASE por id) y se exige que se actualicen todas las filas.
+
+Cada titular ('carrito:<usuario_id>', 'pedido:<id>') tiene una fila de
+ReservaStock por producto con la cantidad apartada y su vencimiento. Al
+comprar, consumir() descuenta el stock y libera lo reservado en el mismo
+UPDATE; si la reserva ya había vencido, lo que falte se toma del disponible
+con la misma condición. Las reservas vencidas las devuelve el comando
+liberar_reservas.
+
+Producto.stock_reservado es siempre la suma de las reservas (verificable con
+liberar_reservas --verificar).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from apps.usuarios import metricas
+
+from . import inventario
+from .models import Producto, ReservaStock
+
+
+class StockInsuficiente(Exception):
+    pass
+
+
+def titular_carrito(usuario_id):
+    return f'carrito:{usuario_id}'
+
+
+def titular_pedido(pedido_id):
+    return f'pedido:{pedido_id}'
+
+
+def ttl_carrito():
+    return getattr(settings, 'RESERVAS_TTL_CARRITO', 1800)
+
+
+def ttl_pedido():
+    return getattr(settings, 'RESERVAS_TTL_PEDIDO', 4 * 3600)
+
+
+def _vencimiento(ttl):
+    return timezone.now() + timedelta(seconds=ttl) if ttl else None
+
+
+def _case(valores):
+    """CASE id WHEN ... THEN valor ... END para un UPDATE de varias filas."""
+    return Case(
+        *[When(id=producto_id, then=Value(valor)) for producto_id, valor in valores.items()],
+        default=Value(0), output_field=IntegerField(),
+    )
+
+
+def _ajustar(reservar, descontar=None):
+    """
+    Un solo UPDATE sobre productos:
+      stock_reservado += reservar[id]   (negativo libera)
+      stock           -= descontar[id]
+    Si la operación baja el disponible (stock - stock_reservado) de una fila,
+    esa fila solo se actualiza si el disponible alcanza. Retorna False si
+    alguna fila no se actualizó.
+    """
+    descontar = descontar or {}
+    ids = set(reservar) | set(descontar)
+    if not ids:
+        return True
+    condicion = Q()
+    for producto_id in ids:
+        # Cuánto baja el disponible con esta operación (lo que se libera lo compensa)
+        toma = reservar.get(producto_id, 0) + descontar.get(producto_id, 0)
+        if toma > 0:
+            condicion |= Q(id=producto_id, stock__gte=F('stock_reservado') + toma)
+        else:
+            condicion |= Q(id=producto_id)
+
+    cambios = {}
+    if any(reservar.values()):
+        cambios['stock_reservado'] = F('stock_reservado') + _case(reservar)
+    if any(descontar.values()):
+        cambios['stock'] = F('stock') - _case(descontar)
+        # El UPDATE no emite señales: el stock bajo del panel de administración se invalida aquí
+        metricas.invalidar_al_confirmar('productos')
+    if not cambios:
+        return True
+    return Producto.objects.filter(condicion).update(**cambios) == len(ids)
+
+
+def _reservas(titular, producto_ids=None):
+    reservas = ReservaStock.objects.select_for_update().filter(titular=titular)
+    if producto_ids is not None:
+        reservas = reservas.filter(producto_id__in=producto_ids)
+    return {r.producto_id: r.cantidad for r in reservas}
+
+
+@transaction.atomic
+def fijar(titular, cantidades, ttl=None):
+    """
+    Deja las reservas de `titular` para los productos de `cantidades`
+    ({producto_id: cantidad}) exactamente en esas cantidades (0 libera) y
+    renueva el vencimiento de todas sus reservas (ttl en segundos; None =
+    sin vencimiento). Lanza StockInsuficiente si algún aumento no alcanza;
+    en ese caso no cambia nada.
+    """
+    cantidades = {int(pid): int(cant) for pid, cant in cantidades.items()}
+    actuales = _reservas(titular, list(cantidades))
+    diferencias = {pid: cant - actuales.get(pid, 0) for pid, cant in cantidades.items()}
+    diferencias = {pid: d for pid, d in diferencias.items() if d}
+
+    if not _ajustar(diferencias):
+        raise StockInsuficiente('Stock insuficiente: no quedan unidades disponibles para reservar.')
+
+    vence_en = _vencimiento(ttl)
+    ceros = [pid for pid, cant in cantidades.items() if cant <= 0]
+    if ceros:
+        ReservaStock.objects.filter(titular=titular, producto_id__in=ceros).delete()
+    nuevas = [pid for pid, cant in cantidades.items() if cant > 0]
+    if nuevas:
+        ReservaStock.objects.bulk_create(
+            [ReservaStock(titular=titular, producto_id=pid, cantidad=cantidades[pid], vence_en=vence_en)
+             for pid in nuevas],
+            update_conflicts=True, update_fields=['cantidad', 'vence_en'],
+            # MySQL resuelve el conflicto por cualquier índice único y no acepta que se indique cuál
+            unique_fields=['titular', 'producto'] if connection.features.supports_update_conflicts_with_target else None,
+        )
+    ReservaStock.objects.filter(titular=titular).update(vence_en=vence_en)
+
+
+def reservar(titular, producto_id, cantidad, ttl=None):
+    """Suma `cantidad` a la reserva de `titular` para el producto. Retorna la cantidad reservada total."""
+    with transaction.atomic():
+        total = _reservas(titular, [producto_id]).get(producto_id, 0) + cantidad
+        fijar(titular, {producto_id: total}, ttl)
+    return total
+
+
+def renovar(titular, ttl):
+    """Extiende el vencimiento de las reservas de `titular` (p. ej. al ver el carrito)."""
+    return ReservaStock.objects.filter(titular=titular, vence_en__isnull=False).update(vence_en=_vencimiento(ttl))
+
+
+@transaction.atomic
+def liberar(titular, producto_ids=None):
+    """Devuelve al disponible las reservas de `titular` (todas o las de esos productos)."""
+    actuales = _reservas(titular, producto_ids)
+    _ajustar({pid: -cant for pid, cant in actuales.items()})
+    ReservaStock.objects.filter(titular=titular, producto_id__in=list(actuales)).delete()
+    return sum(actuales.values())
+
+
+@transaction.atomic
+def consumir(titular, cantidades=None, referencia='', usuario=None):
+    """
+    Descuenta del stock las unidades vendidas ({producto_id: cantidad}) y
+    libera todas las reservas de `titular`, en un solo UPDATE, y registra la
+    venta en el libro de inventario. Lo reservado cubre la venta; lo que
+    falte (reserva vencida o inexistente) se toma del disponible y, si no
+    alcanza, se lanza StockInsuficiente sin cambiar nada. Con
+    cantidades=None se vende exactamente lo reservado.
+    """
+    actuales = _reservas(titular) if titular else {}
+    if cantidades is None:
+        cantidades = dict(actuales)
+    cantidades = {int(pid): int(cant) for pid, cant in cantidades.items() if int(cant) > 0}
+
+    if not _ajustar({pid: -cant for pid, cant in actuales.items()}, cantidades):
+        raise StockInsuficiente('Stock insuficiente: otro pedido tomó unidades de uno de los productos.')
+    if actuales:
+        ReservaStock.objects.filter(titular=titular).delete()
+    inventario.registrar({pid: -cant for pid, cant in cantidades.items()}, 'Venta',
+                         referencia=referencia or titular or '', usuario=usuario, actualizar_stock=False)
+    return cantidades
+
+
+# ========== MANTENCIÓN ==========
+
+def liberar_vencidas(ahora=None, lote=500):
+    """Libera las reservas vencidas, por lotes (una transacción por lote). Retorna cuántas liberó."""
+    ahora = ahora or timezone.now()
+    liberadas = 0
+    while True:
+        with transaction.atomic():
+            vencidas = list(
+                ReservaStock.objects.select_for_update()
+                .filter(vence_en__lt=ahora).values_list('id', 'producto_id', 'cantidad')[:lote]
+            )
+            if not vencidas:
+                return liberadas
+            por_producto = {}
+            for _, producto_id, cantidad in vencidas:
+                por_producto[producto_id] = por_producto.get(producto_id, 0) - cantidad
+            _ajustar(por_producto)
+            ReservaStock.objects.filter(id__in=[v[0] for v in vencidas]).delete()
+            liberadas += len(vencidas)
+        if len(vencidas) < lote:
+            return liberadas
+
+
+def desajustes():
+    """Productos cuyo stock_reservado no coincide con la suma de sus reservas: [(id, guardado, real)]."""
+    reales = dict(ReservaStock.objects.values('producto_id').annotate(s=Sum('cantidad')).values_list('producto_id', 's'))
+    guardados = Producto.objects.filter(Q(stock_reservado__gt=0) | Q(id__in=list(reales)))
+    return [
+        (pid, guardado, reales.get(pid, 0))
+        for pid, guardado in guardados.values_list('id', 'stock_reservado')
+        if guardado != reales.get(pid, 0)
+    ]
+
+
+@transaction.atomic
+def recalcular_reservado():
+    """Reescribe stock_reservado desde las reservas. Retorna cuántos productos corrigió."""
+    corregidos = desajustes()
+    for producto_id, _, real in corregidos:
+        Producto.objects.filter(id=producto_id).update(stock_reservado=real)
+    return len(corregidos)
@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import busqueda
+from .catalogo import invalidar_catalogo
+from .models import Categoria, Producto
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def invalidar_catalogo_cacheado(sender, **kwargs):
+    invalidar_catalogo()
+
+
+# ========== ÍNDICE DE BÚSQUEDA ==========
+
+@receiver(post_save, sender=Producto)
+def indexar_producto(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not busqueda.CAMPOS_INDEXADOS.intersection(update_fields):
+        return  # p. ej. save(update_fields=['stock'])
+    busqueda.indexar_producto(instance.pk)
+
+
+@receiver(post_delete, sender=Producto)
+def quitar_producto(sender, instance, **kwargs):
+    busqueda.quitar_producto(instance.pk)
+
+
+@receiver(post_save, sender=Categoria)
+def indexar_categoria(sender, instance, created, **kwargs):
+    if not created:
+        busqueda.indexar_categoria(instance.pk)
+
+
+@receiver(post_delete, sender=Categoria)
+def indexar_sin_categoria(sender, instance, **kwargs):
+    # on_delete=SET_NULL ya dejó sus productos sin categoría
+    busqueda.indexar_categoria(None)
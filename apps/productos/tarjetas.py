@@ -0,0 +1,59 @@
+"""
+Tarjetas de producto de la tienda (dashboard/_producto_card.html) en caché.
+
+Cada tarjeta se guarda ya renderizada en la caché 'plantillas' con una clave
+que incluye todo lo que cambia su HTML: id, fecha_actualizacion (auto_now,
+la cambia cada save() y la importación de costos) y el stock disponible
+(las reservas y el libro de inventario lo cambian con UPDATE, sin save()).
+Así que no hay que invalidar nada: un producto modificado simplemente tiene
+otra clave y la anterior vence sola.
+
+Lo único propio de cada visitante es el token CSRF del formulario "Añadir":
+las tarjetas se renderizan con una marca en su lugar y la marca se reemplaza
+por el token del request al armar la página. Una página del catálogo cuesta
+un get_many a la caché (y renderizar solo las que falten).
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+PLANTILLA = 'dashboard/_producto_card.html'
+# Subir si cambia la plantilla de la tarjeta
+VERSION = 1
+MARCA_CSRF = '__csrf_tarjeta__'
+
+
+def _cache():
+    return caches['plantillas']
+
+
+def ttl():
+    return getattr(settings, 'TARJETAS_TTL', 24 * 3600)
+
+
+def clave(producto):
+    actualizado = producto.fecha_actualizacion.timestamp() if producto.fecha_actualizacion else 0
+    return f'tarjeta:{VERSION}:{producto.pk}:{actualizado:.6f}:{producto.stock_disponible}'
+
+
+def renderizar(productos, request=None):
+    """HTML de las tarjetas de `productos`, en orden, con el token CSRF de `request`."""
+    productos = list(productos)
+    claves = {producto.pk: clave(producto) for producto in productos}
+    guardadas = _cache().get_many(list(claves.values()))
+
+    nuevas = {}
+    partes = []
+    for producto in productos:
+        html = guardadas.get(claves[producto.pk])
+        if html is None:
+            html = render_to_string(PLANTILLA, {'producto': producto, 'csrf_token': MARCA_CSRF})
+            nuevas[claves[producto.pk]] = html
+        partes.append(html)
+    if nuevas:
+        _cache().set_many(nuevas, ttl())
+
+    token = get_token(request) if request is not None else ''
+    return mark_safe(''.join(partes).replace(MARCA_CSRF, token))
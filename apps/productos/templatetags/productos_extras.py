@@ -0,0 +1,10 @@
+from django import template
+
+from apps.productos import tarjetas
+
+register = template.Library()
+
+@register.simple_tag(takes_context=True)
+def tarjetas_productos(context, productos):
+    """Tarjetas de la tienda desde la caché de fragmentos (ver apps/productos/tarjetas.py)"""
+    return tarjetas.renderizar(productos, context.get('request'))
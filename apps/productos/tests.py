@@ -1,3 +1,189 @@
+from datetime import timedelta
+
+from django.db.models import Sum
 from django.test import TestCase
+from django.utils import timezone
+
+from . import inventario, reservas
+from .autocompletar import buscar_productos
+from .models import MovimientoInventario, Producto, ReservaStock
+from .reservas import StockInsuficiente
+
+
+def _producto(codigo, stock):
+    return Producto.objects.create(codigo=codigo, nombre=f'Producto {codigo}', precio_unitario=1190,
+                                   costo_unitario=500, stock=stock)
+
+
+class ReservasTests(TestCase):
+    def setUp(self):
+        self.producto = _producto('P1', 10)
+        self.otro = _producto('P2', 5)
+
+    def assertReservadoCuadra(self):
+        """stock_reservado de cada producto es la suma de sus ReservaStock."""
+        for producto in Producto.objects.all():
+            suma = ReservaStock.objects.filter(producto=producto).aggregate(s=Sum('cantidad'))['s'] or 0
+            self.assertEqual(producto.stock_reservado, suma, producto.codigo)
+        self.assertEqual(reservas.desajustes(), [])
+
+    def estado(self, producto=None):
+        producto = producto or self.producto
+        producto.refresh_from_db()
+        return producto.stock, producto.stock_reservado
+
+    def test_fijar_deja_la_cantidad_pedida(self):
+        reservas.fijar('carrito:1', {self.producto.pk: 3, self.otro.pk: 2})
+        self.assertEqual(self.estado(), (10, 3))
+        reservas.fijar('carrito:1', {self.producto.pk: 5})
+        self.assertEqual(self.estado(), (10, 5))
+        reservas.fijar('carrito:1', {self.producto.pk: 0})
+        self.assertEqual(self.estado(), (10, 0))
+        self.assertFalse(ReservaStock.objects.filter(producto=self.producto).exists())
+        self.assertEqual(self.estado(self.otro), (5, 2))
+        self.assertReservadoCuadra()
+
+    def test_fijar_no_sobrevende(self):
+        reservas.fijar('carrito:1', {self.producto.pk: 8})
+        with self.assertRaises(StockInsuficiente):
+            reservas.fijar('carrito:2', {self.producto.pk: 3})
+        # Si un producto no alcanza, no cambia ninguno
+        with self.assertRaises(StockInsuficiente):
+            reservas.fijar('carrito:2', {self.otro.pk: 1, self.producto.pk: 3})
+        self.assertEqual(self.estado(), (10, 8))
+        self.assertEqual(self.estado(self.otro), (5, 0))
+        self.assertFalse(ReservaStock.objects.filter(titular='carrito:2').exists())
+        reservas.fijar('carrito:2', {self.producto.pk: 2})
+        self.assertEqual(self.estado(), (10, 10))
+        self.assertReservadoCuadra()
+
+    def test_consumir_descuenta_stock_y_libera_la_reserva(self):
+        reservas.fijar('pedido:1', {self.producto.pk: 4, self.otro.pk: 1})
+        vendidas = reservas.consumir('pedido:1', referencia='pedido:1')
+        self.assertEqual(vendidas, {self.producto.pk: 4, self.otro.pk: 1})
+        self.assertEqual(self.estado(), (6, 0))
+        self.assertEqual(self.estado(self.otro), (4, 0))
+        self.assertFalse(ReservaStock.objects.filter(titular='pedido:1').exists())
+        venta = MovimientoInventario.objects.get(producto=self.producto, tipo='Venta')
+        self.assertEqual((venta.cantidad, venta.referencia), (-4, 'pedido:1'))
+        self.assertEqual(inventario.desajustes(), [])
+        self.assertReservadoCuadra()
+
+    def test_consumir_mas_de_lo_reservado_toma_del_disponible(self):
+        reservas.fijar('carrito:1', {self.producto.pk: 2})
+        reservas.fijar('carrito:2', {self.producto.pk: 5})
+        reservas.consumir('carrito:1', {self.producto.pk: 5})
+        self.assertEqual(self.estado(), (5, 5))
+        with self.assertRaises(StockInsuficiente):
+            reservas.consumir(None, {self.producto.pk: 1})
+        self.assertEqual(self.estado(), (5, 5))
+        self.assertReservadoCuadra()
+
+    def test_consumir_reserva_vencida_sin_liberar(self):
+        reservas.fijar('carrito:1', {self.producto.pk: 4}, ttl=60)
+        ReservaStock.objects.update(vence_en=timezone.now() - timedelta(minutes=1))
+        reservas.consumir('carrito:1')
+        self.assertEqual(self.estado(), (6, 0))
+        self.assertReservadoCuadra()
+
+    def test_consumir_reserva_ya_liberada(self):
+        reservas.fijar('carrito:1', {self.producto.pk: 4}, ttl=60)
+        self.assertEqual(reservas.liberar_vencidas(ahora=timezone.now() + timedelta(minutes=2)), 1)
+        # Las unidades liberadas las tomó otro carrito: para el primero solo queda 1 disponible
+        reservas.fijar('carrito:2', {self.producto.pk: 9})
+        with self.assertRaises(StockInsuficiente):
+            reservas.consumir('carrito:1', {self.producto.pk: 4})
+        self.assertEqual(self.estado(), (10, 9))
+        reservas.consumir('carrito:1', {self.producto.pk: 1})
+        self.assertEqual(self.estado(), (9, 9))
+        self.assertReservadoCuadra()
+
+    def test_liberar(self):
+        reservas.fijar('pedido:1', {self.producto.pk: 3, self.otro.pk: 2})
+        self.assertEqual(reservas.liberar('pedido:1', [self.producto.pk]), 3)
+        self.assertEqual(self.estado(), (10, 0))
+        self.assertEqual(self.estado(self.otro), (5, 2))
+        self.assertEqual(reservas.liberar('pedido:1'), 2)
+        self.assertEqual(reservas.liberar('pedido:1'), 0)
+        self.assertEqual(self.estado(self.otro), (5, 0))
+        self.assertReservadoCuadra()
+
+    def test_liberar_vencidas_solo_las_vencidas(self):
+        reservas.fijar('carrito:1', {self.producto.pk: 3, self.otro.pk: 1}, ttl=60)
+        reservas.fijar('carrito:2', {self.producto.pk: 2}, ttl=3600)
+        reservas.fijar('pedido:1', {self.producto.pk: 4})  # sin vencimiento
+        liberadas = reservas.liberar_vencidas(ahora=timezone.now() + timedelta(minutes=2), lote=1)
+        self.assertEqual(liberadas, 2)
+        self.assertEqual(self.estado(), (10, 6))
+        self.assertEqual(self.estado(self.otro), (5, 0))
+        self.assertReservadoCuadra()
+
+
+class LibroInventarioTests(TestCase):
+    def setUp(self):
+        self.producto = _producto('P1', 10)
+
+    def movimientos(self, tipo):
+        return list(MovimientoInventario.objects.filter(producto=self.producto, tipo=tipo)
+                    .values_list('cantidad', flat=True))
+
+    def test_crear_registra_el_stock_inicial(self):
+        self.assertEqual(self.movimientos('Inicial'), [10])
+        self.assertEqual(inventario.desajustes(), [])
+
+    def test_save_registra_la_diferencia_como_ajuste(self):
+        producto = Producto.objects.get(pk=self.producto.pk)
+        producto.stock = 7
+        producto.save()
+        self.assertEqual(self.movimientos('Ajuste'), [-3])
+        self.assertEqual(producto.stock, 7)
+        producto.save()  # sin cambio de stock, sin movimiento
+        self.assertEqual(self.movimientos('Ajuste'), [-3])
+        self.assertEqual(inventario.desajustes(), [])
+
+    def test_save_de_instancia_vieja_no_pisa_ventas_ni_reservas(self):
+        vieja = Producto.objects.get(pk=self.producto.pk)
+        reservas.fijar('carrito:1', {self.producto.pk: 2})
+        reservas.consumir(None, {self.producto.pk: 3})
+
+        vieja.nombre = 'Renombrado'
+        vieja.save()
+        self.producto.refresh_from_db()
+        self.assertEqual((self.producto.nombre, self.producto.stock, self.producto.stock_reservado),
+                         ('Renombrado', 7, 2))
+        self.assertEqual(self.movimientos('Ajuste'), [])
+
+        # Un ajuste sobre lo leído (10 -> 15) se suma a lo que hay ahora (7)
+        vieja.stock = 15
+        vieja.save()
+        self.assertEqual(vieja.stock, 12)
+        self.assertEqual(self.movimientos('Ajuste'), [5])
+        self.assertEqual(inventario.desajustes(), [])
+        self.assertEqual(reservas.desajustes(), [])
+
+
+class AutocompletarProductosTests(TestCase):
+    def setUp(self):
+        Producto.objects.create(codigo='PAS-01', nombre='Ñoquis de papa', precio_unitario=1990, costo_unitario=900)
+        Producto.objects.create(codigo='ACE-01', nombre='Aceite de oliva', precio_unitario=5990, costo_unitario=3000)
+        Producto.objects.create(codigo='NUE-01', nombre='Nueces', precio_unitario=3990, costo_unitario=2000)
+        Producto.objects.bulk_create([
+            Producto(codigo='ÁB-01', nombre='Ábaco escolar', precio_unitario=990, costo_unitario=400),
+        ])
+
+    def nombres(self, texto):
+        return [p['nombre'] for p in buscar_productos(texto, 10)]
+
+    def test_prefijo_con_enie_y_tildes(self):
+        self.assertEqual(self.nombres('Ño'), ['Ñoquis de papa'])
+        self.assertEqual(self.nombres('ñoq'), ['Ñoquis de papa'])
+        self.assertEqual(self.nombres('N'), ['Nueces', 'Ñoquis de papa'])
+        self.assertEqual(self.nombres('ab'), ['Ábaco escolar'])
+        self.assertEqual(self.nombres('áb-0'), ['Ábaco escolar'])
 
-# Create your tests here.
+    def test_la_clave_sigue_al_nombre(self):
+        producto = Producto.objects.get(codigo='ACE-01')
+        producto.nombre = 'Élite aceite'
+        producto.save(update_fields=['nombre'])
+        self.assertEqual(self.nombres('eli'), ['Élite aceite'])
+        self.assertEqual(self.nombres('aceite'), [])
@@ -8,4 +8,7 @@ urlpatterns = [
     path('editar/<int:producto_id>/', views.editar_producto, name='editar_producto'),
     path('eliminar/<int:producto_id>/', views.eliminar_producto, name='eliminar_producto'),
     path('importar-costos/', views.importar_costos_excel, name='importar_costos'),
+    path('importar-costos/<int:importacion_id>/', views.estado_importacion, name='estado_importacion'),
+    path('catalogo/fragmento/', views.catalogo_fragmento, name='catalogo_fragmento'),
+    path('buscar/', views.buscar_productos, name='buscar_productos'),
 ]
\ No newline at end of file
@@ -1,10 +1,19 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from .models import Producto
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.conf import settings
+from django.core.paginator import Paginator
+from .models import Producto, ImportacionCostos
+from ticashop import autocompletar
+from . import busqueda, catalogo
+from . import importacion as importacion_costos
+from .autocompletar import buscar_productos as buscar_productos_prefijo
 from .forms import ProductoForm, ImportCostoForm
-from decimal import Decimal # Importación necesaria para manejar valores monetarios
-import openpyxl # Importación necesaria para la lectura del Excel
+
+
+POR_PAGINA = 50
 
 
 # ========== FUNCIONES AUXILIARES ==========
@@ -21,14 +30,59 @@ def puede_ver_productos(usuario):
 @login_required
 @user_passes_test(puede_ver_productos)
 def listar_productos(request):
-    productos = Producto.objects.select_related('categoria', 'proveedor').all()
+    productos = Producto.objects.select_related('categoria', 'proveedor').order_by('codigo')
 
-    # Filtro de búsqueda
-    buscar = request.GET.get('buscar')
+    # Búsqueda de texto completo (código, nombre, descripción y categoría), por relevancia
+    buscar = request.GET.get('buscar', '').strip()
     if buscar:
-        productos = productos.filter(nombre__icontains=buscar)
+        resultado = busqueda.buscar(buscar, productos)
+        # None = texto sin palabras; una búsqueda sin coincidencias es vacía (y falsa), no "todo"
+        if resultado is not None:
+            productos = resultado
+
+    pagina = Paginator(productos, POR_PAGINA).get_page(request.GET.get('pagina'))
+    return render(request, 'productos/listar_productos.html', {
+        'productos': pagina,
+        'pagina': pagina,
+        'buscar': buscar,
+    })
+
+
+# ========== CATÁLOGO PÚBLICO (SCROLL INFINITO) ==========
+
+def catalogo_fragmento(request):
+    """
+    Siguiente página del catálogo como fragmento HTML dentro de un JSON.
+    Pública, igual que la tienda del dashboard.
+    """
+    categoria_id = catalogo.parsear_categoria(request.GET.get('categoria'))
+    buscar = request.GET.get('q', '').strip()
+    if buscar:
+        productos, siguiente, _ = catalogo.pagina_busqueda(
+            buscar, cursor=request.GET.get('cursor'), categoria_id=categoria_id,
+        )
+    else:
+        productos, siguiente = catalogo.pagina_catalogo(
+            cursor=request.GET.get('cursor'),
+            categoria_id=categoria_id,
+        )
+    html = render_to_string('dashboard/_catalogo_pagina.html', {'productos': productos}, request=request)
+    return JsonResponse({'html': html, 'siguiente': siguiente})
+
 
-    return render(request, 'productos/listar_productos.html', {'productos': productos})
+# ========== AUTOCOMPLETADO ==========
+
+@login_required
+@user_passes_test(puede_ver_productos)
+def buscar_productos(request):
+    """Productos activos cuyo código o nombre empieza con ?q= (JSON, para el ingreso de pedidos)."""
+    texto = autocompletar.termino(request)
+    if not texto:
+        return autocompletar.respuesta([])
+    resultados = autocompletar.buscar_en_cache(
+        'productos', texto.lower(), autocompletar.limite(request), buscar_productos_prefijo
+    )
+    return autocompletar.respuesta(resultados)
 
 
 # ========== CRUD ==========
@@ -85,71 +139,63 @@ def eliminar_producto(request, producto_id):
 @user_passes_test(es_administrador)
 def importar_costos_excel(request):
     """
-    Vista para subir el Excel y actualizar Costos y Precios de Venta masivamente.
-    El Excel espera: Columna A=CODIGO, Columna B=COSTO_NETO, Columna C=PRECIO_VENTA.
+    Vista para subir el Excel/CSV y actualizar Costos y Precios de Venta masivamente.
+    El archivo espera: Columna A=CODIGO, Columna B=COSTO_NETO, Columna C=PRECIO_VENTA.
+    Los archivos grandes se procesan en segundo plano.
     """
+    resultado = None
     if request.method == 'POST':
         form = ImportCostoForm(request.POST, request.FILES)
         if form.is_valid():
-            archivo = request.FILES['archivo_excel']
-            
+            archivo = form.cleaned_data['archivo_excel']
+            simular = form.cleaned_data['simular']
+
+            if archivo.size > settings.IMPORTACION_COSTOS_MAX_SINCRONO:
+                importacion = importacion_costos.crear_importacion(archivo, request.user, simular)
+                importacion_costos.iniciar_importacion(importacion)
+                messages.info(request, "⏳ El archivo es grande: la importación seguirá en segundo plano.")
+                return redirect('productos:estado_importacion', importacion_id=importacion.id)
+
             try:
-                wb = openpyxl.load_workbook(archivo)
-                sheet = wb.active
+                _, filas = importacion_costos.abrir_filas(archivo.file, archivo.name)
+                resultado = importacion_costos.importar_costos(filas, simular=simular).como_dict()
             except Exception as e:
-                messages.error(request, f"Error al leer el archivo Excel: {e}")
+                messages.error(request, f"Error al leer el archivo: {e}")
                 return redirect('productos:importar_costos')
 
-            productos_actualizados = 0
-            productos_no_encontrados = []
-            
-            # Iterar sobre las filas (desde la 2 para saltar el encabezado)
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                if not row or not row[0]:
-                    continue
-
-                codigo_producto = str(row[0]).strip() # Columna A (Obligatoria)
-                
-                # Lectura segura de las columnas opcionales
-                costo_neto = row[1] if len(row) > 1 else None      # Columna B
-                precio_venta = row[2] if len(row) > 2 else None    # Columna C
-
-                try:
-                    producto = Producto.objects.get(codigo=codigo_producto)
-                    cambios = False
-
-                    # 1. Actualizar Costo (si viene)
-                    if costo_neto is not None:
-                        try:
-                            producto.costo_unitario = Decimal(str(costo_neto))
-                            cambios = True
-                        except:
-                            pass 
-
-                    # 2. Actualizar Precio Venta (si viene)
-                    if precio_venta is not None:
-                        try:
-                            producto.precio_unitario = Decimal(str(precio_venta))
-                            cambios = True
-                        except:
-                            pass 
-
-                    if cambios:
-                        producto.save()
-                        productos_actualizados += 1
-                    
-                except Producto.DoesNotExist:
-                    productos_no_encontrados.append(codigo_producto)
-                except Exception as e:
-                    messages.error(request, f"Error en fila {codigo_producto}: {e}")
-
-            messages.success(request, f"✅ Proceso completado. {productos_actualizados} productos actualizados.")
-            if productos_no_encontrados:
-                messages.warning(request, f"⚠️ SKU no encontrados: {', '.join(productos_no_encontrados)}")
-            
-            return redirect('productos:listar_productos')
-
+            if simular:
+                messages.info(request, f"🔎 Simulación: {resultado['actualizados']} productos cambiarían.")
+            else:
+                messages.success(request, f"✅ Proceso completado. {resultado['actualizados']} productos actualizados.")
+            if resultado['total_errores']:
+                messages.warning(request, f"⚠️ {resultado['total_errores']} filas con errores (ver detalle).")
+            if resultado['total_no_encontrados']:
+                messages.warning(request, f"⚠️ {resultado['total_no_encontrados']} SKU no encontrados (ver detalle).")
     else:
         form = ImportCostoForm()
 
-    return render(request, 'productos/importar_costos.html', {'form': form})
\ No newline at end of file
+    context = {
+        'form': form,
+        'resultado': resultado,
+        'importaciones': ImportacionCostos.objects.select_related('usuario')[:5],
+    }
+    return render(request, 'productos/importar_costos.html', context)
+
+
+@login_required
+@user_passes_test(es_administrador)
+def estado_importacion(request, importacion_id):
+    """Avance de una importación en segundo plano (HTML, o JSON si ?formato=json)."""
+    importacion = get_object_or_404(ImportacionCostos, id=importacion_id)
+    if request.GET.get('formato') == 'json':
+        return JsonResponse({
+            'estado': importacion.estado,
+            'porcentaje': importacion.porcentaje,
+            'filas_procesadas': importacion.filas_procesadas,
+            'filas_totales': importacion.filas_totales,
+            'actualizados': importacion.actualizados,
+        })
+    return render(request, 'productos/estado_importacion.html', {
+        'importacion': importacion,
+        'resultado': importacion.resultado if importacion.estado == 'Completada' else None,
+    })
@@ -0,0 +1,73 @@
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from apps.clientes.models import Cliente
+from apps.productos.models import Producto
+from apps.usuarios.models import Usuario
+from ticashop import sesiones
+from ticashop.benchmark import base_temporal, percentil
+
+
+class Command(BaseCommand):
+    help = ('Consultas por request de la tienda (dashboard del cliente y agregar al carrito) con cada motor '
+            'de sesiones de ticashop/sesiones.py: total, consultas a django_session y latencia (base temporal).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Requests por motor y vista')
+        parser.add_argument('--motores', nargs='+', choices=list(sesiones.MOTORES), default=list(sesiones.MOTORES))
+
+    def medir(self, client, metodo, url, datos=None):
+        with CaptureQueriesContext(connection) as q:
+            inicio = time.perf_counter()
+            respuesta = getattr(client, metodo)(url, datos or {})
+            ms = (time.perf_counter() - inicio) * 1000
+        if respuesta.status_code not in (200, 302):
+            self.stdout.write(self.style.WARNING(f"  {url} respondió {respuesta.status_code}"))
+        de_sesion = sum(1 for c in q.captured_queries if 'django_session' in c['sql'])
+        return len(q), de_sesion, ms
+
+    def handle(self, *args, **options):
+        hosts = ['testserver'] + list(settings.ALLOWED_HOSTS)
+        with base_temporal(), tempfile.TemporaryDirectory() as directorio, \
+                override_settings(ALLOWED_HOSTS=hosts, SESSION_FILE_PATH=directorio):
+            usuario = Usuario.objects.create_user('bench_cliente', password='bench', rol='Cliente')
+            Cliente.objects.create(user=usuario, rut='BENCH-1', razon_social='Cliente Benchmark',
+                                   direccion='Calle 1', email_facturacion='bench@example.com')
+            productos = Producto.objects.bulk_create([
+                Producto(codigo=f'BENCH-{i}', nombre=f'Producto {i}', precio_unitario=1190,
+                         costo_unitario=500, stock=10 ** 6)
+                for i in range(100)
+            ])
+            vistas = [
+                ('tienda', 'get', reverse('usuarios:dashboard'), None),
+                ('agregar', 'post', reverse('ventas:cliente_add_to_cart', args=[productos[0].id]), {'quantity': 1}),
+            ]
+
+            self.stdout.write(f"{'motor':<10} {'vista':<8} {'consultas':>10} {'de sesión':>10} {'p50 ms':>8} {'p95 ms':>8}")
+            for nombre in options['motores']:
+                with override_settings(SESSION_ENGINE=sesiones.MOTORES[nombre]):
+                    client = Client()
+                    client.force_login(usuario)
+                    client.get(vistas[0][2])  # calienta plantillas y cachés
+                    for vista, metodo, url, datos in vistas:
+                        consultas = de_sesion = 0
+                        tiempos = []
+                        for _ in range(options['requests']):
+                            c, s, ms = self.medir(client, metodo, url, datos)
+                            consultas += c
+                            de_sesion += s
+                            tiempos.append(ms)
+                        n = options['requests']
+                        self.stdout.write(
+                            f"{nombre:<10} {vista:<8} {consultas / n:>10.1f} {de_sesion / n:>10.1f} "
+                            f"{percentil(tiempos, 50):>8.1f} {percentil(tiempos, 95):>8.1f}"
+                        )
+            self.stdout.write('\nConsultas promedio por request. "db" es el motor anterior; con cached_db la '
+                              'sesión se lee de la caché "sesiones" y la base solo se escribe si la sesión cambia.')
@@ -0,0 +1,37 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ticashop import sesiones
+
+
+class Command(BaseCommand):
+    help = ('Borra las sesiones vencidas. En la base (motores db y cached_db) lo hace por lotes cortos, '
+            'una transacción por lote, en vez del DELETE único de clearsessions; con el motor file borra '
+            'los archivos vencidos y con cache no hay nada que hacer (vencen solas). Con --intervalo '
+            'queda corriendo.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=int, default=0, help='Segundos entre pasadas (0 = una vez)')
+        parser.add_argument('--lote', type=int, default=1000, help='Sesiones por transacción')
+        parser.add_argument('--pausa', type=float, default=0.05, help='Segundos de espera entre lotes')
+
+    def handle(self, *args, **options):
+        en_base = settings.SESSION_ENGINE in (sesiones.MOTORES['db'], sesiones.MOTORES['cached_db'])
+        while True:
+            inicio = time.perf_counter()
+            if en_base:
+                borradas = sesiones.borrar_vencidas(lote=options['lote'], pausa=options['pausa'])
+                self.stdout.write(f"{borradas} sesiones vencidas borradas en {time.perf_counter() - inicio:.2f} s")
+            else:
+                import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+                self.stdout.write(f"Sesiones vencidas de {settings.SESSION_ENGINE} limpiadas "
+                                  f"en {time.perf_counter() - inicio:.2f} s")
+
+            if options['intervalo'] <= 0:
+                return
+            close_old_connections()
+            time.sleep(options['intervalo'])
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.usuarios import metricas
+
+
+class Command(BaseCommand):
+    help = ('Precalcula las métricas de los dashboards (administración, tesorería y cada vendedor activo) '
+            'y las deja en la caché. Con --intervalo queda corriendo y las recalcula cada N segundos. '
+            'Solo sirve a los servidores web si la caché es compartida (Redis, base de datos); con '
+            'LocMemCache usar settings.DASHBOARD_REFRESCO.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=int, default=0, help='Segundos entre cálculos (0 = una vez)')
+
+    def handle(self, *args, **options):
+        while True:
+            inicio = time.perf_counter()
+            paneles = metricas.refrescar_todos()
+            self.stdout.write(f"{paneles} paneles calculados en {time.perf_counter() - inicio:.2f} s")
+            if options['intervalo'] <= 0:
+                return
+            close_old_connections()
+            time.sleep(options['intervalo'])
@@ -0,0 +1,253 @@
+"""
+Métricas de los dashboards por rol, cacheadas.
+
+Cada rol tiene un paquete de métricas (un dict) que se calcula con pocas
+consultas: los conteos sobre una misma tabla se juntan en un aggregate con
+Count(filter=...). El paquete se guarda en la caché de Django con un TTL
+corto (settings.DASHBOARD_TTL) y una clave que incluye la versión de cada
+grupo de modelos del que depende; las señales (signals.py) suben la versión
+del grupo al guardar o borrar, así que un cambio invalida solo los paneles
+afectados. Las escrituras que no emiten señales (UPDATE con F() del stock,
+de los totales de pedido y de los saldos) llaman a invalidar_al_confirmar().
+
+Opcionalmente (settings.DASHBOARD_REFRESCO > 0) un hilo del proceso vuelve
+a calcular cada tantos segundos los paquetes pedidos recientemente, para que
+los requests casi nunca paguen el cálculo. El comando refrescar_dashboards
+hace lo mismo desde fuera, útil con una caché compartida (Redis, base).
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, models, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.clientes.models import Cliente
+from apps.documentos.models import DocumentoVenta
+from apps.productos.models import Producto
+from apps.ventas.models import Pedido
+from ticashop.fechas import rango_dias
+
+from .models import Usuario
+
+logger = logging.getLogger(__name__)
+
+PENDIENTES = ['Emitida', 'Pago Parcial']
+TOP_SALDOS = 20
+TOP_STOCK_BAJO = 10
+VIGENCIA_SOLICITUD = 600  # segundos: el refresco solo recalcula paneles pedidos en este lapso
+
+# Grupos de modelos de los que depende cada panel (ver signals.py)
+DEPENDENCIAS = {
+    'Administrador': ('usuarios', 'clientes', 'productos', 'pedidos', 'documentos'),
+    'Vendedor': ('clientes', 'productos', 'pedidos'),
+    'Tesoreria': ('pedidos', 'documentos'),
+}
+
+
+def ttl():
+    return getattr(settings, 'DASHBOARD_TTL', 60)
+
+
+# ========== VERSIONES ==========
+
+def _clave_version(grupo):
+    return f'dashboard:version:{grupo}'
+
+
+def _versiones(grupos):
+    claves = [_clave_version(g) for g in grupos]
+    versiones = cache.get_many(claves)
+    for clave in claves:
+        if clave not in versiones:
+            # Valor inicial por tiempo para no reutilizar paquetes de una versión anterior
+            cache.add(clave, int(time.time()), None)
+            versiones[clave] = cache.get(clave)
+    return [str(versiones[c]) for c in claves]
+
+
+def invalidar(grupo):
+    """Descarta los paquetes que dependen de `grupo`."""
+    try:
+        cache.incr(_clave_version(grupo))
+    except ValueError:
+        cache.set(_clave_version(grupo), int(time.time()), None)
+
+
+def invalidar_al_confirmar(*grupos):
+    """Invalida `grupos` cuando se confirme la transacción en curso (o ya, si no hay una)."""
+    def invalidar_grupos():
+        for grupo in grupos:
+            invalidar(grupo)
+    transaction.on_commit(invalidar_grupos)
+
+
+# ========== CÁLCULO ==========
+
+def metricas_administrador(hoy, usuario=None):
+    devueltos = DocumentoVenta.objects.filter(
+        estado__in=['Devuelta', 'Devuelta Parcial'], pedido__isnull=False
+    ).aggregate(
+        devuelta=Count('id', filter=Q(estado='Devuelta')),
+        devuelta_parcial=Count('id', filter=Q(estado='Devuelta Parcial')),
+    )
+    return {
+        'total_usuarios': Usuario.objects.count(),
+        'total_clientes': Cliente.objects.count(),
+        'total_productos': Producto.objects.count(),
+        'pedidos_hoy': Pedido.objects.filter(**rango_dias('fecha_creacion', hoy, hoy)).count(),
+        'productos_stock_bajo': list(
+            Producto.objects.filter(stock__lte=models.F('stock_minimo'), activo=True)
+            .order_by('stock')[:TOP_STOCK_BAJO]
+        ),
+        'pedidos_devuelta': devueltos['devuelta'],
+        'pedidos_devuelta_parcial': devueltos['devuelta_parcial'],
+    }
+
+
+def metricas_vendedor(hoy, usuario):
+    pedidos = Pedido.objects.filter(usuario=usuario).aggregate(
+        total=Count('id'),
+        hoy=Count('id', filter=Q(**rango_dias('fecha_creacion', hoy, hoy))),
+    )
+    return {
+        'total_clientes': Cliente.objects.count(),
+        'total_productos': Producto.objects.filter(activo=True).count(),
+        'pedidos_hoy': pedidos['hoy'],
+        'mis_pedidos': pedidos['total'],
+    }
+
+
+def metricas_tesoreria(hoy, usuario=None):
+    pedidos = Pedido.objects.aggregate(
+        total=Count('id'),
+        pendientes=Count('id', filter=Q(estado='Pendiente')),
+        completados=Count('id', filter=Q(estado='Completado')),
+    )
+    # Alertas y saldos en una pasada sobre los documentos pendientes
+    con_saldo = Q(tipo_documento='Factura', saldo__gt=0)
+    documentos = DocumentoVenta.objects.filter(estado__in=PENDIENTES).con_saldo().aggregate(
+        vencidas=Count('id', filter=Q(fecha_vencimiento__lt=hoy)),
+        por_vencer=Count('id', filter=Q(fecha_vencimiento__range=[hoy, hoy + timedelta(days=7)])),
+        facturas_con_saldo=Count('id', filter=con_saldo),
+        total_saldo=Sum('saldo', filter=con_saldo),
+    )
+    facturas_con_saldo = (
+        DocumentoVenta.objects.filter(tipo_documento='Factura').pendientes_de_pago()
+        .select_related('cliente').order_by('-saldo', 'fecha_vencimiento')[:TOP_SALDOS]
+    )
+    return {
+        'total_pedidos': pedidos['total'],
+        'pedidos_pendientes': pedidos['pendientes'],
+        'pedidos_completados': pedidos['completados'],
+        'facturas_vencidas': documentos['vencidas'],
+        'facturas_por_vencer': documentos['por_vencer'],
+        'facturas_con_saldo': list(facturas_con_saldo),
+        'resumen_saldos': {'cantidad': documentos['facturas_con_saldo'], 'total': documentos['total_saldo']},
+    }
+
+
+CALCULOS = {
+    'Administrador': metricas_administrador,
+    'Vendedor': metricas_vendedor,
+    'Tesoreria': metricas_tesoreria,
+}
+
+
+# ========== CACHÉ ==========
+
+_solicitados = {}  # (rol, usuario_id) -> última vez que se pidió (para el refresco)
+_lock = threading.Lock()
+
+
+def _por_usuario(rol):
+    return rol == 'Vendedor'
+
+
+def _clave(rol, usuario_id, hoy):
+    versiones = ':'.join(_versiones(DEPENDENCIAS[rol]))
+    return f"dashboard:{rol}:{usuario_id or 'todos'}:{hoy.isoformat()}:{versiones}"
+
+
+def calcular(rol, usuario, hoy=None):
+    """Calcula el paquete de `rol` y lo deja en la caché."""
+    hoy = hoy or timezone.localdate()
+    usuario_id = usuario.pk if _por_usuario(rol) else None
+    clave = _clave(rol, usuario_id, hoy)
+    datos = CALCULOS[rol](hoy, usuario)
+    cache.set(clave, datos, ttl())
+    return datos
+
+
+def metricas(rol, usuario):
+    """Paquete de métricas del panel de `rol` (desde la caché si está vigente)."""
+    hoy = timezone.localdate()
+    usuario_id = usuario.pk if _por_usuario(rol) else None
+    with _lock:
+        _solicitados[(rol, usuario_id)] = time.monotonic()
+    asegurar_refresco()
+
+    datos = cache.get(_clave(rol, usuario_id, hoy))
+    if datos is None:
+        datos = calcular(rol, usuario, hoy)
+    return datos
+
+
+# ========== REFRESCO EN SEGUNDO PLANO ==========
+
+_hilo_refresco = None
+
+
+def refrescar_solicitados():
+    """Recalcula los paquetes pedidos en los últimos VIGENCIA_SOLICITUD segundos."""
+    limite = time.monotonic() - VIGENCIA_SOLICITUD
+    with _lock:
+        for clave, cuando in list(_solicitados.items()):
+            if cuando < limite:
+                del _solicitados[clave]
+        pendientes = list(_solicitados)
+    for rol, usuario_id in pendientes:
+        usuario = Usuario.objects.filter(pk=usuario_id).first() if usuario_id else None
+        if usuario_id and usuario is None:
+            continue
+        calcular(rol, usuario)
+    return len(pendientes)
+
+
+def refrescar_todos():
+    """Recalcula los paneles de administración y tesorería y el de cada vendedor activo."""
+    calcular('Administrador', None)
+    calcular('Tesoreria', None)
+    vendedores = Usuario.objects.filter(rol='Vendedor', is_active=True)
+    for vendedor in vendedores.iterator():
+        calcular('Vendedor', vendedor)
+    return 2 + vendedores.count()
+
+
+def _refrescar(intervalo):
+    while True:
+        time.sleep(intervalo)
+        try:
+            close_old_connections()
+            refrescar_solicitados()
+        except Exception:
+            logger.exception('Error al refrescar las métricas de los dashboards')
+        finally:
+            close_old_connections()
+
+
+def asegurar_refresco():
+    """Inicia (una vez por proceso) el hilo de refresco si settings.DASHBOARD_REFRESCO > 0."""
+    global _hilo_refresco
+    intervalo = getattr(settings, 'DASHBOARD_REFRESCO', 0)
+    if intervalo <= 0 or _hilo_refresco is not None:
+        return
+    with _lock:
+        if _hilo_refresco is None:
+            _hilo_refresco = threading.Thread(target=_refrescar, args=(intervalo,), daemon=True,
+                                              name='refresco-dashboards')
+            _hilo_refresco.start()
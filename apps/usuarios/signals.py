@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+
+from apps.clientes.models import Cliente
+from apps.documentos.models import DocumentoVenta, Pago
+from apps.productos.models import Producto
+from apps.ventas.models import Pedido
+
+from . import metricas
+from .models import Usuario
+
+# Modelo -> grupo de métricas de los dashboards que invalida (ver metricas.DEPENDENCIAS)
+GRUPOS = {
+    Usuario: 'usuarios',
+    Cliente: 'clientes',
+    Producto: 'productos',
+    Pedido: 'pedidos',
+    DocumentoVenta: 'documentos',
+    Pago: 'documentos',  # cambia monto_pagado con un UPDATE, sin post_save del documento
+}
+
+
+# Campos cuyo save(update_fields=...) no cambia ninguna métrica: el login guarda
+# last_login de cada usuario (clientes de la tienda incluidos) y no debe tirar la caché
+CAMPOS_SIN_METRICAS = {
+    Usuario: {'last_login'},
+}
+
+
+def invalidar_metricas(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= CAMPOS_SIN_METRICAS.get(sender, set()):
+        return
+    metricas.invalidar(GRUPOS[sender])
+
+
+for modelo in GRUPOS:
+    post_save.connect(invalidar_metricas, sender=modelo, dispatch_uid=f'metricas_{modelo.__name__}_save')
+    post_delete.connect(invalidar_metricas, sender=modelo, dispatch_uid=f'metricas_{modelo.__name__}_delete')
@@ -1,3 +1,21 @@
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Usuario
+
+
+class InvalidarMetricasTests(TestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user('cliente_1', password='clave-segura-1', rol='Cliente')
+
+    def test_login_no_invalida_usuarios(self):
+        with mock.patch('apps.usuarios.metricas.invalidar') as invalidar:
+            self.assertTrue(self.client.login(username='cliente_1', password='clave-segura-1'))
+        invalidar.assert_not_called()
+
+    def test_cambio_de_rol_invalida_usuarios(self):
+        with mock.patch('apps.usuarios.metricas.invalidar') as invalidar:
+            self.usuario.rol = 'Vendedor'
+            self.usuario.save(update_fields=['rol', 'last_login'])
+        invalidar.assert_called_once_with('usuarios')
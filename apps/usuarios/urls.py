@@ -19,4 +19,7 @@ urlpatterns = [
     path('usuarios/crear/', views.crear_usuario, name='crear_usuario'),
     path('usuarios/editar/<int:user_id>/', views.editar_usuario, name='editar_usuario'),
     path('usuarios/eliminar/<int:user_id>/', views.eliminar_usuario, name='eliminar_usuario'),
+
+    # Instrumentación (solo admin)
+    path('instrumentacion/', views.instrumentacion, name='instrumentacion'),
 ]
\ No newline at end of file
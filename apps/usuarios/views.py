@@ -1,137 +1,79 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import logout
 from django.contrib import messages
-from django.db import models
-from django.utils import timezone
-from datetime import date
+from ticashop.instrumentacion import configuracion, registro
 
+from . import metricas
 from .models import Usuario
 from .forms import CrearUsuarioForm, EditarUsuarioForm, ClienteRegistrationForm
-from apps.clientes.models import Cliente
-from apps.productos.models import Producto
-from apps.ventas.models import Pedido
-from apps.documentos.models import DocumentoVenta
-from datetime import timedelta
+from apps.productos import catalogo
 # ========== FUNCIÓN AUXILIAR ==========
 def es_administrador(user):
     """Verifica si el usuario es administrador"""
     return user.is_authenticated and user.rol == 'Administrador'
 
 
+# ========== TIENDA (CATÁLOGO PAGINADO) ==========
+def _render_tienda(request):
+    """Catálogo público paginado por cursor (ver apps/productos/catalogo.py)"""
+    categoria_id = catalogo.parsear_categoria(request.GET.get('categoria'))
+    buscar = request.GET.get('q', '').strip()
+    if buscar:
+        productos, siguiente_cursor, total_encontrados = catalogo.pagina_busqueda(
+            buscar, cursor=request.GET.get('cursor'), categoria_id=categoria_id,
+        )
+    else:
+        productos, siguiente_cursor = catalogo.pagina_catalogo(
+            cursor=request.GET.get('cursor'),
+            categoria_id=categoria_id,
+        )
+        total_encontrados = None
+
+    context = {
+        'usuario': request.user, # Puede ser 'AnonymousUser'
+        'total_productos': catalogo.total_catalogo(categoria_id),
+        'productos': productos,
+        'siguiente_cursor': siguiente_cursor,
+        'categorias': catalogo.categorias_catalogo(),
+        'categoria_id': categoria_id,
+        'buscar': buscar,
+        'total_encontrados': total_encontrados,
+    }
+    return render(request, 'dashboard/cliente_dashboard.html', context)
+
+
 # ========== DASHBOARD PRINCIPAL (HECHO PÚBLICO) ==========
+PLANTILLAS_PANEL = {
+    'Administrador': 'dashboard/admin_dashboard.html',
+    'Vendedor': 'dashboard/vendedor_dashboard.html',
+    'Tesoreria': 'dashboard/tesoreria_dashboard.html',
+}
+
 # ¡Quitamos @login_required de aquí!
 def dashboard(request):
     
     # --- 1. LÓGICA PARA INVITADOS (NO AUTENTICADOS) ---
     if not request.user.is_authenticated:
         # Es un visitante, le mostramos la tienda.
-        total_productos = Producto.objects.filter(activo=True).count()
-        productos = Producto.objects.filter(activo=True)
-        
-        context = {
-            'usuario': request.user, # Será 'AnonymousUser'
-            'total_productos': total_productos,
-            'productos': productos,
-        }
-        return render(request, 'dashboard/cliente_dashboard.html', context)
+        return _render_tienda(request)
 
     # --- 2. LÓGICA PARA USUARIOS AUTENTICADOS ---
     # Si llegamos aquí, el usuario SÍ está logueado.
     usuario = request.user
     rol = usuario.rol.strip() if usuario.rol else ''
 
-    # --- Panel de ADMINISTRADOR ---
-    if rol == 'Administrador':
-        total_usuarios = Usuario.objects.count()
-        total_clientes = Cliente.objects.count()
-        total_productos = Producto.objects.count()
-        pedidos_hoy = Pedido.objects.filter(fecha_creacion__date=date.today()).count()
-
-        productos_stock_bajo = Producto.objects.filter(
-            stock__lte=models.F('stock_minimo'),
-            activo=True
-        ).order_by('stock')[:10]
-
-        pedidos_devuelta = Pedido.objects.filter(documentoventa__estado='Devuelta').count()
-        pedidos_devuelta_parcial = Pedido.objects.filter(documentoventa__estado='Devuelta Parcial').count()
-
-        context = {
-            'usuario': usuario,
-            'total_usuarios': total_usuarios,
-            'total_clientes': total_clientes,
-            'total_productos': total_productos,
-            'pedidos_hoy': pedidos_hoy,
-            'productos_stock_bajo': productos_stock_bajo,
-            'pedidos_devuelta': pedidos_devuelta,
-            'pedidos_devuelta_parcial': pedidos_devuelta_parcial,
-        }
-        return render(request, 'dashboard/admin_dashboard.html', context)
-
-    # --- Panel de VENDEDOR ---
-    elif rol == 'Vendedor':
-        total_clientes = Cliente.objects.count()
-        total_productos = Producto.objects.filter(activo=True).count()
-        pedidos_hoy = Pedido.objects.filter(
-            usuario=usuario, 
-            fecha_creacion__date=date.today()
-        ).count()
-        
-        mis_pedidos = Pedido.objects.filter(usuario=usuario).count()
-
-        context = {
-            'usuario': usuario,
-            'total_clientes': total_clientes,
-            'total_productos': total_productos,
-            'pedidos_hoy': pedidos_hoy,
-            'mis_pedidos': mis_pedidos,
-        }
-        return render(request, 'dashboard/vendedor_dashboard.html', context)
-    
-    # --- Panel de TESORERÍA (opcional) ---
-    elif rol == 'Tesoreria': # Ya corregimos el acento en el paso anterior
-        hoy = timezone.localdate()
-
-        # Conteo de Pedidos (usando la lógica existente)
-        total_pedidos = Pedido.objects.count()
-        pedidos_pendientes = Pedido.objects.filter(estado='Pendiente').count()
-        pedidos_completados = Pedido.objects.filter(estado='Completado').count()
-        
-        # 1. Alertas de Facturas Vencidas (Busca las que estén EMITIDAS/PAGO PARCIAL Y vencidas)
-        facturas_vencidas = DocumentoVenta.objects.filter(
-            estado__in=['Emitida', 'Pago Parcial'],
-            fecha_vencimiento__lt=hoy
-        )
-        
-        # 2. Alertas de Facturas Por Vencer (Ej: en los próximos 7 días)
-        fecha_limite_futura = hoy + timedelta(days=7)
-        facturas_por_vencer = DocumentoVenta.objects.filter(
-            estado__in=['Emitida', 'Pago Parcial'],
-            fecha_vencimiento__range=[hoy, fecha_limite_futura]
-        )
+    # --- Paneles de ADMINISTRADOR, VENDEDOR y TESORERÍA ---
+    # Las métricas vienen cacheadas por rol (ver metricas.py)
+    if rol in PLANTILLAS_PANEL:
+        context = {'usuario': usuario, **metricas.metricas(rol, usuario)}
+        return render(request, PLANTILLAS_PANEL[rol], context)
 
-        context = {
-            'usuario': usuario,
-            'total_pedidos': total_pedidos,
-            'pedidos_pendientes': pedidos_pendientes,
-            'pedidos_completados': pedidos_completados,
-            'facturas_vencidas': facturas_vencidas, # <-- Nuevo para el template
-            'facturas_por_vencer': facturas_por_vencer, # <-- Nuevo para el template
-        }
-        return render(request, 'dashboard/tesoreria_dashboard.html', context)
-    
     # --- Panel de CLIENTE ---
-    elif rol == 'Cliente':
+    if rol == 'Cliente':
         # (Ya quitamos la redirección a 'completar_perfil' de aquí)
-        total_productos = Producto.objects.filter(activo=True).count()
-        productos = Producto.objects.filter(activo=True)
-        
-        context = {
-            'usuario': usuario,
-            'total_productos': total_productos,
-            'productos': productos,
-        }
-        return render(request, 'dashboard/cliente_dashboard.html', context)
+        return _render_tienda(request)
 
     # Si tiene rol inválido (pero está logueado)
     return redirect('usuarios:login')
@@ -208,4 +150,30 @@ def eliminar_usuario(request, user_id):
         messages.success(request, 'Usuario eliminado correctamente.')
         return redirect('usuarios:listar_usuarios')
     
-    return render(request, 'usuarios/confirmar_eliminar.html', {'usuario': usuario})
\ No newline at end of file
+    return render(request, 'usuarios/confirmar_eliminar.html', {'usuario': usuario})
+
+
+# ========== INSTRUMENTACIÓN (solo admin) ==========
+@login_required
+@user_passes_test(es_administrador)
+def instrumentacion(request):
+    """Consultas y tiempos por URL medidos por InstrumentacionMiddleware (este proceso)."""
+    config = configuracion()
+    if request.method == 'POST':
+        registro.limpiar(config['HISTORIAL'])
+        messages.success(request, 'Mediciones reiniciadas.')
+        return redirect('usuarios:instrumentacion')
+
+    filas, recientes = registro.resumen()
+    if request.GET.get('formato') == 'json':
+        return JsonResponse({
+            'activa': config['ACTIVA'], 'umbral_consultas': config['UMBRAL_CONSULTAS'],
+            'desde': registro.desde.isoformat(timespec='seconds'),
+            'urls': filas, 'recientes': recientes,
+        })
+    return render(request, 'usuarios/instrumentacion.html', {
+        'config': config,
+        'desde': registro.desde,
+        'filas': filas,
+        'recientes': recientes,
+    })
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Pedido, DetallePedido
+from .models import Pedido, DetallePedido, LineaCarrito, VentaDiaria
 
 class DetallePedidoInline(admin.TabularInline):
     model = DetallePedido
@@ -38,12 +38,34 @@ class PedidoAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('cliente', 'usuario').con_cantidad_items()
+
     def cantidad_items(self, obj):
-        return obj.cantidad_items
+        return obj.total_items
     cantidad_items.short_description = 'Items'
+    cantidad_items.admin_order_field = 'total_items'
 
 @admin.register(DetallePedido)
 class DetallePedidoAdmin(admin.ModelAdmin):
     list_display = ['pedido', 'producto', 'cantidad', 'precio_unitario_venta', 'subtotal']
     list_filter = ['pedido__estado']
-    search_fields = ['producto__nombre', 'pedido__cliente__razon_social']
\ No newline at end of file
+    search_fields = ['producto__nombre', 'pedido__cliente__razon_social']
+
+@admin.register(VentaDiaria)
+class VentaDiariaAdmin(admin.ModelAdmin):
+    list_display = ['fecha', 'vendedor', 'cliente', 'producto', 'tipo_documento', 'unidades', 'bruto', 'notas_credito', 'calculado_en']
+    list_filter = ['tipo_documento', 'fecha']
+    list_select_related = ['vendedor', 'cliente', 'producto']
+    date_hierarchy = 'fecha'
+
+@admin.register(LineaCarrito)
+class LineaCarritoAdmin(admin.ModelAdmin):
+    list_display = ['usuario', 'producto', 'cantidad', 'actualizada_en']
+    search_fields = ['usuario__username', 'producto__codigo']
+    list_select_related = ['usuario', 'producto']
+    # Las líneas van de la mano con las reservas del carrito: se cambian desde la tienda (carrito.py)
+    readonly_fields = ['usuario', 'producto', 'cantidad', 'actualizada_en']
+
+    def has_add_permission(self, request):
+        return False
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class VentasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.ventas'
-    verbose_name = 'Ventas'
\ No newline at end of file
+    verbose_name = 'Ventas'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,136 @@
+"""
+Carrito del cliente en la base, una fila de LineaCarrito por producto.
+
+Antes el carrito era un dict en request.session['cart']: cada cambio
+reescribía la sesión completa (y la tabla django_session en cada request
+que lo tocaba), y cada render volvía a buscar los productos uno por uno.
+Ahora:
+
+- Agregar o cambiar una línea es un upsert de esa fila (bulk_create con
+  update_conflicts); quitarla es un DELETE. La sesión no se toca.
+- contenido() lee líneas, precios y stock en una sola consulta
+  (select_related) y deja el resumen en caché.
+- resumen() (badge de la barra superior) sale de la caché. La clave incluye
+  la versión del catálogo, que cambia con cada save() de Producto y con la
+  importación de precios, así que un cambio de precio invalida todos los
+  totales; los cambios del propio carrito borran la clave del usuario al
+  confirmarse la transacción. Las dos cosas ocurren en la caché del proceso
+  que hizo el cambio: en los demás procesos el resumen dura a lo más
+  settings.CARRITO_RESUMEN_TTL segundos. El carrito y el checkout siempre
+  leen las líneas de la base.
+
+Las unidades del carrito se reservan con apps/productos/reservas.py con el
+titular 'carrito:<usuario_id>'.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from apps.productos import reservas
+from apps.productos.catalogo import version_catalogo
+from .models import LineaCarrito
+
+RESUMEN_VACIO = {'lineas': 0, 'unidades': 0, 'total': Decimal('0.00')}
+
+
+def titular(usuario):
+    return reservas.titular_carrito(usuario.pk)
+
+
+def _clave_resumen(usuario_id):
+    return f'carrito:{usuario_id}:{version_catalogo()}'
+
+
+def ttl_resumen():
+    return getattr(settings, 'CARRITO_RESUMEN_TTL', 30)
+
+
+def invalidar(usuario):
+    # Al confirmar: si no, un resumen leído antes del commit (p. ej. dentro del checkout) quedaría en caché
+    usuario_id = usuario.pk
+    transaction.on_commit(lambda: cache.delete(_clave_resumen(usuario_id)))
+
+
+def cantidades(usuario):
+    """{producto_id: cantidad} de las líneas del carrito."""
+    return dict(LineaCarrito.objects.filter(usuario=usuario).values_list('producto_id', 'cantidad'))
+
+
+# ========== CAMBIOS ==========
+
+def _guardar(usuario, producto_id, cantidad):
+    LineaCarrito.objects.bulk_create(
+        [LineaCarrito(usuario=usuario, producto_id=producto_id, cantidad=cantidad)],
+        update_conflicts=True, update_fields=['cantidad', 'actualizada_en'],
+        # MySQL resuelve el conflicto por cualquier índice único y no acepta que se indique cuál
+        unique_fields=['usuario', 'producto'] if connection.features.supports_update_conflicts_with_target else None,
+    )
+
+
+def agregar(usuario, producto_id, cantidad):
+    """
+    Suma `cantidad` a la línea del producto y reserva el total. Lanza
+    StockInsuficiente (sin cambiar el carrito) si no alcanza. Retorna la
+    cantidad nueva de la línea.
+    """
+    with transaction.atomic():
+        actual = LineaCarrito.objects.filter(usuario=usuario, producto_id=producto_id) \
+            .values_list('cantidad', flat=True).first() or 0
+        nueva = actual + cantidad
+        reservas.fijar(titular(usuario), {producto_id: nueva}, reservas.ttl_carrito())
+        _guardar(usuario, producto_id, nueva)
+    invalidar(usuario)
+    return nueva
+
+
+def quitar(usuario, producto_id):
+    """Quita la línea y libera su reserva. Retorna True si el producto estaba en el carrito."""
+    with transaction.atomic():
+        borradas, _ = LineaCarrito.objects.filter(usuario=usuario, producto_id=producto_id).delete()
+        if borradas:
+            reservas.liberar(titular(usuario), [producto_id])
+    invalidar(usuario)
+    return bool(borradas)
+
+
+def vaciar(usuario):
+    """Borra las líneas (después del checkout, que ya consumió las reservas)."""
+    LineaCarrito.objects.filter(usuario=usuario).delete()
+    invalidar(usuario)
+
+
+# ========== LECTURA ==========
+
+def contenido(usuario):
+    """
+    Líneas del carrito con su producto (precio y stock en la misma consulta)
+    y el resumen: (items, resumen). Cada item es un dict con producto,
+    cantidad y subtotal, como los que usan cart.html y checkout.html.
+    """
+    lineas = LineaCarrito.objects.filter(usuario=usuario).select_related('producto').order_by('id')
+    items = [
+        {'producto': linea.producto, 'cantidad': linea.cantidad,
+         'subtotal': linea.producto.precio_unitario * linea.cantidad}
+        for linea in lineas
+    ]
+    datos = {
+        'lineas': len(items),
+        'unidades': sum(item['cantidad'] for item in items),
+        'total': sum((item['subtotal'] for item in items), Decimal('0.00')),
+    }
+    cache.set(_clave_resumen(usuario.pk), datos, ttl_resumen())
+    return items, datos
+
+
+def resumen(usuario):
+    """Líneas, unidades y total del carrito (cacheado)."""
+    datos = cache.get(_clave_resumen(usuario.pk))
+    if datos is None:
+        if not LineaCarrito.objects.filter(usuario=usuario).exists():
+            datos = RESUMEN_VACIO
+            cache.set(_clave_resumen(usuario.pk), datos, ttl_resumen())
+        else:
+            _, datos = contenido(usuario)
+    return datos
@@ -0,0 +1,88 @@
+"""
+Checkout del cliente en operaciones por lote.
+
+Toda la compra se escribe con un número fijo de consultas, sin importar
+cuántas líneas tenga el carrito: los productos se bloquean una sola vez, el
+stock se descuenta (liberando las reservas del carrito, ver
+apps/productos/reservas.py) con un único UPDATE condicional, la salida queda
+en el libro de inventario y las líneas del pedido y del documento se
+insertan con bulk_create.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.documentos.models import DocumentoVenta, DetalleDocumento, Pago
+from apps.productos import reservas
+from apps.productos.models import Producto
+from apps.productos.reservas import StockInsuficiente
+from .models import Pedido, DetallePedido
+from .totales import desglose_iva
+
+
+@transaction.atomic
+def procesar_checkout(cliente, usuario, cart, tipo_documento, medio_de_pago, titular=None):
+    """
+    Crea Pedido, DocumentoVenta (con su folio), líneas de ambos y el Pago a
+    partir de las cantidades del carrito ({producto_id: cantidad}). `titular` es el de
+    las reservas del carrito, que se consumen. Retorna el documento.
+    """
+    cantidades = {int(pid): int(cant) for pid, cant in cart.items() if int(cant) > 0}
+    productos = Producto.objects.select_for_update().in_bulk(list(cantidades))
+
+    if len(productos) != len(cantidades):
+        raise StockInsuficiente('Uno de los productos del carrito ya no existe.')
+
+    lineas = [
+        (productos[pid], cantidad, productos[pid].precio_unitario, productos[pid].precio_unitario * cantidad)
+        for pid, cantidad in cantidades.items()
+    ]
+    total_bruto = sum((subtotal for *_, subtotal in lineas), Decimal('0')).quantize(Decimal('0.00'))
+    neto, iva = desglose_iva(total_bruto)
+    ahora = timezone.now()
+
+    pedido = Pedido.objects.create(
+        cliente=cliente,
+        usuario=usuario,
+        total=total_bruto,
+        estado='Pendiente',
+    )
+    reservas.consumir(titular, cantidades, referencia=f'pedido:{pedido.id}', usuario=usuario)
+    # bulk_create no pasa por DetallePedido.save(): el total ya quedó escrito arriba
+    DetallePedido.objects.bulk_create([
+        DetallePedido(pedido=pedido, producto=producto, cantidad=cantidad,
+                      precio_unitario_venta=precio, subtotal=subtotal)
+        for producto, cantidad, precio, subtotal in lineas
+    ])
+
+    documento = DocumentoVenta.objects.create(
+        pedido=pedido,
+        tipo_documento=tipo_documento,
+        cliente=cliente,
+        vendedor=usuario,
+        neto=neto,
+        iva=iva,
+        total=total_bruto,
+        fecha_emision=ahora,
+        fecha_vencimiento=ahora.date(),
+        estado='Emitida',
+        medio_de_pago=medio_de_pago,
+        razon_social=cliente.razon_social,
+        rut=cliente.rut,
+        giro=cliente.giro,
+        direccion=cliente.direccion,
+    )
+    DetalleDocumento.objects.bulk_create([
+        DetalleDocumento(documento=documento, producto=producto, cantidad=cantidad,
+                         precio_unitario_venta=precio, subtotal=subtotal,
+                         costo_unitario_venta=producto.costo_unitario)
+        for producto, cantidad, precio, subtotal in lineas
+    ])
+    Pago.objects.create(
+        documento=documento,
+        monto_pagado=total_bruto,
+        metodo_pago=medio_de_pago,
+        referencia="Pago E-Commerce",
+    )
+    return documento
@@ -0,0 +1,230 @@
+"""
+Exportaciones a Excel en memoria constante.
+
+Las filas se leen con values_list(...).iterator() por bloques y se escriben
+con xlsxwriter en modo constant_memory (cada fila se baja a disco apenas se
+escribe). El libro se arma en un archivo temporal que se envía con
+FileResponse, así que ni el queryset ni el libro completo quedan en memoria.
+
+Los reportes de las vistas leen los rollups diarios (VentaDiaria, ver
+ventas_diarias.py): escribir_resumen_ventas y escribir_rentabilidad_diaria.
+escribir_ventas (un pedido por fila) y escribir_rentabilidad (una línea de
+documento por fila) quedan para el detalle, que recorre las tablas de venta.
+"""
+import tempfile
+from decimal import Decimal
+
+import xlsxwriter
+from django.http import FileResponse
+
+TAMANO_BLOQUE = 2000
+
+COLUMNAS_VENTAS = [
+    ('Pedido #', 12),
+    ('Cliente', 30),
+    ('RUT', 15),
+    ('Vendedor', 25),
+    ('Fecha', 20),
+    ('Estado', 15),
+    ('Total', 15),
+]
+
+COLUMNAS_RENTABILIDAD = [
+    ('Fecha Venta', 12),
+    ('Documento', 11),
+    ('Folio', 10),
+    ('Vendedor', 20),
+    ('Cliente', 30),
+    ('Proveedor', 25),
+    ('Producto (SKU)', 30),
+    ('Cantidad', 10),
+    ('Valor Costo (Unit.)', 18),
+    ('Valor Venta (Unit. Neto)', 22),
+    ('Costo Total', 14),
+    ('Venta Total (Neta)', 18),
+    ('Utilidad', 14),
+    ('Margen (%)', 12),
+]
+
+
+COLUMNAS_RESUMEN_VENTAS = [
+    ('Fecha', 12),
+    ('Documento', 11),
+    ('Vendedor', 25),
+    ('Cliente', 30),
+    ('RUT', 15),
+    ('Unidades', 10),
+    ('Devueltas', 10),
+    ('Bruto', 15),
+    ('Notas de Crédito', 16),
+    ('Neto (- NC)', 15),
+]
+
+COLUMNAS_RENTABILIDAD_DIARIA = [
+    ('Fecha Venta', 12),
+    ('Documento', 11),
+    ('Vendedor', 20),
+    ('Cliente', 30),
+    ('Proveedor', 25),
+    ('Producto (SKU)', 30),
+    ('Cantidad', 10),
+    ('Valor Costo (Unit. prom.)', 22),
+    ('Valor Venta (Unit. Neto prom.)', 26),
+    ('Costo Total', 14),
+    ('Venta Total (Neta)', 18),
+    ('Notas de Crédito', 16),
+    ('Utilidad', 14),
+    ('Margen (%)', 12),
+]
+
+
+def _formatear_total(total):
+    return f"${total:,.0f}".replace(",", ".")  # Formato chileno
+
+
+def _estado_venta(estado_pedido, estado_documento):
+    if estado_documento == 'Devuelta':
+        return 'Devuelta'
+    if estado_documento == 'Devuelta Parcial':
+        return 'Parcialmente Devuelta'
+    return estado_pedido
+
+
+def nuevo_libro(destino, titulo, columnas, color):
+    """Crea el libro en modo constant_memory con la fila de encabezados ya escrita."""
+    libro = xlsxwriter.Workbook(destino, {'constant_memory': True, 'in_memory': False})
+    hoja = libro.add_worksheet(titulo)
+    encabezado = libro.add_format({
+        'bold': True, 'font_color': '#FFFFFF', 'font_size': 12,
+        'bg_color': color, 'align': 'center', 'valign': 'vcenter',
+    })
+    for col, (nombre, ancho) in enumerate(columnas):
+        if ancho:
+            hoja.set_column(col, col, ancho)
+        hoja.write(0, col, nombre, encabezado)
+    return libro, hoja
+
+
+def escribir_ventas(pedidos, destino):
+    """Escribe el resumen de ventas (un pedido por fila) en `destino`."""
+    libro, hoja = nuevo_libro(destino, 'Ventas', COLUMNAS_VENTAS, '#4472C4')
+
+    filas = pedidos.values_list(
+        'id', 'cliente__razon_social', 'cliente__rut',
+        'usuario__username', 'usuario__first_name', 'usuario__last_name',
+        'fecha_creacion', 'estado', 'documentoventa__total', 'documentoventa__estado',
+    ).iterator(chunk_size=TAMANO_BLOQUE)
+
+    fila = 0
+    for (pedido_id, razon_social, rut, username, nombre, apellido,
+         fecha, estado, total_doc, estado_doc) in filas:
+        fila += 1
+        vendedor = f"{nombre or ''} {apellido or ''}".strip() or username or ''
+        hoja.write_row(fila, 0, [
+            pedido_id,
+            razon_social,
+            rut,
+            vendedor,
+            fecha.strftime('%d/%m/%Y %H:%M'),
+            _estado_venta(estado, estado_doc),
+            _formatear_total(total_doc or 0),
+        ])
+
+    libro.close()
+    return fila
+
+
+def _vendedor(fila):
+    nombre = f"{fila['vendedor__first_name'] or ''} {fila['vendedor__last_name'] or ''}".strip()
+    return nombre or fila['vendedor__username'] or 'N/A'
+
+
+def _promedio(total, cantidad):
+    return float((total / cantidad).quantize(Decimal('0.01'))) if cantidad else 0.0
+
+
+def escribir_resumen_ventas(filas, destino):
+    """Escribe el resumen de ventas desde los rollups (día, documento, vendedor y cliente por fila)."""
+    libro, hoja = nuevo_libro(destino, 'Ventas', COLUMNAS_RESUMEN_VENTAS, '#4472C4')
+
+    fila = 0
+    for f in filas.iterator(chunk_size=TAMANO_BLOQUE):
+        fila += 1
+        hoja.write_row(fila, 0, [
+            f['fecha'].strftime('%d/%m/%Y'),
+            f['tipo_documento'],
+            _vendedor(f),
+            f['cliente__razon_social'],
+            f['cliente__rut'],
+            f['total_unidades'],
+            f['total_unidades_devueltas'],
+            _formatear_total(f['total_bruto']),
+            _formatear_total(f['total_notas_credito']),
+            _formatear_total(f['monto_neto']),
+        ])
+
+    libro.close()
+    return fila
+
+
+def escribir_rentabilidad_diaria(filas, destino):
+    """Escribe la rentabilidad desde los rollups (día, documento, vendedor, cliente y producto por fila)."""
+    libro, hoja = nuevo_libro(destino, 'Reporte de Rentabilidad', COLUMNAS_RENTABILIDAD_DIARIA, '#1F4E78')
+
+    fila = 0
+    for f in filas.iterator(chunk_size=TAMANO_BLOQUE):
+        fila += 1
+        neto, costo, utilidad = f['total_neto'], f['total_costo'], f['utilidad']
+        margen = (utilidad * 100 / neto).quantize(Decimal('0.01')) if neto > 0 else Decimal('0.00')
+        hoja.write_row(fila, 0, [
+            f['fecha'].strftime('%d/%m/%Y'),
+            f['tipo_documento'],
+            _vendedor(f),
+            f['cliente__razon_social'],
+            f['producto__proveedor__razon_social'] or 'N/A',
+            f['producto__nombre'] or 'Producto eliminado',
+            f['total_unidades'],
+            _promedio(costo, f['total_unidades']),
+            _promedio(neto, f['total_unidades']),
+            float(costo),
+            float(neto),
+            float(f['total_notas_credito']),
+            float(utilidad),
+            f"{margen}%",
+        ])
+
+    libro.close()
+    return fila
+
+
+def escribir_rentabilidad(detalles, destino):
+    """Escribe el reporte de rentabilidad (una línea de documento por fila) en `destino`."""
+    from .rentabilidad import bloques_rentabilidad
+
+    libro, hoja = nuevo_libro(destino, 'Reporte de Rentabilidad', COLUMNAS_RENTABILIDAD, '#1F4E78')
+
+    fila = 0
+    for bloque in bloques_rentabilidad(detalles):
+        columnas = [bloque[c].tolist() for c in bloque.columns]
+        for valores in zip(*columnas):
+            fila += 1
+            hoja.write_row(fila, 0, valores)
+
+    libro.close()
+    return fila
+
+
+def respuesta_xlsx(escribir, filename, *args):
+    """
+    Ejecuta escribir(*args, destino) sobre un archivo temporal y lo envía por
+    bloques. El archivo se elimina cuando FileResponse lo cierra.
+    """
+    archivo = tempfile.TemporaryFile(suffix='.xlsx')
+    escribir(*args, archivo)
+    archivo.seek(0)
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
@@ -1,6 +1,7 @@
 from django import forms
 from .models import Pedido
 from apps.clientes.models import Cliente
+from apps.clientes.forms import ClienteAutocompletar
 from apps.documentos.models import DocumentoVenta
 from datetime import date
 
@@ -68,7 +69,7 @@ class PedidoForm(forms.ModelForm):
         model = Pedido
         fields = ['cliente', 'observaciones']
         widgets = {
-            'cliente': forms.Select(attrs={'class': 'form-control'}),
+            'cliente': ClienteAutocompletar(attrs={'class': 'form-control'}),
             'observaciones': forms.Textarea(attrs={
                 'class': 'form-control',
                 'rows': 3,
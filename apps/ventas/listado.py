@@ -0,0 +1,73 @@
+"""
+Listado de pedidos paginado por cursor (keyset), igual que el catálogo.
+
+Las páginas se recorren por la clave (fecha_creacion, id) descendente en
+lugar de OFFSET, así que la página N cuesta lo mismo que la primera: el
+filtro incluye la cota fecha_creacion <= (o >=) del cursor para que el
+índice por fecha se recorra desde ahí y no desde el inicio. La cantidad de
+items viene anotada desde la base (con_cantidad_items) y el total se cuenta
+sobre la consulta filtrada sin joins ni anotaciones.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+TAMANO_PAGINA = 50
+
+
+def codificar_cursor(pedido):
+    clave = json.dumps([pedido.fecha_creacion.isoformat(), pedido.id])
+    return base64.urlsafe_b64encode(clave.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Retorna (fecha_creacion, id) o None si el cursor no es válido."""
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        fecha, pedido_id = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode())
+        return datetime.fromisoformat(fecha), int(pedido_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+
+def pagina_pedidos(pedidos, despues=None, antes=None, tamano=TAMANO_PAGINA):
+    """
+    Página de `pedidos` (queryset ya filtrado) de más reciente a más antiguo.
+    `despues` avanza desde el cursor y `antes` retrocede hasta él.
+    Retorna (pedidos, cursor_anterior, cursor_siguiente); los cursores son
+    None cuando no hay más páginas en esa dirección.
+    """
+    pedidos = pedidos.select_related('cliente', 'usuario', 'documentoventa').con_cantidad_items()
+
+    clave_antes = decodificar_cursor(antes)
+    clave_despues = None if clave_antes else decodificar_cursor(despues)
+
+    if clave_antes:
+        fecha, pedido_id = clave_antes
+        filas = list(
+            pedidos.filter(Q(fecha_creacion__gt=fecha) | Q(id__gt=pedido_id), fecha_creacion__gte=fecha)
+            .order_by('fecha_creacion', 'id')[:tamano + 1]
+        )
+        if len(filas) > tamano:
+            pagina = filas[:tamano][::-1]
+            return pagina, codificar_cursor(pagina[0]), codificar_cursor(pagina[-1])
+        # Se llegó al inicio: se muestra la primera página completa
+
+    ordenados = pedidos.order_by('-fecha_creacion', '-id')
+    if clave_despues:
+        fecha, pedido_id = clave_despues
+        ordenados = ordenados.filter(Q(fecha_creacion__lt=fecha) | Q(id__lt=pedido_id), fecha_creacion__lte=fecha)
+    filas = list(ordenados[:tamano + 1])
+    pagina = filas[:tamano]
+    anterior = codificar_cursor(pagina[0]) if clave_despues and pagina else None
+    siguiente = codificar_cursor(pagina[-1]) if len(filas) > tamano else None
+    return pagina, anterior, siguiente
+
+
+def total_pedidos(pedidos):
+    """Cantidad de pedidos del filtro: COUNT sin select_related, anotaciones ni orden."""
+    return pedidos.order_by().count()
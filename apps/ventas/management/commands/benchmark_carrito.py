@@ -0,0 +1,101 @@
+import time
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.productos.models import Producto
+from apps.usuarios.models import Usuario
+from apps.ventas import carrito
+from ticashop.benchmark import base_temporal
+
+
+class Command(BaseCommand):
+    help = ('Agrega N productos al carrito y lo muestra: carrito anterior en la sesión (dict en '
+            'request.session["cart"]) contra las líneas de apps/ventas/carrito.py. Consultas, escrituras '
+            'a django_session, bytes de sesión escritos y ms (base temporal).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lineas', type=int, nargs='+', default=[5, 20, 50])
+
+    # ---------- Carrito anterior: el dict completo se vuelve a guardar en la sesión ----------
+
+    def agregar_sesion(self, session_key, producto_id, cantidad):
+        session = SessionStore(session_key)
+        cart = session.get('cart', {})
+        cart[str(producto_id)] = cart.get(str(producto_id), 0) + cantidad
+        session['cart'] = cart
+        session.save()
+        return len(session.encode(session._session))
+
+    def ver_sesion(self, session_key):
+        cart = SessionStore(session_key).get('cart', {})
+        total = 0
+        for producto in Producto.objects.filter(id__in=cart.keys()):
+            total += producto.precio_unitario * cart[str(producto.id)]
+        return total
+
+    # ---------- Medición ----------
+
+    def medir(self, funcion, *args):
+        with CaptureQueriesContext(connection) as q:
+            inicio = time.perf_counter()
+            resultado = funcion(*args)
+            ms = (time.perf_counter() - inicio) * 1000
+        sesion = sum(1 for c in q.captured_queries
+                     if 'django_session' in c['sql'] and not c['sql'].lstrip().upper().startswith('SELECT'))
+        return resultado, len(q), sesion, ms
+
+    def handle(self, *args, **options):
+        with base_temporal():
+            usuario = Usuario.objects.create_user('bench_cliente', password='bench', rol='Cliente')
+            productos = Producto.objects.bulk_create([
+                Producto(codigo=f'BENCH-{i}', nombre=f'Producto {i}', precio_unitario=1190,
+                         costo_unitario=500, stock=10 ** 6)
+                for i in range(max(options['lineas']))
+            ])
+
+            self.stdout.write(
+                f"{'modo':<8} {'líneas':>7} {'cons/agregar':>13} {'escr. sesión':>13} {'bytes sesión':>13} "
+                f"{'ms/agregar':>11} {'cons/ver':>9} {'ms/ver':>7} {'cons/badge':>11}"
+            )
+            for lineas in options['lineas']:
+                # Sesión
+                session = SessionStore()
+                session.create()
+                consultas = escrituras = bytes_sesion = 0
+                ms = 0.0
+                for producto in productos[:lineas]:
+                    tamano, c, e, t = self.medir(self.agregar_sesion, session.session_key, producto.id, 1)
+                    consultas += c
+                    escrituras += e
+                    bytes_sesion += tamano
+                    ms += t
+                _, c_ver, _, ms_ver = self.medir(self.ver_sesion, session.session_key)
+                self.stdout.write(
+                    f"{'sesion':<8} {lineas:>7} {consultas / lineas:>13.1f} {escrituras:>13} {bytes_sesion:>13} "
+                    f"{ms / lineas:>11.2f} {c_ver:>9} {ms_ver:>7.2f} {'-':>11}"
+                )
+
+                # Tabla de líneas
+                carrito.vaciar(usuario)
+                consultas = escrituras = 0
+                ms = 0.0
+                for producto in productos[:lineas]:
+                    _, c, e, t = self.medir(carrito.agregar, usuario, producto.id, 1)
+                    consultas += c
+                    escrituras += e
+                    ms += t
+                _, c_ver, _, ms_ver = self.medir(carrito.contenido, usuario)
+                _, c_badge, _, _ = self.medir(carrito.resumen, usuario)
+                self.stdout.write(
+                    f"{'tabla':<8} {lineas:>7} {consultas / lineas:>13.1f} {escrituras:>13} {0:>13} "
+                    f"{ms / lineas:>11.2f} {c_ver:>9} {ms_ver:>7.2f} {c_badge:>11}"
+                )
+                carrito.vaciar(usuario)
+                Producto.objects.update(stock_reservado=0)
+
+            self.stdout.write('\n"bytes sesión": total escrito en django_session al agregar las líneas (el dict '
+                              'completo en cada cambio). "cons/agregar" en la tabla incluye la reserva del stock; '
+                              '"cons/badge" son las consultas del contador de la barra superior.')
@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from apps.clientes.models import Cliente
+from apps.productos.models import Producto
+from apps.usuarios.models import Usuario
+from apps.ventas.checkout import procesar_checkout
+from apps.ventas.models import LineaCarrito
+from ticashop.benchmark import base_temporal
+
+
+class Command(BaseCommand):
+    help = 'Cuenta consultas y tiempo por checkout según el tamaño del carrito (base temporal).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lineas', type=int, nargs='+', default=[1, 10, 30, 100])
+        parser.add_argument('--repeticiones', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with base_temporal(), override_settings(ALLOWED_HOSTS=['testserver'] + list(settings.ALLOWED_HOSTS)):
+            usuario = Usuario.objects.create_user('bench_cliente', password='bench', rol='Cliente')
+            cliente = Cliente.objects.create(
+                user=usuario, rut='BENCH-1', razon_social='Cliente Benchmark',
+                direccion='Calle 1', email_facturacion='bench@example.com',
+            )
+            maximo = max(options['lineas'])
+            productos = Producto.objects.bulk_create([
+                Producto(codigo=f'BENCH-{i}', nombre=f'Producto {i}', precio_unitario=1190,
+                         costo_unitario=500, stock=10 ** 6)
+                for i in range(maximo)
+            ])
+
+            client = Client()
+            client.force_login(usuario)
+            datos = {
+                'razon_social': cliente.razon_social, 'rut': cliente.rut, 'direccion': cliente.direccion,
+                'email_facturacion': cliente.email_facturacion, 'medio_de_pago': 'Transferencia',
+                'tipo_documento': 'Boleta',
+            }
+
+            self.stdout.write(f"{'líneas':>7} {'consultas servicio':>19} {'ms servicio':>12} {'consultas vista':>16} {'ms vista':>9}")
+            for lineas in options['lineas']:
+                cart = {str(p.id): 2 for p in productos[:lineas]}
+                consultas_servicio = consultas_vista = 0
+                ms_servicio = ms_vista = 0.0
+
+                for _ in range(options['repeticiones']):
+                    with CaptureQueriesContext(connection) as q:
+                        inicio = time.perf_counter()
+                        procesar_checkout(cliente, usuario, cart, 'Boleta', 'Transferencia')
+                        ms_servicio += (time.perf_counter() - inicio) * 1000
+                    consultas_servicio = len(q)
+
+                    LineaCarrito.objects.bulk_create([
+                        LineaCarrito(usuario=usuario, producto_id=int(pid), cantidad=cantidad)
+                        for pid, cantidad in cart.items()
+                    ])
+                    with CaptureQueriesContext(connection) as q:
+                        inicio = time.perf_counter()
+                        respuesta = client.post('/ventas/cliente/checkout/', datos)
+                        ms_vista += (time.perf_counter() - inicio) * 1000
+                    consultas_vista = len(q)
+                    if respuesta.status_code != 302:
+                        self.stdout.write(self.style.WARNING(f"  checkout respondió {respuesta.status_code}"))
+
+                n = options['repeticiones']
+                self.stdout.write(
+                    f"{lineas:>7} {consultas_servicio:>19} {ms_servicio / n:>12.1f} "
+                    f"{consultas_vista:>16} {ms_vista / n:>9.1f}"
+                )
@@ -0,0 +1,126 @@
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import OperationalError, connection, connections
+from django.db.backends.signals import connection_created
+
+from apps.clientes.models import Cliente
+from apps.productos.models import Producto
+from apps.usuarios.models import Usuario
+from apps.ventas.checkout import procesar_checkout
+from apps.ventas.models import Pedido
+from ticashop import base_datos
+from ticashop.benchmark import base_temporal, ejecutar_concurrente, percentil
+
+# Configuración anterior (sin CONN_MAX_AGE, journal por defecto, BEGIN diferido) contra el perfil actual
+PERFILES = {
+    'antes': {'CONN_MAX_AGE': 0, 'OPTIONS': {'timeout': 5, 'init_command': 'PRAGMA journal_mode=DELETE'}},
+    'despues': {'CONN_MAX_AGE': 60, 'OPTIONS': base_datos.opciones_sqlite()},
+}
+
+
+class Command(BaseCommand):
+    help = ('Simula requests concurrentes (lecturas del catálogo y checkouts) contra SQLite con la configuración '
+            'anterior y con el perfil de ticashop/base_datos.py: throughput, latencias, errores "database is '
+            'locked" y conexiones abiertas (base temporal).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, nargs='+', default=[4, 16])
+        parser.add_argument('--requests', type=int, default=100, help='Requests por hilo')
+        parser.add_argument('--escrituras', type=float, default=0.2, help='Fracción de requests que son checkouts')
+        parser.add_argument('--perfiles', nargs='+', choices=list(PERFILES), default=list(PERFILES))
+
+    def preparar(self):
+        usuario = Usuario.objects.create_user('bench_cliente', password='bench', rol='Cliente')
+        cliente = Cliente.objects.create(user=usuario, rut='BENCH1', razon_social='Cliente Benchmark',
+                                         direccion='Calle 1', email_facturacion='bench@example.com')
+        productos = Producto.objects.bulk_create([
+            Producto(codigo=f'BENCH-{i}', nombre=f'Producto {i}', precio_unitario=1190,
+                     costo_unitario=500, stock=10 ** 7)
+            for i in range(500)
+        ])
+        return usuario, cliente, [p.id for p in productos]
+
+    def usar_perfil(self, nombre):
+        """Cambia la configuración de la conexión (compartida por todos los hilos) y cierra las abiertas."""
+        connections.close_all()
+        perfil = PERFILES[nombre]
+        connection.settings_dict['CONN_MAX_AGE'] = perfil['CONN_MAX_AGE']
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = perfil['CONN_MAX_AGE'] > 0
+        connection.settings_dict['OPTIONS'] = dict(perfil['OPTIONS'])
+
+    def correr(self, hilos, usuario, cliente, producto_ids, options):
+        abiertas = []
+        lecturas, escrituras, bloqueos = [], [], []
+        lock = threading.Lock()
+
+        def contar_conexion(sender, connection, **kwargs):
+            with lock:
+                abiertas.append(1)
+
+        def trabajo(indice):
+            azar = random.Random(indice)
+            for _ in range(options['requests']):
+                escribe = azar.random() < options['escrituras']
+                request_started.send(sender=self.__class__)
+                inicio = time.perf_counter()
+                try:
+                    if escribe:
+                        cart = {str(pid): 1 for pid in azar.sample(producto_ids, 3)}
+                        procesar_checkout(cliente, usuario, cart, 'Boleta', 'Transferencia')
+                    else:
+                        list(Producto.objects.filter(activo=True).order_by('nombre')[:50])
+                        Pedido.objects.filter(cliente=cliente).count()
+                    ms = (time.perf_counter() - inicio) * 1000
+                    with lock:
+                        (escrituras if escribe else lecturas).append(ms)
+                except OperationalError as e:
+                    with lock:
+                        bloqueos.append(str(e))
+                finally:
+                    request_finished.send(sender=self.__class__)
+
+        connection_created.connect(contar_conexion)
+        try:
+            segundos, _, errores = ejecutar_concurrente(trabajo, hilos)
+        finally:
+            connection_created.disconnect(contar_conexion)
+        return segundos, lecturas, escrituras, bloqueos, errores, len(abiertas)
+
+    def handle(self, *args, **options):
+        with base_temporal():
+            if connection.vendor != 'sqlite':
+                raise CommandError('El benchmark compara configuraciones de SQLite.')
+            usuario, cliente, producto_ids = self.preparar()
+            opciones_originales = connection.settings_dict['OPTIONS']
+            conn_max_age = connection.settings_dict['CONN_MAX_AGE']
+
+            self.stdout.write(
+                f"{'perfil':<8} {'hilos':>5} {'req/s':>8} {'ok':>6} {'locked':>7} "
+                f"{'p50 lect':>9} {'p95 lect':>9} {'p50 escr':>9} {'p95 escr':>9} {'conexiones':>11}"
+            )
+            try:
+                for nombre in options['perfiles']:
+                    for hilos in options['hilos']:
+                        self.usar_perfil(nombre)
+                        segundos, lecturas, escrituras, bloqueos, errores, abiertas = self.correr(
+                            hilos, usuario, cliente, producto_ids, options
+                        )
+                        ok = len(lecturas) + len(escrituras)
+                        self.stdout.write(
+                            f"{nombre:<8} {hilos:>5} {ok / segundos:>8.1f} {ok:>6} {len(bloqueos):>7} "
+                            f"{percentil(lecturas, 50) or 0:>9.1f} {percentil(lecturas, 95) or 0:>9.1f} "
+                            f"{percentil(escrituras, 50) or 0:>9.1f} {percentil(escrituras, 95) or 0:>9.1f} "
+                            f"{abiertas:>11}"
+                        )
+                        for e in (bloqueos[:1] + [f'{type(e).__name__}: {e}' for e in errores[:3]]):
+                            self.stdout.write(self.style.WARNING(f"  {e}"))
+            finally:
+                connections.close_all()
+                connection.settings_dict['OPTIONS'] = opciones_originales
+                connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+            self.stdout.write('\nLatencias en ms por request. "locked" son requests que fallaron con '
+                              '"database is locked"; "conexiones" cuenta las conexiones abiertas en la corrida.')
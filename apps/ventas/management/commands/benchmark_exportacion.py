@@ -0,0 +1,61 @@
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from apps.clientes.models import Cliente
+from apps.documentos.models import DocumentoVenta
+from apps.usuarios.models import Usuario
+from apps.ventas.exportacion import escribir_ventas
+from apps.ventas.models import Pedido
+from ticashop.benchmark import base_temporal
+
+
+class Command(BaseCommand):
+    help = 'Mide memoria pico y tiempo de la exportación de ventas a Excel por cantidad de filas (base temporal).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--lote', type=int, default=10_000, help='Filas por bulk_create al generar datos')
+
+    def generar(self, desde, hasta, cliente, vendedor, lote):
+        for inicio in range(desde, hasta, lote):
+            fin = min(inicio + lote, hasta)
+            pedidos = Pedido.objects.bulk_create([
+                Pedido(cliente=cliente, usuario=vendedor, estado='Enviado', total=1190)
+                for _ in range(inicio, fin)
+            ])
+            DocumentoVenta.objects.bulk_create([
+                DocumentoVenta(pedido=p, cliente=cliente, vendedor=vendedor, tipo_documento='Boleta',
+                               folio=1000 + inicio + i, neto=1000, iva=190, total=1190, estado='Pagada')
+                for i, p in enumerate(pedidos)
+            ])
+
+    def handle(self, *args, **options):
+        with base_temporal():
+            vendedor = Usuario.objects.create_user('bench_vendedor', rol='Vendedor', first_name='Bench')
+            cliente = Cliente.objects.create(rut='BENCH-1', razon_social='Cliente Benchmark')
+
+            self.stdout.write(f"{'filas':>10} {'segundos':>9} {'pico Python (MB)':>17} {'RSS máx. proceso (MB)':>22} {'archivo (MB)':>13}")
+            generadas = 0
+            for filas in sorted(options['filas']):
+                self.generar(generadas, filas, cliente, vendedor, options['lote'])
+                generadas = filas
+
+                pedidos = Pedido.objects.filter(estado='Enviado').order_by('-fecha_creacion')
+                with tempfile.TemporaryFile() as destino:
+                    tracemalloc.start()
+                    inicio = time.perf_counter()
+                    escritas = escribir_ventas(pedidos, destino)
+                    segundos = time.perf_counter() - inicio
+                    _, pico = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    tamano = destino.seek(0, 2)
+
+                # ru_maxrss viene en KB en Linux
+                rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                self.stdout.write(
+                    f"{escritas:>10} {segundos:>9.1f} {pico / 2 ** 20:>17.1f} {rss:>22.1f} {tamano / 2 ** 20:>13.1f}"
+                )
@@ -0,0 +1,235 @@
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from apps.clientes.models import Cliente
+from apps.documentos.models import DocumentoVenta
+from apps.productos.models import Producto
+from apps.usuarios.models import Usuario
+from apps.ventas import carrito, listado, ventas_diarias
+from apps.ventas.models import Pedido
+from ticashop.benchmark import base_temporal, percentil
+from ticashop.datos_sinteticos import VOLUMENES, GeneradorDatos
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Siembra una base temporal con datos sintéticos y recorre las vistas principales con el cliente de '
+            'pruebas: percentiles de latencia, consultas y memoria pico por vista, en JSON comparable entre corridas.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', choices=list(VOLUMENES), default='pequeno')
+        parser.add_argument('--pedidos', type=int, help='Reemplaza la cantidad de pedidos de la escala')
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--solo', nargs='+', help='Nombres de escenarios a correr')
+        parser.add_argument('--salida', help='Archivo JSON de resultados (por defecto se imprime)')
+        parser.add_argument('--comparar', help='JSON de una corrida anterior para mostrar diferencias')
+        parser.add_argument('--sin-memoria', action='store_true', help='Omite la pasada con tracemalloc')
+
+    # ---------- Escenarios ----------
+
+    def preparar(self):
+        """
+        Elige usuarios representativos y arma los escenarios (nombre, cliente http, método, url, datos,
+        antes, esperado). `esperado` es el código HTTP o la URL a la que debe redirigir.
+        """
+        admin = Usuario.objects.filter(rol='Administrador').first()
+        tesoreria = Usuario.objects.filter(rol='Tesoreria').first()
+        vendedor = Pedido.objects.filter(usuario__rol='Vendedor').values_list('usuario', flat=True).first()
+        vendedor = Usuario.objects.get(pk=vendedor)
+        perfil = Cliente.objects.filter(user__isnull=False).select_related('user').first()
+        if not all([admin, tesoreria, vendedor, perfil]):
+            raise CommandError('Los datos generados no tienen todos los roles necesarios; aumenta --escala.')
+
+        clientes_http = {}
+        for nombre, usuario in [('admin', admin), ('tesoreria', tesoreria), ('vendedor', vendedor),
+                                ('cliente', perfil.user)]:
+            clientes_http[nombre] = Client()
+            clientes_http[nombre].force_login(usuario)
+
+        productos = list(Producto.objects.filter(activo=True, stock__gte=1_000).values_list('id', flat=True)[:5])
+        pedido = Pedido.objects.filter(detalles__isnull=False).order_by('-fecha_creacion').first()
+        documento = DocumentoVenta.objects.filter(tipo_documento='Factura').order_by('-fecha_emision').first()
+        # Cursor cerca del final del listado, para comparar una página profunda con la primera
+        antiguo = Pedido.objects.order_by('fecha_creacion', 'id')[min(100, Pedido.objects.count() - 1)]
+        pagina_profunda = {'despues': listado.codificar_cursor(antiguo)}
+        hoy = timezone.localdate()
+        ultimo_mes = {'fecha_desde': str(hoy - timedelta(days=30)), 'fecha_hasta': str(hoy)}
+
+        def con_carrito():
+            # Las líneas del carrito (apps/ventas/carrito.py), con su reserva; el checkout las vacía
+            actuales = carrito.cantidades(perfil.user)
+            for pid in productos[:3]:
+                if pid not in actuales:
+                    carrito.agregar(perfil.user, pid, 1)
+
+        datos_checkout = {
+            'razon_social': perfil.razon_social, 'rut': perfil.rut, 'direccion': perfil.direccion or 'Calle 1',
+            'email_facturacion': perfil.email_facturacion or 'bench@example.com',
+            'medio_de_pago': 'Transferencia', 'tipo_documento': 'Boleta',
+        }
+        return [
+            ('dashboard_admin', 'admin', 'get', '/usuarios/dashboard/', None, None, 200),
+            ('dashboard_vendedor', 'vendedor', 'get', '/usuarios/dashboard/', None, None, 200),
+            ('dashboard_tesoreria', 'tesoreria', 'get', '/usuarios/dashboard/', None, None, 200),
+            ('tienda_cliente', 'cliente', 'get', '/usuarios/dashboard/', None, None, 200),
+            ('carrito_agregar', 'cliente', 'post', f'/ventas/cliente/cart/add/{productos[0]}/', {'quantity': 1}, None,
+             '/usuarios/dashboard/'),
+            ('carrito_ver', 'cliente', 'get', '/ventas/cliente/cart/', None, con_carrito, 200),
+            ('checkout', 'cliente', 'post', '/ventas/cliente/checkout/', datos_checkout, con_carrito,
+             '/usuarios/dashboard/'),
+            ('listar_pedidos', 'admin', 'get', '/ventas/pedidos/', None, None, 200),
+            ('listar_pedidos_profundo', 'admin', 'get', '/ventas/pedidos/', pagina_profunda, None, 200),
+            ('detalle_pedido', 'admin', 'get', f'/ventas/pedidos/{pedido.id}/', None, None, 200),
+            ('listar_documentos', 'admin', 'get', '/documentos/', None, None, 200),
+            ('detalle_documento', 'admin', 'get', f'/documentos/documento/{documento.id}/', None, None, 200),
+            ('estadisticas_ventas', 'admin', 'get', '/ventas/estadisticas/', None, None, 200),
+            ('estadisticas_ventas_mes', 'admin', 'get', '/ventas/estadisticas/', ultimo_mes, None, 200),
+            ('exportar_ventas_excel', 'admin', 'get', '/ventas/exportar-excel/', None, None, 200),
+            ('exportar_rentabilidad', 'admin', 'get', '/ventas/exportar/rentabilidad/', None, None, 200),
+        ], clientes_http
+
+    def ejecutar(self, nombre, cliente_http, metodo, url, datos, esperado):
+        respuesta = getattr(cliente_http, metodo)(url, datos or {})
+        if getattr(respuesta, 'streaming', False):
+            for _ in respuesta.streaming_content:
+                pass
+        respuesta.close()
+        # Una respuesta distinta (p. ej. el checkout redirigiendo al carrito vacío) mediría otra cosa
+        if isinstance(esperado, int):
+            correcta = respuesta.status_code == esperado
+        else:
+            correcta = respuesta.status_code == 302 and respuesta.url == esperado
+        if not correcta:
+            raise CommandError(f"{nombre}: {url} respondió {respuesta.status_code} "
+                               f"{getattr(respuesta, 'url', '')} en vez de {esperado}")
+        return respuesta.status_code
+
+    def medir(self, escenario, clientes_http, repeticiones, memoria):
+        nombre, quien, metodo, url, datos, antes, esperado = escenario
+        cliente_http = clientes_http[quien]
+        if antes:
+            antes()
+        self.ejecutar(nombre, cliente_http, metodo, url, datos, esperado)  # calentamiento (plantillas, caché)
+
+        tiempos, consultas, estados = [], [], set()
+        for _ in range(repeticiones):
+            # La preparación (p. ej. llenar el carrito) queda fuera de la medición
+            if antes:
+                antes()
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                estados.add(self.ejecutar(nombre, cliente_http, metodo, url, datos, esperado))
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            consultas.append(len(capturadas))
+
+        resultado = {
+            'url': url,
+            'repeticiones': repeticiones,
+            'estados_http': sorted(estados),
+            **{f'p{p}_ms': round(percentil(tiempos, p), 2) for p in PERCENTILES},
+            'max_ms': round(max(tiempos), 2),
+            'consultas_min': min(consultas),
+            'consultas_max': max(consultas),
+        }
+        if memoria:
+            if antes:
+                antes()
+            tracemalloc.start()
+            self.ejecutar(nombre, cliente_http, metodo, url, datos, esperado)
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            resultado['pico_memoria_mb'] = round(pico / 2 ** 20, 2)
+        return resultado
+
+    # ---------- Comparación ----------
+
+    def comparar(self, anterior, actual):
+        self.stdout.write(f"\n{'escenario':<26} {'p95 antes':>10} {'p95 ahora':>10} {'Δ%':>7} "
+                          f"{'consultas':>13} {'memoria MB':>15}")
+        for nombre, ahora in actual['escenarios'].items():
+            antes = anterior.get('escenarios', {}).get(nombre)
+            if not antes:
+                self.stdout.write(f"{nombre:<26} {'(nuevo)':>10} {ahora['p95_ms']:>10.1f}")
+                continue
+            delta = (ahora['p95_ms'] - antes['p95_ms']) / antes['p95_ms'] * 100 if antes['p95_ms'] else 0
+            consultas = f"{antes['consultas_max']}→{ahora['consultas_max']}"
+            memoria = f"{antes.get('pico_memoria_mb', '-')}→{ahora.get('pico_memoria_mb', '-')}"
+            linea = f"{nombre:<26} {antes['p95_ms']:>10.1f} {ahora['p95_ms']:>10.1f} {delta:>+6.0f}% {consultas:>13} {memoria:>15}"
+            empeora = delta > 20 or ahora['consultas_max'] > antes['consultas_max']
+            self.stdout.write(self.style.WARNING(linea) if empeora else linea)
+
+    def handle(self, *args, **options):
+        volumenes = dict(VOLUMENES[options['escala']])
+        if options['pedidos'] is not None:
+            volumenes['pedidos'] = options['pedidos']
+
+        hosts = ['testserver'] + list(settings.ALLOWED_HOSTS)
+        # La instrumentación por request se apaga para medir solo las vistas
+        sin_instrumentacion = {**getattr(settings, 'INSTRUMENTACION', {}), 'ACTIVA': False}
+        with base_temporal(), override_settings(ALLOWED_HOSTS=hosts, INSTRUMENTACION=sin_instrumentacion):
+            inicio = time.perf_counter()
+            conteos = GeneradorDatos(semilla=options['semilla']).generar(**volumenes)
+            rango = ventas_diarias.rango_completo()
+            if rango:
+                ventas_diarias.refrescar_rango(*rango)
+            self.stderr.write(f"Datos generados en {time.perf_counter() - inicio:.1f} s: {conteos}")
+
+            escenarios, clientes_http = self.preparar()
+            if options['solo']:
+                escenarios = [e for e in escenarios if e[0] in options['solo']]
+
+            resultados = {}
+            for escenario in escenarios:
+                resultados[escenario[0]] = self.medir(
+                    escenario, clientes_http, options['repeticiones'], not options['sin_memoria']
+                )
+                r = resultados[escenario[0]]
+                self.stderr.write(f"  {escenario[0]:<26} p50 {r['p50_ms']:>8.1f} ms  p95 {r['p95_ms']:>8.1f} ms  "
+                                  f"consultas {r['consultas_max']:>4}  http {r['estados_http']}")
+
+        informe = {
+            'meta': {
+                'fecha': timezone.now().isoformat(timespec='seconds'),
+                'commit': _commit_actual(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'base_de_datos': connection.vendor,
+                'escala': options['escala'],
+                'semilla': options['semilla'],
+            },
+            'volumenes': conteos,
+            'escenarios': resultados,
+        }
+        texto = json.dumps(informe, indent=2, ensure_ascii=False, sort_keys=True)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(texto + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Resultados en {options['salida']}"))
+        else:
+            self.stdout.write(texto)
+
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                self.comparar(json.load(archivo), informe)
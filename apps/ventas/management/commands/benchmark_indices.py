@@ -0,0 +1,162 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from apps.clientes.models import Cliente
+from apps.documentos.models import DocumentoVenta
+from apps.productos.models import Producto
+from apps.usuarios.models import Usuario
+from apps.ventas.models import Pedido
+from ticashop.autocompletar import rango_prefijo
+from ticashop.benchmark import base_temporal
+from ticashop.fechas import rango_dias
+
+MODELOS_INDEXADOS = [Pedido, DocumentoVenta, Producto]
+PENDIENTES = ['Emitida', 'Pago Parcial']
+
+
+def consultas(hoy, vendedor):
+    """(nombre, consulta anterior, consulta actual): cada una es un callable que evalúa el queryset."""
+    desde, hasta = hoy - timedelta(days=30), hoy
+    return [
+        ('pedidos de hoy',
+         lambda: Pedido.objects.filter(fecha_creacion__date=hoy),
+         lambda: Pedido.objects.filter(**rango_dias('fecha_creacion', hoy, hoy))),
+        ('pedidos de hoy (vendedor)',
+         lambda: Pedido.objects.filter(usuario=vendedor, fecha_creacion__date=hoy),
+         lambda: Pedido.objects.filter(usuario=vendedor, **rango_dias('fecha_creacion', hoy, hoy))),
+        ('estadísticas 30 días',
+         lambda: Pedido.objects.filter(estado='Enviado', fecha_creacion__date__gte=desde,
+                                       fecha_creacion__date__lte=hasta).order_by('-fecha_creacion')[:50],
+         lambda: Pedido.objects.filter(estado='Enviado', **rango_dias('fecha_creacion', desde, hasta))
+                               .order_by('-fecha_creacion')[:50]),
+        ('facturas vencidas',
+         lambda: DocumentoVenta.objects.filter(estado__in=PENDIENTES, fecha_vencimiento__lt=hoy),
+         lambda: DocumentoVenta.objects.filter(estado__in=PENDIENTES, fecha_vencimiento__lt=hoy)),
+        ('facturas por vencer',
+         lambda: DocumentoVenta.objects.filter(estado__in=PENDIENTES,
+                                               fecha_vencimiento__range=[hoy, hoy + timedelta(days=7)]),
+         lambda: DocumentoVenta.objects.filter(estado__in=PENDIENTES,
+                                               fecha_vencimiento__range=[hoy, hoy + timedelta(days=7)])),
+        ('listar facturas',
+         lambda: DocumentoVenta.objects.filter(tipo_documento='Factura').order_by('-fecha_emision')[:50],
+         lambda: DocumentoVenta.objects.filter(tipo_documento='Factura').order_by('-fecha_emision')[:50]),
+        ('catálogo (página)',
+         lambda: Producto.objects.filter(activo=True).order_by('nombre', 'id')[:25],
+         lambda: Producto.objects.filter(activo=True).order_by('nombre', 'id')[:25]),
+        ('stock bajo',
+         lambda: Producto.objects.filter(stock__lte=F('stock_minimo'), activo=True).order_by('stock')[:10],
+         lambda: Producto.objects.filter(stock__lte=F('stock_minimo'), activo=True).order_by('stock')[:10]),
+        # Antes el formulario de pedido cargaba todos los productos activos en un <select>
+        ('autocompletar producto',
+         lambda: Producto.objects.filter(activo=True).order_by('nombre'),
+         lambda: Producto.objects.filter(activo=True).filter(**rango_prefijo('nombre_busqueda', 'producto 12'))
+                                 .order_by('nombre_busqueda')[:10]),
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Compara tiempos y planes de las consultas frecuentes sin los índices nuevos (y con filtros __date) '
+            'contra los índices y filtros por rango actuales, sobre una base temporal con datos generados.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pedidos', type=int, default=200_000)
+        parser.add_argument('--productos', type=int, default=50_000)
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--planes', action='store_true', help='Muestra el plan completo de cada consulta')
+
+    def generar(self, pedidos, productos, lote=10_000):
+        azar = random.Random(7)
+        vendedores = [Usuario.objects.create_user(f'bench_vendedor_{i}', rol='Vendedor') for i in range(20)]
+        cliente = Cliente.objects.create(rut='BENCH-1', razon_social='Cliente Benchmark')
+
+        for inicio in range(0, productos, lote):
+            Producto.objects.bulk_create([
+                Producto(codigo=f'BENCH-{i}', nombre=f'Producto {azar.randint(0, 10 ** 6):07d}',
+                         precio_unitario=1190, costo_unitario=500,
+                         stock=azar.randint(0, 500), stock_minimo=azar.choice([0] * 9 + [20]),
+                         activo=azar.random() < 0.8)
+                for i in range(inicio, min(inicio + lote, productos))
+            ])
+
+        ahora = timezone.now()
+        estados_pedido = ['Enviado'] * 6 + ['Pendiente', 'Completado', 'Cancelado']
+        estados_doc = ['Pagada'] * 17 + ['Emitida', 'Pago Parcial', 'Anulada']
+        for inicio in range(0, pedidos, lote):
+            fin = min(inicio + lote, pedidos)
+            creados = Pedido.objects.bulk_create([
+                Pedido(cliente=cliente, usuario=azar.choice(vendedores), estado=azar.choice(estados_pedido), total=0)
+                for _ in range(inicio, fin)
+            ])
+            # auto_now_add no deja fijar la fecha al crear: se reparte en dos años con un UPDATE por lote
+            fechas = {p.pk: ahora - timedelta(minutes=azar.randint(0, 2 * 365 * 24 * 60)) for p in creados}
+            for p in creados:
+                p.fecha_creacion = fechas[p.pk]
+            Pedido.objects.bulk_update(creados, ['fecha_creacion'], batch_size=1000)
+            DocumentoVenta.objects.bulk_create([
+                DocumentoVenta(pedido=p, cliente=cliente, vendedor=p.usuario,
+                               tipo_documento='Factura' if i % 4 == 0 else 'Boleta', folio=1000 + inicio + i,
+                               neto=0, iva=0, total=0, estado=azar.choice(estados_doc),
+                               fecha_emision=fechas[p.pk],
+                               fecha_vencimiento=(fechas[p.pk] + timedelta(days=30)).date())
+                for i, p in enumerate(creados)
+            ])
+        return vendedores[0]
+
+    def indices(self):
+        return [(modelo, indice) for modelo in MODELOS_INDEXADOS for indice in modelo._meta.indexes]
+
+    def analizar(self):
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def medir(self, consulta, repeticiones):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            list(consulta())
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tiempos)
+
+    def plan(self, consulta):
+        plan = consulta().explain()
+        if self.opciones['planes']:
+            return plan
+        return ' | '.join(linea.strip() for linea in plan.splitlines() if linea.strip())[:110]
+
+    def handle(self, *args, **options):
+        self.opciones = options
+        with base_temporal():
+            self.stdout.write(f"Generando {options['pedidos']} pedidos y {options['productos']} productos...")
+            vendedor = self.generar(options['pedidos'], options['productos'])
+            hoy = timezone.localdate()
+            lista = consultas(hoy, vendedor)
+            indices = self.indices()
+
+            with connection.schema_editor() as editor:
+                for modelo, indice in indices:
+                    editor.remove_index(modelo, indice)
+            self.analizar()
+            antes = [(self.medir(anterior, options['repeticiones']), self.plan(anterior)) for _, anterior, _ in lista]
+
+            with connection.schema_editor() as editor:
+                for modelo, indice in indices:
+                    editor.add_index(modelo, indice)
+            self.analizar()
+            despues = [(self.medir(actual, options['repeticiones']), self.plan(actual)) for _, _, actual in lista]
+
+            self.stdout.write(f"\n{'consulta':<28} {'antes (ms)':>11} {'después (ms)':>13} {'mejora':>8}")
+            for (nombre, _, _), (ms_antes, _), (ms_despues, _) in zip(lista, antes, despues):
+                mejora = ms_antes / ms_despues if ms_despues else float('inf')
+                self.stdout.write(f"{nombre:<28} {ms_antes:>11.2f} {ms_despues:>13.2f} {mejora:>7.1f}x")
+
+            self.stdout.write('\nPlanes:')
+            for (nombre, _, _), (_, plan_antes), (_, plan_despues) in zip(lista, antes, despues):
+                self.stdout.write(f"{nombre}\n  antes:   {plan_antes}\n  después: {plan_despues}")
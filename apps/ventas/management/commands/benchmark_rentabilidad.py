@@ -0,0 +1,176 @@
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from openpyxl import Workbook
+
+from apps.clientes.models import Cliente, Proveedor
+from apps.documentos.models import DocumentoVenta, DetalleDocumento
+from apps.productos.models import Producto
+from apps.usuarios.models import Usuario
+from apps.ventas.exportacion import escribir_rentabilidad
+from apps.ventas.models import Pedido
+from apps.ventas.rentabilidad import bloques_rentabilidad
+from ticashop.benchmark import base_temporal
+
+LINEAS_POR_DOCUMENTO = 5
+
+
+def filas_anteriores(detalles):
+    """Cálculo fila a fila con Decimal, tal como lo hacía la vista antes del motor columnar."""
+    detalles = detalles.select_related(
+        'documento__vendedor', 'documento__cliente', 'producto', 'producto__proveedor'
+    )
+    for detalle in detalles.iterator(chunk_size=2000):
+        documento = detalle.documento
+        producto = detalle.producto
+        cantidad = detalle.cantidad
+        precio_venta_neto_unit = (detalle.precio_unitario_venta / Decimal('1.19')).quantize(Decimal('0.00'))
+        costo_unit = detalle.costo_unitario_venta or producto.costo_unitario or Decimal('0')
+        costo_total_linea = costo_unit * cantidad
+        venta_neta_total_linea = precio_venta_neto_unit * cantidad
+        utilidad_linea = venta_neta_total_linea - costo_total_linea
+        margen_linea = 0
+        if venta_neta_total_linea > 0:
+            margen_linea = (utilidad_linea / venta_neta_total_linea) * 100
+        yield [
+            documento.fecha_emision.strftime('%d/%m/%Y'),
+            documento.tipo_documento,
+            documento.folio,
+            documento.vendedor.username if documento.vendedor else 'N/A',
+            documento.cliente.razon_social,
+            producto.proveedor.razon_social if producto.proveedor else 'N/A',
+            producto.nombre,
+            cantidad,
+            costo_unit,
+            precio_venta_neto_unit,
+            costo_total_linea,
+            venta_neta_total_linea,
+            utilidad_linea,
+            f"{margen_linea:.2f}%",
+        ]
+
+
+def escribir_anterior(detalles, destino):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Reporte de Rentabilidad"
+    filas = 0
+    for fila in filas_anteriores(detalles):
+        ws.append(fila)
+        filas += 1
+    wb.save(destino)
+    return filas
+
+
+class Command(BaseCommand):
+    help = ('Compara el reporte de rentabilidad fila a fila (Decimal + openpyxl) con el motor '
+            'columnar (NumPy/pandas + xlsxwriter): paridad de valores, tiempo y memoria (base temporal).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lineas', type=int, default=500_000)
+        parser.add_argument('--lote', type=int, default=10_000, help='Filas por bulk_create al generar datos')
+        parser.add_argument('--sin-anterior', action='store_true',
+                            help='No mide la versión anterior (solo paridad sobre una muestra y tiempo nuevo)')
+        parser.add_argument('--memoria', action='store_true',
+                            help='Repite cada exportación bajo tracemalloc para medir el pico de memoria (más lento)')
+
+    def generar(self, lineas, lote):
+        azar = random.Random(42)
+        vendedor = Usuario.objects.create_user('bench_vendedor', rol='Vendedor')
+        cliente = Cliente.objects.create(rut='BENCH-1', razon_social='Cliente Benchmark')
+        proveedor = Proveedor.objects.create(rut='BENCH-P', razon_social='Proveedor Benchmark')
+        productos = Producto.objects.bulk_create([
+            Producto(codigo=f'BENCH-{i}', nombre=f'Producto {i}',
+                     precio_unitario=Decimal(azar.randint(100, 10 ** 7)) / 100,
+                     costo_unitario=Decimal(azar.randint(0, 10 ** 6)) / 100,
+                     proveedor=proveedor if i % 3 else None)
+            for i in range(500)
+        ])
+
+        ahora = timezone.now()
+        documentos = lineas // LINEAS_POR_DOCUMENTO
+        for inicio in range(0, documentos, lote):
+            fin = min(inicio + lote, documentos)
+            pedidos = Pedido.objects.bulk_create([
+                Pedido(cliente=cliente, usuario=vendedor, estado='Enviado', total=0)
+                for _ in range(inicio, fin)
+            ])
+            docs = DocumentoVenta.objects.bulk_create([
+                DocumentoVenta(pedido=p, cliente=cliente, vendedor=vendedor if i % 7 else None,
+                               tipo_documento='Boleta', folio=1000 + inicio + i, neto=0, iva=0, total=0,
+                               estado='Pagada', fecha_emision=ahora - timedelta(minutes=inicio + i))
+                for i, p in enumerate(pedidos)
+            ])
+            detalles = []
+            for doc in docs:
+                for _ in range(LINEAS_POR_DOCUMENTO):
+                    producto = azar.choice(productos)
+                    precio = Decimal(azar.randint(1, 10 ** 7)) / 100
+                    cantidad = azar.randint(1, 20)
+                    costo = azar.choice([None, Decimal('0'), Decimal(azar.randint(1, 10 ** 7)) / 100])
+                    detalles.append(DetalleDocumento(
+                        documento=doc, producto=producto, cantidad=cantidad,
+                        precio_unitario_venta=precio, subtotal=precio * cantidad,
+                        costo_unitario_venta=costo,
+                    ))
+            DetalleDocumento.objects.bulk_create(detalles, batch_size=5000)
+
+    def comparar(self, detalles, limite=None):
+        """Compara valor a valor (los montos Decimal contra los float que escribe el motor)."""
+        anteriores = filas_anteriores(detalles)
+        revisadas = diferencias = 0
+        for bloque in bloques_rentabilidad(detalles):
+            for nueva in zip(*[bloque[c].tolist() for c in bloque.columns]):
+                anterior = next(anteriores)
+                esperado = [float(v) if isinstance(v, Decimal) else v for v in anterior]
+                if list(nueva) != esperado:
+                    diferencias += 1
+                    if diferencias <= 5:
+                        self.stdout.write(self.style.ERROR(f"  diferencia: {anterior} != {list(nueva)}"))
+                revisadas += 1
+                if limite and revisadas >= limite:
+                    return revisadas, diferencias
+        return revisadas, diferencias
+
+    def medir(self, escribir, detalles, memoria):
+        with tempfile.TemporaryFile() as destino:
+            inicio = time.perf_counter()
+            filas = escribir(detalles, destino)
+            segundos = time.perf_counter() - inicio
+        if not memoria:
+            return filas, segundos, None
+
+        # tracemalloc ralentiza mucho la ejecución: el pico se mide en una pasada aparte
+        with tempfile.TemporaryFile() as destino:
+            tracemalloc.start()
+            escribir(detalles, destino)
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return filas, segundos, pico / 2 ** 20
+
+    def handle(self, *args, **options):
+        with base_temporal():
+            self.stdout.write(f"Generando {options['lineas']} líneas...")
+            self.generar(options['lineas'], options['lote'])
+            detalles = (DetalleDocumento.objects.filter(documento__pedido__estado='Enviado')
+                        .order_by('-documento__fecha_emision', 'id'))
+
+            limite = 50_000 if options['sin_anterior'] else None
+            revisadas, diferencias = self.comparar(detalles, limite)
+            estilo = self.style.SUCCESS if not diferencias else self.style.ERROR
+            self.stdout.write(estilo(f"Paridad: {revisadas} filas revisadas, {diferencias} diferencias."))
+
+            self.stdout.write(f"{'versión':>10} {'filas':>9} {'segundos':>9} {'pico Python (MB)':>17}")
+            versiones = [('columnar', escribir_rentabilidad)]
+            if not options['sin_anterior']:
+                versiones.insert(0, ('anterior', escribir_anterior))
+            for nombre, escribir in versiones:
+                filas, segundos, pico = self.medir(escribir, detalles, options['memoria'])
+                pico = f"{pico:.1f}" if pico is not None else '-'
+                self.stdout.write(f"{nombre:>10} {filas:>9} {segundos:>9.1f} {pico:>17}")
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.ventas import ventas_diarias
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los rollups diarios de ventas (solo los días tocados desde la última ejecución).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='YYYY-MM-DD: recalcula un rango fijo en lugar de los días tocados')
+        parser.add_argument('--hasta', help='YYYY-MM-DD (por defecto, hoy)')
+        parser.add_argument('--todo', action='store_true', help='Reconstruye todo el historial')
+
+    def _fecha(self, valor):
+        try:
+            return datetime.strptime(valor, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'Fecha inválida: {valor}. Usa el formato YYYY-MM-DD.')
+
+    def handle(self, *args, **options):
+        # La marca de tiempo se toma antes de leer, para no perder cambios hechos durante el refresco
+        inicio = timezone.now()
+
+        if options['desde']:
+            desde = self._fecha(options['desde'])
+            hasta = self._fecha(options['hasta']) if options['hasta'] else timezone.localdate()
+            filas = ventas_diarias.refrescar_rango(desde, hasta, inicio)
+            self.stdout.write(self.style.SUCCESS(f'Rango {desde} a {hasta} recalculado: {filas} filas.'))
+            return
+
+        dias = None if options['todo'] else ventas_diarias.dias_tocados()
+        if dias is None:
+            rango = ventas_diarias.rango_completo()
+            if rango is None:
+                ventas_diarias.guardar_marca(inicio)
+                self.stdout.write('No hay ventas para resumir.')
+                return
+            filas = ventas_diarias.refrescar_rango(*rango, calculado_en=inicio)
+            ventas_diarias.guardar_marca(inicio)
+            self.stdout.write(self.style.SUCCESS(
+                f'Historial reconstruido ({rango[0]} a {rango[1]}): {filas} filas.'
+            ))
+            return
+
+        filas = ventas_diarias.refrescar_dias(dias, inicio)
+        ventas_diarias.guardar_marca(inicio)
+        self.stdout.write(self.style.SUCCESS(f'Días recalculados: {len(dias)}. Filas escritas: {filas}.'))
@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ventas import ventas_diarias
+from ticashop.datos_sinteticos import CONTRASENA, VOLUMENES, GeneradorDatos
+
+MODELOS = ['usuarios', 'clientes', 'proveedores', 'categorias', 'productos', 'pedidos']
+
+
+class Command(BaseCommand):
+    help = ('Genera datos sintéticos (usuarios, clientes, proveedores, categorías, productos, pedidos, '
+            'documentos, pagos y notas de crédito) en la base configurada.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', choices=list(VOLUMENES), default='pequeno',
+                            help='Volúmenes base; cada uno se puede ajustar con su opción')
+        for modelo in MODELOS:
+            parser.add_argument(f'--{modelo}', type=int, help=f'Cantidad de {modelo} (reemplaza la escala)')
+        parser.add_argument('--dias', type=int, default=365, help='Días hacia atrás en que se reparten los pedidos')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=5_000, help='Filas por bulk_create')
+        parser.add_argument('--tasa-notas-credito', type=float, default=0.05,
+                            help='Fracción de facturas pagadas que reciben nota de crédito')
+        parser.add_argument('--sin-rollups', action='store_true', help='No recalcula los rollups de VentaDiaria')
+        parser.add_argument('--forzar', action='store_true', help='Permite sembrar con DEBUG=False')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['forzar']:
+            raise CommandError('DEBUG=False: esto no parece un entorno de desarrollo. Usa --forzar si es intencional.')
+
+        volumenes = dict(VOLUMENES[options['escala']])
+        for modelo in MODELOS:
+            if options[modelo] is not None:
+                volumenes[modelo] = options[modelo]
+
+        generador = GeneradorDatos(
+            semilla=options['semilla'], dias=options['dias'], lote=options['lote'],
+            tasa_notas_credito=options['tasa_notas_credito'], log=self.stdout.write,
+        )
+        inicio = time.perf_counter()
+        conteos = generador.generar(**volumenes)
+
+        if not options['sin_rollups']:
+            self.stdout.write('Rollups diarios...')
+            rango = ventas_diarias.rango_completo()
+            if rango:
+                ventas_diarias.refrescar_rango(*rango)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Listo en {time.perf_counter() - inicio:.1f} s: "
+            + ', '.join(f"{cantidad} {modelo}" for modelo, cantidad in conteos.items())
+        ))
+        self.stdout.write(f"Usuarios con prefijo '{generador.prefijo}_' y contraseña '{CONTRASENA}'.")
@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.ventas.models import Pedido, DetallePedido
+from apps.ventas.totales import desglose_iva, recalcular_pedido
+
+
+class Command(BaseCommand):
+    help = 'Compara Pedido.total y los montos de su documento contra la suma de las líneas, y corrige las diferencias.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corregir', action='store_true', help='Recalcula los pedidos con diferencias')
+        parser.add_argument('--lote', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        suma_lineas = (
+            DetallePedido.objects.filter(pedido=OuterRef('pk'))
+            .values('pedido')
+            .annotate(s=Sum('subtotal'))
+            .values('s')
+        )
+        pedidos = (
+            Pedido.objects.annotate(
+                total_lineas=Coalesce(
+                    Subquery(suma_lineas, output_field=DecimalField(max_digits=12, decimal_places=2)),
+                    Value(Decimal('0')),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                )
+            )
+            .values_list(
+                'id', 'total', 'total_lineas',
+                'documentoventa__id', 'documentoventa__neto', 'documentoventa__iva', 'documentoventa__total',
+            )
+            .order_by('id')
+        )
+
+        revisados = 0
+        con_diferencia = []
+        for pedido_id, total, total_lineas, doc_id, doc_neto, doc_iva, doc_total in pedidos.iterator(
+            chunk_size=options['lote']
+        ):
+            revisados += 1
+            total_lineas = Decimal(total_lineas or 0).quantize(Decimal('0.00'))
+            diferencia = Decimal(total or 0) != total_lineas
+
+            if doc_id is not None:
+                esperado = (*desglose_iva(total_lineas), total_lineas)
+                diferencia = diferencia or (doc_neto, doc_iva, doc_total) != esperado
+
+            if diferencia:
+                con_diferencia.append(pedido_id)
+                self.stdout.write(self.style.WARNING(
+                    f"Pedido #{pedido_id}: total={total} líneas={total_lineas}"
+                    + (f" documento={doc_total}" if doc_id is not None else '')
+                ))
+
+        if options['corregir']:
+            lote = options['lote']
+            for i in range(0, len(con_diferencia), lote):
+                for pedido in Pedido.objects.filter(id__in=con_diferencia[i:i + lote]):
+                    recalcular_pedido(pedido)
+
+        accion = 'corregidos' if options['corregir'] else 'con diferencias'
+        self.stdout.write(self.style.SUCCESS(
+            f"Pedidos revisados: {revisados}. {accion.capitalize()}: {len(con_diferencia)}."
+        ))
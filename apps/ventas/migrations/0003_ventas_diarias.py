@@ -0,0 +1,58 @@
+# Generated by Django 5.1.3 on 2026-10-17 18:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_alter_cliente_user'),
+        ('productos', '0003_alter_producto_foto'),
+        ('ventas', '0002_alter_pedido_estado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaVentasPendiente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+            ],
+            options={
+                'db_table': 'ventas_diarias_pendientes',
+            },
+        ),
+        migrations.AlterField(
+            model_name='pedido',
+            name='estado',
+            field=models.CharField(choices=[('Borrador', 'Borrador'), ('Pendiente', 'Pendiente'), ('Procesando', 'Procesando'), ('Enviado', 'Enviado'), ('Completado', 'Completado'), ('Cancelado', 'Cancelado')], default='Pendiente', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('tipo_documento', models.CharField(max_length=7)),
+                ('unidades', models.IntegerField(default=0)),
+                ('unidades_devueltas', models.IntegerField(default=0)),
+                ('bruto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('neto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('iva', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('costo', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('notas_credito', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('calculado_en', models.DateTimeField()),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='clientes.cliente')),
+                ('producto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='productos.producto')),
+                ('vendedor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Venta Diaria',
+                'verbose_name_plural': 'Ventas Diarias',
+                'db_table': 'ventas_diarias',
+                'indexes': [models.Index(fields=['fecha', 'vendedor'], name='ventas_diar_fecha_ffe250_idx'), models.Index(fields=['fecha', 'producto'], name='ventas_diar_fecha_4bc4fb_idx'), models.Index(fields=['calculado_en'], name='ventas_diar_calcula_a44897_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-17 20:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0009_libro_inventario'),
+        ('ventas', '0004_indices_consultas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LineaCarrito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveIntegerField()),
+                ('actualizada_en', models.DateTimeField(auto_now=True)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='productos.producto')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lineas_carrito', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Línea de Carrito',
+                'verbose_name_plural': 'Líneas de Carrito',
+                'db_table': 'lineas_carrito',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'producto'), name='carrito_linea_unica')],
+            },
+        ),
+    ]
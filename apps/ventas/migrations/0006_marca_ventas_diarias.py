@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-17 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0005_carrito'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaVentasDiarias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('iniciado_en', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'ventas_diarias_marca',
+            },
+        ),
+    ]
@@ -1,4 +1,51 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+class PedidoQuerySet(models.QuerySet):
+    def con_cantidad_items(self):
+        """
+        Anota total_items (suma de cantidades de las líneas) con una subconsulta
+        correlacionada: se evalúa solo para las filas que se leen, sin GROUP BY
+        sobre toda la tabla, así que se puede paginar sin costo extra.
+        """
+        cantidades = (
+            DetallePedido.objects.filter(pedido=OuterRef('pk'))
+            .values('pedido')
+            .annotate(s=Sum('cantidad'))
+            .values('s')
+        )
+        return self.annotate(
+            total_items=Coalesce(Subquery(cantidades, output_field=models.IntegerField()), Value(0)),
+        )
+
+    def con_monto_neto(self):
+        """
+        Anota monto_nc (suma de notas de crédito del documento) y monto_neto
+        (total del documento menos notas de crédito, mínimo 0), calculados en la base.
+        """
+        from apps.documentos.models import NotaCredito
+
+        monto = DecimalField(max_digits=12, decimal_places=2)
+        notas = (
+            NotaCredito.objects.filter(factura=OuterRef('documentoventa'))
+            .values('factura')
+            .annotate(s=Sum('monto'))
+            .values('s')
+        )
+        return self.annotate(
+            monto_nc=Coalesce(Subquery(notas, output_field=monto), Value(Decimal('0')), output_field=monto),
+        ).annotate(
+            monto_neto=Greatest(
+                Coalesce(F('documentoventa__total'), Value(Decimal('0')), output_field=monto) - F('monto_nc'),
+                Value(Decimal('0')),
+                output_field=monto,
+            ),
+        )
+
 
 class Pedido(models.Model):
     ESTADOS_PEDIDO = (
@@ -23,6 +70,8 @@ class Pedido(models.Model):
         verbose_name='Vendedor'
     )
     
+    objects = PedidoQuerySet.as_manager()
+    
     # Información del pedido
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
@@ -47,17 +96,26 @@ class Pedido(models.Model):
     
     def __str__(self):
         return f"Pedido #{self.id} - {self.cliente.razon_social}"
-    
+
+    def save(self, *args, **kwargs):
+        # El total lo mueven las líneas con F() (totales.py): un save() completo de una instancia
+        # leída antes lo pisaría con el valor viejo, así que al actualizar no se escribe.
+        if not self._state.adding and self.pk and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != 'total'
+            ]
+        super().save(*args, **kwargs)
+
     def calcular_total(self):
-        """Calcula el total sumando los subtotales de los detalles"""
-        total = sum(detalle.subtotal for detalle in self.detalles.all())
-        self.total = total
-        self.save()
-        return total
+        """Recalcula el total desde las líneas (SUM en la base) y sincroniza el documento"""
+        from .totales import recalcular_pedido
+        return recalcular_pedido(self)
     
     @property
     def cantidad_items(self):
-        """Retorna la cantidad total de items en el pedido"""
+        """Retorna la cantidad total de items en el pedido (usa la anotación de con_cantidad_items si está)"""
+        if hasattr(self, 'total_items'):
+            return self.total_items
         return sum(detalle.cantidad for detalle in self.detalles.all())
     
     class Meta:
@@ -65,6 +123,13 @@ class Pedido(models.Model):
         verbose_name = 'Pedido'
         verbose_name_plural = 'Pedidos'
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Estadísticas y exportaciones: estado='Enviado' + rango de fechas, más recientes primero
+            models.Index(fields=['estado', '-fecha_creacion'], name='pedidos_estado_fecha_idx'),
+            # "Pedidos de hoy" de los dashboards (global y por vendedor)
+            models.Index(fields=['fecha_creacion'], name='pedidos_fecha_idx'),
+            models.Index(fields=['usuario', 'fecha_creacion'], name='pedidos_usuario_fecha_idx'),
+        ]
 
 class DetallePedido(models.Model):
     pedido = models.ForeignKey(
@@ -92,20 +157,123 @@ class DetallePedido(models.Model):
     def __str__(self):
         return f"{self.producto.nombre} x {self.cantidad}"
     
+    def _pedido_en_memoria(self):
+        """Pedido ya cargado en esta instancia (sin consultar la base)"""
+        return self._meta.get_field('pedido').get_cached_value(self, default=None)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores persistidos, para aplicar solo la diferencia al total del pedido
+        instance._pedido_guardado = instance.__dict__.get('pedido_id')
+        instance._subtotal_guardado = instance.__dict__.get('subtotal')
+        return instance
+    
     def save(self, *args, **kwargs):
-        """Calcula automáticamente el subtotal al guardar"""
+        """Calcula el subtotal y aplica la diferencia al total del pedido"""
+        from .totales import aplicar_delta
         self.subtotal = self.cantidad * self.precio_unitario_venta
-        super().save(*args, **kwargs)
-        # Actualizar el total del pedido
-        self.pedido.calcular_total()
+        pedido_anterior = getattr(self, '_pedido_guardado', None)
+        subtotal_anterior = getattr(self, '_subtotal_guardado', None) or Decimal('0')
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if pedido_anterior and pedido_anterior != self.pedido_id:
+                aplicar_delta(pedido_anterior, -subtotal_anterior)
+                subtotal_anterior = Decimal('0')
+            aplicar_delta(self.pedido_id, self.subtotal - subtotal_anterior, self._pedido_en_memoria())
+        self._pedido_guardado = self.pedido_id
+        self._subtotal_guardado = self.subtotal
     
     def delete(self, *args, **kwargs):
-        """Actualiza el total del pedido al eliminar un detalle"""
-        pedido = self.pedido
-        super().delete(*args, **kwargs)
-        pedido.calcular_total()
+        """Descuenta el subtotal de la línea del total del pedido"""
+        from .totales import aplicar_delta
+        pedido_id = getattr(self, '_pedido_guardado', None) or self.pedido_id
+        subtotal = getattr(self, '_subtotal_guardado', None)
+        if subtotal is None:
+            subtotal = self.subtotal or Decimal('0')
+        with transaction.atomic(savepoint=False):
+            resultado = super().delete(*args, **kwargs)
+            aplicar_delta(pedido_id, -subtotal, self._pedido_en_memoria() if pedido_id == self.pedido_id else None)
+        return resultado
     
     class Meta:
         db_table = 'detalle_pedido'
         verbose_name = 'Detalle de Pedido'
-        verbose_name_plural = 'Detalles de Pedido'
\ No newline at end of file
+        verbose_name_plural = 'Detalles de Pedido'
+
+class VentaDiaria(models.Model):
+    """
+    Hechos de venta pre-agregados por día, vendedor, cliente, producto y tipo
+    de documento (solo pedidos Enviados). Se recalculan con el comando
+    refrescar_ventas_diarias; ver apps/ventas/ventas_diarias.py.
+    """
+    fecha = models.DateField()
+    vendedor = models.ForeignKey('usuarios.Usuario', on_delete=models.SET_NULL, null=True, blank=True)
+    cliente = models.ForeignKey('clientes.Cliente', on_delete=models.CASCADE)
+    producto = models.ForeignKey('productos.Producto', on_delete=models.SET_NULL, null=True, blank=True)
+    tipo_documento = models.CharField(max_length=7)
+
+    unidades = models.IntegerField(default=0)
+    unidades_devueltas = models.IntegerField(default=0)
+    bruto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    neto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    iva = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    costo = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    notas_credito = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    calculado_en = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.fecha} - {self.tipo_documento} - {self.bruto}"
+
+    class Meta:
+        db_table = 'ventas_diarias'
+        verbose_name = 'Venta Diaria'
+        verbose_name_plural = 'Ventas Diarias'
+        indexes = [
+            models.Index(fields=['fecha', 'vendedor']),
+            models.Index(fields=['fecha', 'producto']),
+            models.Index(fields=['calculado_en']),
+        ]
+
+
+class DiaVentasPendiente(models.Model):
+    """Días marcados por señales para recalcular en el próximo refresco."""
+    fecha = models.DateField(unique=True)
+
+    class Meta:
+        db_table = 'ventas_diarias_pendientes'
+
+
+class MarcaVentasDiarias(models.Model):
+    """
+    Inicio del último refresco incremental o completo de VentaDiaria (una sola
+    fila). Los refrescos de un rango o de hoy en tiempo real no la mueven.
+    """
+    iniciado_en = models.DateTimeField()
+
+    class Meta:
+        db_table = 'ventas_diarias_marca'
+
+
+class LineaCarrito(models.Model):
+    """
+    Una línea del carrito de un cliente (el carrito es el conjunto de sus
+    líneas). Se escribe una fila por producto, con upsert; ver
+    apps/ventas/carrito.py.
+    """
+    usuario = models.ForeignKey('usuarios.Usuario', on_delete=models.CASCADE, related_name='lineas_carrito')
+    producto = models.ForeignKey('productos.Producto', on_delete=models.CASCADE)
+    cantidad = models.PositiveIntegerField()
+    actualizada_en = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.usuario_id} - {self.producto_id} x {self.cantidad}"
+
+    class Meta:
+        db_table = 'lineas_carrito'
+        verbose_name = 'Línea de Carrito'
+        verbose_name_plural = 'Líneas de Carrito'
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'producto'], name='carrito_linea_unica'),
+        ]
@@ -0,0 +1,103 @@
+"""
+Cálculo columnar del reporte de rentabilidad.
+
+Las líneas de venta se leen por bloques con values_list y cada bloque se
+calcula de una vez con NumPy/pandas, en centavos enteros (int64) para que el
+redondeo sea idéntico al cálculo con Decimal que hacía la vista:
+
+- neto unitario = (bruto / 1.19).quantize(0.01), con ROUND_HALF_EVEN
+- costo unitario = costo al momento de la venta, o el costo actual del
+  producto, o 0 (mismo criterio que `a or b or 0`)
+- margen = utilidad / venta neta * 100, formateado con 2 decimales
+  (half-even, "-0.00%" incluido) o "0.00%" si la venta neta no es positiva
+"""
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+TAMANO_BLOQUE = 20_000
+
+CAMPOS = [
+    'documento__fecha_emision',
+    'documento__tipo_documento',
+    'documento__folio',
+    'documento__vendedor__username',
+    'documento__cliente__razon_social',
+    'producto__proveedor__razon_social',
+    'producto__nombre',
+    'cantidad',
+    'costo_unitario_venta',
+    'producto__costo_unitario',
+    'precio_unitario_venta',
+]
+
+
+def _centavos(valores):
+    """Decimal (2 decimales) o None -> centavos int64 (None queda en 0)."""
+    arreglo = np.array(valores, dtype=float)
+    return np.rint(np.nan_to_num(arreglo) * 100).astype(np.int64)
+
+
+def _dividir_redondeando(numerador, denominador):
+    """numerador / denominador redondeado al entero más cercano, empates al par."""
+    cociente, resto = np.divmod(numerador, denominador)
+    doble = 2 * resto
+    sube = (doble > denominador) | ((doble == denominador) & (cociente % 2 == 1))
+    return cociente + sube
+
+
+def _formatear_margen(utilidad, venta):
+    positiva = venta > 0
+    centesimas = _dividir_redondeando(utilidad * 10_000, np.where(positiva, venta, 1))
+    centesimas = np.where(positiva, centesimas, 0)
+    absoluto = pd.Series(np.abs(centesimas))
+    signo = pd.Series(np.where(positiva & (utilidad < 0), '-', ''))
+    return (
+        signo + (absoluto // 100).astype(str) + '.'
+        + (absoluto % 100).astype(str).str.zfill(2) + '%'
+    )
+
+
+def calcular_bloque(filas):
+    """Calcula un bloque de filas de values_list(*CAMPOS) y retorna un DataFrame listo para escribir."""
+    df = pd.DataFrame.from_records(filas, columns=CAMPOS)
+
+    cantidad = df['cantidad'].to_numpy(dtype=np.int64)
+    costo_venta = _centavos(df['costo_unitario_venta'])
+    costo_producto = _centavos(df['producto__costo_unitario'])
+    costo_unit = np.where(costo_venta != 0, costo_venta, costo_producto)
+    # bruto / 1.19 en centavos = bruto * 100 / 119
+    neto_unit = _dividir_redondeando(_centavos(df['precio_unitario_venta']) * 100, 119)
+
+    costo_total = costo_unit * cantidad
+    venta_neta = neto_unit * cantidad
+    utilidad = venta_neta - costo_total
+
+    fechas = pd.to_datetime(df['documento__fecha_emision'], utc=True)
+    return pd.DataFrame({
+        'fecha': fechas.dt.strftime('%d/%m/%Y').fillna(''),
+        'documento': df['documento__tipo_documento'],
+        'folio': df['documento__folio'],
+        'vendedor': df['documento__vendedor__username'].fillna('N/A'),
+        'cliente': df['documento__cliente__razon_social'],
+        'proveedor': df['producto__proveedor__razon_social'].fillna('N/A'),
+        'producto': df['producto__nombre'],
+        'cantidad': cantidad,
+        'costo_unit': costo_unit / 100,
+        'neto_unit': neto_unit / 100,
+        'costo_total': costo_total / 100,
+        'venta_neta': venta_neta / 100,
+        'utilidad': utilidad / 100,
+        'margen': _formatear_margen(utilidad, venta_neta),
+    })
+
+
+def bloques_rentabilidad(detalles, tamano=TAMANO_BLOQUE):
+    """Itera DataFrames calculados a partir de un queryset de DetalleDocumento."""
+    filas = detalles.values_list(*CAMPOS).iterator(chunk_size=tamano)
+    while True:
+        bloque = list(islice(filas, tamano))
+        if not bloque:
+            return
+        yield calcular_bloque(bloque)
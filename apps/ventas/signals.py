@@ -0,0 +1,71 @@
+"""
+Señales que mantienen al día los rollups de VentaDiaria.
+
+Los cambios que el refresco incremental no puede detectar por marca de tiempo
+(borrados, notas de crédito editadas) dejan su día en DiaVentasPendiente.
+Con settings.VENTAS_DIARIAS_TIEMPO_REAL, los cambios que afectan al día de hoy
+recalculan ese día apenas se confirma la transacción.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.documentos.models import DocumentoVenta, NotaCredito, DetalleNotaCredito
+from .models import Pedido
+from .ventas_diarias import dia_local, marcar_dias, refrescar_dias
+
+
+def _tiempo_real():
+    return getattr(settings, 'VENTAS_DIARIAS_TIEMPO_REAL', False)
+
+
+def _registrar(*dias):
+    dias = {d for d in dias if d}
+    hoy = timezone.localdate()
+    if _tiempo_real() and hoy in dias:
+        dias.discard(hoy)
+        transaction.on_commit(lambda: refrescar_dias([hoy]))
+    marcar_dias(*dias)
+
+
+def _dia_documento(pedido_id):
+    fecha = DocumentoVenta.objects.filter(pedido_id=pedido_id).values_list('fecha_emision', flat=True).first()
+    return dia_local(fecha)
+
+
+@receiver(post_save, sender=Pedido)
+def pedido_guardado(sender, instance, **kwargs):
+    # Sin tiempo real, el refresco incremental detecta el cambio por fecha_actualizacion
+    if _tiempo_real():
+        _registrar(_dia_documento(instance.pk))
+
+
+@receiver(pre_delete, sender=Pedido)
+def pedido_eliminado(sender, instance, **kwargs):
+    _registrar(_dia_documento(instance.pk))
+
+
+@receiver(post_save, sender=DocumentoVenta)
+def documento_guardado(sender, instance, **kwargs):
+    if _tiempo_real():
+        _registrar(dia_local(instance.fecha_emision))
+
+
+@receiver(post_delete, sender=DocumentoVenta)
+def documento_eliminado(sender, instance, **kwargs):
+    _registrar(dia_local(instance.fecha_emision))
+
+
+@receiver(post_save, sender=NotaCredito)
+@receiver(post_delete, sender=NotaCredito)
+def nota_credito_cambiada(sender, instance, **kwargs):
+    _registrar(instance.fecha_emision)
+
+
+@receiver(post_save, sender=DetalleNotaCredito)
+@receiver(post_delete, sender=DetalleNotaCredito)
+def detalle_nota_credito_cambiado(sender, instance, **kwargs):
+    fecha = NotaCredito.objects.filter(pk=instance.nota_id).values_list('fecha_emision', flat=True).first()
+    _registrar(fecha)
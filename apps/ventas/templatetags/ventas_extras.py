@@ -1,5 +1,7 @@
 from django import template
 
+from apps.ventas.carrito import resumen
+
 register = template.Library()
 
 @register.filter
@@ -8,4 +10,9 @@ def sum_subtotales(carrito):
     try:
         return sum(float(item['subtotal']) for item in carrito)
     except Exception:
-        return 0
\ No newline at end of file
+        return 0
+
+@register.simple_tag
+def resumen_carrito(usuario):
+    """Líneas, unidades y total del carrito del cliente (cacheado, ver apps/ventas/carrito.py)"""
+    return resumen(usuario)
@@ -1,3 +1,69 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from apps.clientes.models import Cliente
+from apps.documentos.models import DocumentoVenta
+from apps.productos.models import Producto
+
+from .models import DetallePedido, Pedido
+
+
+class TotalesPedidoTests(TestCase):
+    def setUp(self):
+        self.cliente = Cliente.objects.create(rut='11111111-1', razon_social='Cliente Uno')
+        self.producto = Producto.objects.create(codigo='P1', nombre='Producto 1', precio_unitario=1190,
+                                                costo_unitario=500, stock=100)
+        self.pedido = Pedido.objects.create(cliente=self.cliente)
+        self.otro = Pedido.objects.create(cliente=self.cliente)
+        DocumentoVenta.objects.create(tipo_documento='Boleta', cliente=self.cliente, pedido=self.pedido)
+
+    def linea(self, pedido, cantidad, precio=1190):
+        return DetallePedido.objects.create(pedido=pedido, producto=self.producto, cantidad=cantidad,
+                                            precio_unitario_venta=Decimal(precio))
+
+    def assertTotales(self, pedido, total):
+        """Pedido.total (y su documento) es `total` y verificar_totales no encuentra diferencias."""
+        self.assertEqual(Pedido.objects.get(pk=pedido.pk).total, Decimal(total))
+        salida = StringIO()
+        call_command('verificar_totales', stdout=salida)
+        self.assertIn('Con diferencias: 0.', salida.getvalue())
+
+    def test_agregar_lineas(self):
+        self.linea(self.pedido, 2)
+        self.linea(self.pedido, 1, 500)
+        self.assertTotales(self.pedido, 2880)
+        documento = DocumentoVenta.objects.get(pedido=self.pedido)
+        self.assertEqual((documento.neto, documento.iva, documento.total),
+                         (Decimal('2420.17'), Decimal('459.83'), Decimal('2880')))
+
+    def test_editar_linea(self):
+        self.linea(self.pedido, 1, 500)
+        linea = DetallePedido.objects.get(pk=self.linea(self.pedido, 2).pk)
+        linea.cantidad = 5
+        linea.save()
+        self.assertTotales(self.pedido, 6450)
+
+    def test_mover_linea_a_otro_pedido(self):
+        self.linea(self.pedido, 1, 500)
+        linea = DetallePedido.objects.get(pk=self.linea(self.pedido, 2).pk)
+        linea.pedido = self.otro
+        linea.cantidad = 3
+        linea.save()
+        self.assertTotales(self.pedido, 500)
+        self.assertTotales(self.otro, 3570)
+
+    def test_eliminar_linea(self):
+        self.linea(self.pedido, 1, 500)
+        DetallePedido.objects.get(pk=self.linea(self.pedido, 2).pk).delete()
+        self.assertTotales(self.pedido, 500)
+
+    def test_save_completo_de_pedido_viejo_no_pisa_el_total(self):
+        viejo = Pedido.objects.get(pk=self.pedido.pk)
+        self.linea(self.pedido, 2)
+        viejo.estado = 'Procesando'
+        viejo.save()
+        self.assertTotales(self.pedido, 2380)
+        self.assertEqual(Pedido.objects.get(pk=self.pedido.pk).estado, 'Procesando')
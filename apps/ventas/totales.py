@@ -0,0 +1,91 @@
+"""
+Totales incrementales de Pedido y de su DocumentoVenta.
+
+Agregar, modificar o eliminar una línea (DetallePedido) no vuelve a sumar
+todas las líneas: aplica la diferencia de subtotal sobre Pedido.total con un
+UPDATE usando F() y, en la misma operación, deriva neto/IVA/total del
+documento asociado (precios con IVA incluido).
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.documentos.models import DocumentoVenta
+from apps.usuarios import metricas
+from .models import Pedido, DetallePedido
+
+TASA_IVA = Decimal('1.19')
+
+
+def desglose_iva(total_bruto):
+    """Separa un total con IVA incluido en (neto, iva), redondeando a 2 decimales."""
+    total_bruto = Decimal(total_bruto or 0)
+    neto = (total_bruto / TASA_IVA).quantize(Decimal('0.00'))
+    return neto, total_bruto - neto
+
+
+def _sincronizar_documento(pedido_id, total, pedido=None):
+    """Deja neto/iva/total del documento del pedido en línea con `total`."""
+    neto, iva = desglose_iva(total)
+    DocumentoVenta.objects.filter(pedido_id=pedido_id).update(neto=neto, iva=iva, total=total)
+    # Los UPDATE no emiten señales: ventas y saldos de los paneles se invalidan aquí
+    metricas.invalidar_al_confirmar('pedidos', 'documentos')
+
+    # Mantener coherentes las instancias que la vista ya tiene en memoria
+    if pedido is not None:
+        pedido.total = total
+        documento = Pedido.documentoventa.related.get_cached_value(pedido, default=None)
+        if documento is not None:
+            documento.neto = neto
+            documento.iva = iva
+            documento.total = total
+
+
+def aplicar_delta(pedido_id, delta, pedido=None):
+    """Suma `delta` a Pedido.total y re-deriva los montos del documento asociado."""
+    if not delta:
+        return
+    with transaction.atomic(savepoint=False):
+        pedidos = Pedido.objects.filter(pk=pedido_id)
+        pedidos.update(total=F('total') + delta, fecha_actualizacion=timezone.now())
+        total = pedidos.values_list('total', flat=True).first()
+        if total is not None:
+            _sincronizar_documento(pedido_id, total, pedido)
+
+
+def recalcular_pedido(pedido):
+    """Recalcula el total desde cero con un SUM en la base (ruta de reconciliación)."""
+    total = pedido.detalles.aggregate(s=Sum('subtotal'))['s'] or Decimal('0')
+    with transaction.atomic():
+        Pedido.objects.filter(pk=pedido.pk).update(total=total, fecha_actualizacion=timezone.now())
+        _sincronizar_documento(pedido.pk, total, pedido)
+    return total
+
+
+def reemplazar_detalles(pedido, lineas):
+    """
+    Ruta masiva: reemplaza todas las líneas del pedido por `lineas`
+    (iterable de (producto, cantidad, precio_unitario_venta)) con un solo
+    bulk_create y una sola escritura del total.
+    """
+    detalles = []
+    total = Decimal('0')
+    for producto, cantidad, precio in lineas:
+        subtotal = cantidad * precio
+        total += subtotal
+        detalles.append(DetallePedido(
+            pedido=pedido,
+            producto=producto,
+            cantidad=cantidad,
+            precio_unitario_venta=precio,
+            subtotal=subtotal,
+        ))
+
+    with transaction.atomic():
+        DetallePedido.objects.filter(pedido=pedido).delete()
+        DetallePedido.objects.bulk_create(detalles)
+        Pedido.objects.filter(pk=pedido.pk).update(total=total, fecha_actualizacion=timezone.now())
+        _sincronizar_documento(pedido.pk, total, pedido)
+    return detalles
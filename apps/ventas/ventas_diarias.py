@@ -0,0 +1,214 @@
+"""
+Rollups diarios de ventas (modelo VentaDiaria).
+
+Cada fila resume un día por vendedor, cliente, producto y tipo de documento:
+unidades, bruto, neto, IVA, costo y notas de crédito de los pedidos Enviados.
+La venta se asigna al día de emisión del documento y la nota de crédito al
+día de emisión de la nota.
+
+El comando refrescar_ventas_diarias recalcula solo los días tocados desde la
+última ejecución: los marcados en DiaVentasPendiente por las señales y los
+días de documentos cuyos pedidos cambiaron (Pedido.fecha_actualizacion)
+o con notas de crédito creadas desde entonces. "Desde la última ejecución"
+es MarcaVentasDiarias, que solo avanzan los refrescos incrementales y
+completos: calculado_en no sirve, porque también lo escriben los refrescos
+de un rango (--desde) y el de hoy en tiempo real, que no miran los demás días.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Max, Min, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from apps.documentos.models import DocumentoVenta, DetalleDocumento, NotaCredito, DetalleNotaCredito
+from .models import VentaDiaria, DiaVentasPendiente, MarcaVentasDiarias
+from .totales import desglose_iva
+from ticashop.fechas import rango_dias
+
+MONTO = DecimalField(max_digits=14, decimal_places=2)
+METRICAS = ['unidades', 'unidades_devueltas', 'bruto', 'neto', 'iva', 'costo', 'notas_credito']
+
+
+def dia_local(valor):
+    """Fecha local de un datetime (o la misma fecha si ya es date)."""
+    if valor is None:
+        return None
+    if isinstance(valor, datetime):
+        return timezone.localdate(valor) if timezone.is_aware(valor) else valor.date()
+    return valor
+
+
+def _hechos_rango(desde, hasta):
+    """Calcula los hechos de [desde, hasta] con dos consultas agrupadas."""
+    hechos = {}
+
+    def fila(clave):
+        if clave not in hechos:
+            hechos[clave] = dict.fromkeys(METRICAS, 0)
+        return hechos[clave]
+
+    ventas = (
+        DetalleDocumento.objects.filter(
+            documento__pedido__estado='Enviado',
+            **rango_dias('documento__fecha_emision', desde, hasta),
+        )
+        .annotate(dia=TruncDate('documento__fecha_emision'))
+        .values('dia', 'documento__vendedor', 'documento__cliente', 'producto', 'documento__tipo_documento')
+        .annotate(
+            unidades=Sum('cantidad'),
+            bruto=Sum('subtotal'),
+            costo=Sum(
+                F('cantidad') * Coalesce('costo_unitario_venta', 'producto__costo_unitario', Value(Decimal('0'))),
+                output_field=MONTO,
+            ),
+        )
+        .order_by()
+    )
+    for v in ventas:
+        clave = (v['dia'], v['documento__vendedor'], v['documento__cliente'], v['producto'],
+                 v['documento__tipo_documento'])
+        f = fila(clave)
+        f['unidades'] = v['unidades'] or 0
+        f['bruto'] = v['bruto'] or Decimal('0')
+        f['costo'] = v['costo'] or Decimal('0')
+
+    devoluciones = (
+        DetalleNotaCredito.objects.filter(
+            nota__factura__pedido__estado='Enviado',
+            nota__fecha_emision__gte=desde,
+            nota__fecha_emision__lte=hasta,
+        )
+        .values('nota__fecha_emision', 'nota__factura__vendedor', 'nota__factura__cliente', 'producto',
+                'nota__factura__tipo_documento')
+        .annotate(unidades=Sum('cantidad'), monto=Sum('subtotal'))
+        .order_by()
+    )
+    for d in devoluciones:
+        clave = (d['nota__fecha_emision'], d['nota__factura__vendedor'], d['nota__factura__cliente'],
+                 d['producto'], d['nota__factura__tipo_documento'])
+        f = fila(clave)
+        f['unidades_devueltas'] = d['unidades'] or 0
+        f['notas_credito'] = d['monto'] or Decimal('0')
+
+    return hechos
+
+
+def refrescar_rango(desde, hasta, calculado_en=None):
+    """Reemplaza los rollups de [desde, hasta] (fechas locales, inclusive)."""
+    calculado_en = calculado_en or timezone.now()
+    filas = []
+    for (fecha, vendedor_id, cliente_id, producto_id, tipo), m in _hechos_rango(desde, hasta).items():
+        m['neto'], m['iva'] = desglose_iva(m['bruto'])
+        filas.append(VentaDiaria(
+            fecha=fecha, vendedor_id=vendedor_id, cliente_id=cliente_id, producto_id=producto_id,
+            tipo_documento=tipo, calculado_en=calculado_en, **m,
+        ))
+
+    with transaction.atomic():
+        VentaDiaria.objects.filter(fecha__gte=desde, fecha__lte=hasta).delete()
+        VentaDiaria.objects.bulk_create(filas, batch_size=1000)
+        DiaVentasPendiente.objects.filter(fecha__gte=desde, fecha__lte=hasta).delete()
+    return len(filas)
+
+
+def refrescar_dias(dias, calculado_en=None):
+    """Refresca una lista de días agrupándolos en rangos contiguos."""
+    dias = sorted(set(d for d in dias if d))
+    filas = 0
+    while dias:
+        desde = hasta = dias.pop(0)
+        while dias and dias[0] == hasta + timedelta(days=1):
+            hasta = dias.pop(0)
+        filas += refrescar_rango(desde, hasta, calculado_en)
+    return filas
+
+
+def dias_tocados():
+    """
+    Días a recalcular desde el último refresco. Retorna None si nunca se ha
+    calculado (corresponde reconstruir todo).
+    """
+    marca = ultima_marca()
+    if marca is None:
+        return None
+
+    dias = set(DiaVentasPendiente.objects.values_list('fecha', flat=True))
+    dias.update(
+        DocumentoVenta.objects.filter(pedido__fecha_actualizacion__gte=marca, fecha_emision__isnull=False)
+        .annotate(dia=TruncDate('fecha_emision'))
+        .values_list('dia', flat=True)
+        .order_by()
+        .distinct()
+    )
+    dias.update(
+        NotaCredito.objects.filter(creado_en__gte=marca)
+        .values_list('fecha_emision', flat=True)
+        .order_by()
+        .distinct()
+    )
+    return sorted(dias)
+
+
+def ultima_marca():
+    return MarcaVentasDiarias.objects.values_list('iniciado_en', flat=True).first()
+
+
+def guardar_marca(iniciado_en):
+    """Registra el inicio de un refresco incremental o completo que terminó bien."""
+    MarcaVentasDiarias.objects.update_or_create(id=1, defaults={'iniciado_en': iniciado_en})
+
+
+def rango_completo():
+    """Primer y último día con documentos o notas de crédito."""
+    docs = DocumentoVenta.objects.filter(fecha_emision__isnull=False).aggregate(
+        desde=Min('fecha_emision'), hasta=Max('fecha_emision')
+    )
+    notas = NotaCredito.objects.aggregate(desde=Min('fecha_emision'), hasta=Max('fecha_emision'))
+    inicios = [d for d in (dia_local(docs['desde']), notas['desde']) if d]
+    finales = [d for d in (dia_local(docs['hasta']), notas['hasta'], timezone.localdate()) if d]
+    if not inicios:
+        return None
+    return min(inicios), max(finales)
+
+
+def marcar_dias(*dias):
+    """Deja días pendientes de recalcular (INSERT que ignora duplicados)."""
+    dias = {d for d in dias if d}
+    if dias:
+        DiaVentasPendiente.objects.bulk_create(
+            [DiaVentasPendiente(fecha=d) for d in dias], ignore_conflicts=True
+        )
+
+
+def _rollups(desde=None, hasta=None):
+    filas = VentaDiaria.objects.all()
+    if desde:
+        filas = filas.filter(fecha__gte=desde)
+    if hasta:
+        filas = filas.filter(fecha__lte=hasta)
+    return filas
+
+
+def resumen_ventas(desde=None, hasta=None, dimensiones=('vendedor__username',), orden=('-monto_neto',)):
+    """
+    Suma los rollups del rango agrupando por `dimensiones` (métricas como
+    total_<campo>), con monto_neto (bruto menos notas de crédito) y utilidad.
+    """
+    return (
+        _rollups(desde, hasta).values(*dimensiones)
+        .annotate(**{f'total_{m}': Sum(m) for m in METRICAS})
+        .annotate(utilidad=F('total_neto') - F('total_costo'),
+                  monto_neto=F('total_bruto') - F('total_notas_credito'))
+        .order_by(*orden)
+    )
+
+
+def totales_ventas(desde=None, hasta=None):
+    """Las métricas de resumen_ventas para todo el rango, en una fila (dict)."""
+    totales = _rollups(desde, hasta).aggregate(**{f'total_{m}': Sum(m) for m in METRICAS})
+    totales = {clave: valor or 0 for clave, valor in totales.items()}
+    totales['utilidad'] = totales['total_neto'] - totales['total_costo']
+    totales['monto_neto'] = totales['total_bruto'] - totales['total_notas_credito']
+    return totales
@@ -0,0 +1,128 @@
+/*
+ * Autocompletado sobre los endpoints JSON de búsqueda por prefijo
+ * (productos:buscar_productos, clientes:buscar_clientes).
+ *
+ * Se activa en los <input data-autocompletar-url="..."> al cargar la página.
+ * Al elegir un resultado guarda su id en el input indicado por
+ * data-autocompletar-destino, muestra su "texto" y emite el evento
+ * "autocompletar:seleccion" (detail = resultado) sobre el input.
+ */
+(function () {
+    const ESPERA_MS = 150;
+
+    function iniciar(input) {
+        if (input.dataset.autocompletarIniciado) return;
+        input.dataset.autocompletarIniciado = '1';
+
+        const url = input.dataset.autocompletarUrl;
+        const destino = document.getElementById(input.dataset.autocompletarDestino);
+        const lista = document.createElement('div');
+        lista.className = 'dropdown-menu w-100';
+        lista.style.maxHeight = '320px';
+        lista.style.overflowY = 'auto';
+        input.parentNode.style.position = 'relative';
+        input.parentNode.appendChild(lista);
+
+        let resultados = [];
+        let activo = -1;
+        let temporizador = null;
+        let peticion = 0;
+
+        function cerrar() {
+            lista.classList.remove('show');
+            activo = -1;
+        }
+
+        function marcar(indice) {
+            const items = lista.querySelectorAll('.dropdown-item');
+            items.forEach((item, i) => item.classList.toggle('active', i === indice));
+            if (items[indice]) items[indice].scrollIntoView({block: 'nearest'});
+            activo = indice;
+        }
+
+        function elegir(resultado) {
+            fijar(input, resultado);
+            cerrar();
+            input.dispatchEvent(new CustomEvent('autocompletar:seleccion', {detail: resultado}));
+        }
+
+        function mostrar(datos) {
+            resultados = datos;
+            lista.innerHTML = '';
+            if (!datos.length) {
+                const vacio = document.createElement('span');
+                vacio.className = 'dropdown-item-text text-muted';
+                vacio.textContent = 'Sin resultados';
+                lista.appendChild(vacio);
+            }
+            datos.forEach(resultado => {
+                const item = document.createElement('button');
+                item.type = 'button';
+                item.className = 'dropdown-item';
+                item.textContent = resultado.texto;
+                item.addEventListener('mousedown', e => {
+                    e.preventDefault();  // que el input no pierda el foco antes del click
+                    elegir(resultado);
+                });
+                lista.appendChild(item);
+            });
+            lista.classList.add('show');
+            activo = -1;
+        }
+
+        function buscar() {
+            const q = input.value.trim();
+            if (!q) {
+                cerrar();
+                return;
+            }
+            const numero = ++peticion;
+            fetch(`${url}?q=${encodeURIComponent(q)}`, {headers: {'X-Requested-With': 'XMLHttpRequest'}})
+                .then(respuesta => respuesta.json())
+                .then(datos => {
+                    // Solo la última búsqueda: las respuestas pueden llegar desordenadas
+                    if (numero === peticion) mostrar(datos.resultados);
+                })
+                .catch(error => console.error('Error al buscar:', error));
+        }
+
+        input.addEventListener('input', () => {
+            if (destino && destino.value) {
+                destino.value = '';
+                input.dispatchEvent(new CustomEvent('autocompletar:seleccion', {detail: null}));
+            }
+            clearTimeout(temporizador);
+            temporizador = setTimeout(buscar, ESPERA_MS);
+        });
+
+        input.addEventListener('keydown', e => {
+            if (!lista.classList.contains('show')) return;
+            if (e.key === 'ArrowDown') {
+                e.preventDefault();
+                marcar(Math.min(activo + 1, resultados.length - 1));
+            } else if (e.key === 'ArrowUp') {
+                e.preventDefault();
+                marcar(Math.max(activo - 1, 0));
+            } else if (e.key === 'Enter' && activo >= 0) {
+                e.preventDefault();
+                elegir(resultados[activo]);
+            } else if (e.key === 'Escape') {
+                cerrar();
+            }
+        });
+
+        input.addEventListener('blur', cerrar);
+    }
+
+    function fijar(input, resultado) {
+        const destino = document.getElementById(input.dataset.autocompletarDestino);
+        if (destino) destino.value = resultado.id;
+        input.value = resultado.texto;
+    }
+
+    window.Autocompletar = {iniciar: iniciar, fijar: fijar};
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('input[data-autocompletar-url]').forEach(iniciar);
+    });
+})();
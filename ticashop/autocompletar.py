@@ -0,0 +1,106 @@
+"""
+Piezas comunes de los endpoints de autocompletado (productos, clientes).
+
+Las búsquedas son por prefijo y se traducen a un rango [prefijo, siguiente)
+sobre la columna (o sobre su clave de búsqueda, que tiene su propio índice),
+en lugar de LIKE/startswith: SQLite no usa índices comunes con LIKE, que allí
+no distingue mayúsculas, y PostgreSQL tampoco sin un operator class especial.
+Con el rango, las primeras N coincidencias salen del índice en orden.
+
+La clave de búsqueda (ClaveBusquedaField) es el texto en minúsculas y sin
+tildes, calculado en Python al guardar: LOWER() de SQLite solo convierte
+ASCII, así que 'Ñandú' o 'Árbol' no se encontraban con LOWER(columna).
+"""
+import unicodedata
+
+from django.conf import settings
+from django.db import models
+from django.http import JsonResponse
+
+from .cache_local import CacheLRU
+
+LIMITE = 10
+LIMITE_MAXIMO = 50
+LARGO_MINIMO = 1
+LARGO_MAXIMO = 60
+
+cache_busquedas = CacheLRU(
+    maximo=getattr(settings, 'AUTOCOMPLETAR_CACHE', 512),
+    ttl=getattr(settings, 'AUTOCOMPLETAR_TTL', 30),
+)
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes ('Ñandú' -> 'nandu'): lo que se compara en la búsqueda por prefijo."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+class ClaveBusquedaField(models.CharField):
+    """
+    Copia normalizada de otro campo del modelo (`origen`), escrita en cada
+    save() y bulk_create. Como auto_now, un save(update_fields=[...]) solo la
+    escribe si se incluye: ver con_claves().
+    """
+
+    def __init__(self, *args, origen=None, **kwargs):
+        self.origen = origen
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        nombre, ruta, args, kwargs = super().deconstruct()
+        kwargs['origen'] = self.origen
+        kwargs.pop('editable', None)
+        kwargs.pop('default', None)
+        return nombre, ruta, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        valor = normalizar(getattr(model_instance, self.origen))[:self.max_length]
+        setattr(model_instance, self.attname, valor)
+        return valor
+
+
+def con_claves(modelo, update_fields):
+    """update_fields más las claves de búsqueda cuyo campo de origen se guarda."""
+    if update_fields is None:
+        return None
+    update_fields = list(update_fields)
+    for campo in modelo._meta.concrete_fields:
+        if isinstance(campo, ClaveBusquedaField) and campo.origen in update_fields and campo.name not in update_fields:
+            update_fields.append(campo.name)
+    return update_fields
+
+
+def rango_prefijo(campo, prefijo):
+    """Lookups para `campo` que empieza con `prefijo` (comparación binaria, sin LIKE)."""
+    siguiente = prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+    return {f'{campo}__gte': prefijo, f'{campo}__lt': siguiente}
+
+
+def termino(request):
+    """Texto buscado (parámetro q) normalizado, o '' si es muy corto."""
+    texto = ' '.join(request.GET.get('q', '').split())[:LARGO_MAXIMO]
+    return texto if len(texto) >= LARGO_MINIMO else ''
+
+
+def limite(request):
+    try:
+        return max(1, min(int(request.GET.get('limite', LIMITE)), LIMITE_MAXIMO))
+    except ValueError:
+        return LIMITE
+
+
+def buscar_en_cache(tipo, texto, cantidad, buscar):
+    """Resultados de buscar(texto, cantidad), guardados en la caché del proceso."""
+    clave = (tipo, texto, cantidad)
+    resultados = cache_busquedas.obtener(clave)
+    if resultados is None:
+        resultados = buscar(texto, cantidad)
+        cache_busquedas.guardar(clave, resultados)
+    return resultados
+
+
+def respuesta(resultados):
+    return JsonResponse({'resultados': resultados})
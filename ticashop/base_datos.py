@@ -0,0 +1,88 @@
+"""
+Perfil de la base de datos, armado desde variables de entorno (ver settings.DATABASES).
+
+Por defecto SQLite, afinado para varios procesos/hilos escribiendo a la vez:
+
+- journal_mode=WAL: los lectores no bloquean al escritor ni al revés.
+- synchronous=NORMAL: en WAL solo sincroniza en los checkpoints; un corte de
+  luz puede perder las últimas transacciones, pero no corrompe la base.
+- busy_timeout (parámetro timeout de sqlite3): cuánto espera una conexión a
+  que se libere el lock antes de fallar con "database is locked".
+- transaction_mode=IMMEDIATE: las transacciones toman el lock de escritura
+  al empezar. Con BEGIN (DEFERRED) una transacción que leyó y luego escribe
+  falla de inmediato si otra ya escribe, sin respetar el busy_timeout.
+- mmap_size y cache_size: lecturas desde memoria mapeada y más páginas en caché.
+
+Con DB_ENGINE=mysql se usa MySQL/MariaDB a través de mysqlclient (ya en
+requirements.txt), configurado solo con DB_NAME, DB_USER, DB_PASSWORD,
+DB_HOST y DB_PORT.
+
+En ambos casos las conexiones se reutilizan entre requests durante
+DB_CONN_MAX_AGE segundos, con CONN_HEALTH_CHECKS para descartar las que el
+servidor cerró.
+"""
+import os
+
+MOTORES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'mysql': 'django.db.backends.mysql',
+}
+
+
+def pragmas_sqlite(mmap_mb=256, cache_mb=64):
+    """PRAGMAs que se ejecutan al abrir cada conexión SQLite (init_command)."""
+    return ';'.join([
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA mmap_size={mmap_mb * 1024 * 1024}',
+        f'PRAGMA cache_size=-{cache_mb * 1024}',
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA foreign_keys=ON',
+    ])
+
+
+def opciones_sqlite(busy_timeout=20, mmap_mb=256, cache_mb=64):
+    return {
+        'timeout': busy_timeout,
+        'transaction_mode': 'IMMEDIATE',
+        'init_command': pragmas_sqlite(mmap_mb, cache_mb),
+    }
+
+
+def opciones_mysql():
+    return {
+        'charset': 'utf8mb4',
+        'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+        'isolation_level': 'read committed',
+    }
+
+
+def configuracion(base_dir, entorno=None):
+    """Entrada 'default' de DATABASES según las variables DB_*."""
+    entorno = os.environ if entorno is None else entorno
+    motor = entorno.get('DB_ENGINE', 'sqlite').lower()
+    if motor not in MOTORES:
+        raise ValueError(f"DB_ENGINE debe ser uno de {', '.join(MOTORES)}, no {motor!r}")
+
+    base = {
+        'ENGINE': MOTORES[motor],
+        'CONN_MAX_AGE': int(entorno.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+    if motor == 'sqlite':
+        base['NAME'] = entorno.get('DB_NAME', str(base_dir / 'db.sqlite3'))
+        base['OPTIONS'] = opciones_sqlite(
+            busy_timeout=float(entorno.get('DB_BUSY_TIMEOUT', '20')),
+            mmap_mb=int(entorno.get('DB_SQLITE_MMAP_MB', '256')),
+            cache_mb=int(entorno.get('DB_SQLITE_CACHE_MB', '64')),
+        )
+    else:
+        base.update({
+            'NAME': entorno.get('DB_NAME', 'ticashop'),
+            'USER': entorno.get('DB_USER', 'ticashop'),
+            'PASSWORD': entorno.get('DB_PASSWORD', ''),
+            'HOST': entorno.get('DB_HOST', '127.0.0.1'),
+            'PORT': entorno.get('DB_PORT', '3306'),
+            'OPTIONS': opciones_mysql(),
+        })
+    return base
@@ -0,0 +1,80 @@
+"""
+Utilidades compartidas por los comandos benchmark_* de las apps.
+
+Los benchmarks corren sobre una base de datos temporal (la base de pruebas de
+Django) para no consumir folios, stock ni ventas reales.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+@contextmanager
+def base_temporal(alias='default', verbosity=0):
+    """
+    Crea y migra una base de datos temporal y la deja activa mientras dure el
+    bloque. En SQLite se usa un archivo (no :memory:) para que varios hilos
+    compartan la misma base.
+    """
+    connection = connections[alias]
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    nombre_test_original = test_settings.get('NAME')
+    directorio = None
+
+    if connection.vendor == 'sqlite' and not nombre_test_original:
+        directorio = tempfile.mkdtemp(prefix='ticashop_bench_')
+        test_settings['NAME'] = os.path.join(directorio, 'benchmark.sqlite3')
+
+    nombre_original = connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=verbosity)
+        test_settings['NAME'] = nombre_test_original
+        if directorio:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+def ejecutar_concurrente(trabajo, hilos):
+    """
+    Ejecuta trabajo(indice_hilo) en `hilos` hilos a la vez. Retorna
+    (segundos, resultados, errores); cada hilo cierra su conexión al terminar.
+    """
+    resultados = [None] * hilos
+    errores = []
+    barrera = threading.Barrier(hilos)
+
+    def correr(indice):
+        try:
+            barrera.wait()
+            resultados[indice] = trabajo(indice)
+        except Exception as e:
+            errores.append(e)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=correr, args=(i,)) for i in range(hilos)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - inicio, resultados, errores
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) con interpolación lineal entre los valores ordenados."""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    posicion = (len(ordenados) - 1) * p / 100
+    bajo = int(posicion)
+    alto = min(bajo + 1, len(ordenados) - 1)
+    return ordenados[bajo] + (ordenados[alto] - ordenados[bajo]) * (posicion - bajo)
@@ -0,0 +1,47 @@
+"""
+Caché LRU en memoria del proceso, con vencimiento por tiempo.
+
+Para resultados chicos y muy repetidos (p. ej. las búsquedas de los
+autocompletados) donde ir a la caché compartida cuesta casi lo mismo que la
+consulta. Cada proceso tiene la suya: se limpia desde las señales del
+modelo en el proceso que hizo el cambio y, en los demás, por el TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """Hasta `maximo` claves; cada una vence `ttl` segundos después de guardarse. Segura entre hilos."""
+
+    def __init__(self, maximo=512, ttl=30):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._datos = OrderedDict()
+
+    def obtener(self, clave, defecto=None):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return defecto
+            vence, valor = entrada
+            if vence < time.monotonic():
+                del self._datos[clave]
+                return defecto
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
@@ -0,0 +1,350 @@
+"""
+Generador de datos sintéticos para benchmarks (seed_benchmark_data, benchmark_flujo).
+
+Produce volúmenes configurables de usuarios, clientes, proveedores,
+categorías, productos, pedidos, documentos, pagos y notas de crédito con
+distribuciones parecidas a las reales:
+
+- pocos clientes y vendedores concentran la mayoría de los pedidos y unos
+  pocos productos la mayoría de las líneas (pesos tipo Zipf);
+- precios log-normales en pesos, costo entre 45% y 80% del neto;
+- pedidos repartidos en `dias` días, con menos movimiento los fines de
+  semana y más volumen hacia las fechas recientes;
+- facturas recientes con saldo pendiente, pagos parciales y un porcentaje
+  de notas de crédito.
+
+Todo se escribe con bulk_create por lotes (sin señales): al final se avanzan
+las secuencias de folio y se invalida el catálogo cacheado.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.clientes.models import Cliente, Proveedor
+from apps.documentos.folios import FOLIO_INICIAL, descartar_bloques
+from apps.documentos.models import (
+    DocumentoVenta, DetalleDocumento, Pago, NotaCredito, DetalleNotaCredito, SecuenciaFolio,
+)
+from apps.documentos.saldos import recalcular_monto_pagado
+from apps.productos.busqueda import reconstruir_indice
+from apps.productos.inventario import registrar_iniciales
+from apps.productos.catalogo import invalidar_catalogo
+from apps.productos.models import Categoria, Producto
+from apps.usuarios.models import Usuario
+from apps.ventas.models import Pedido, DetallePedido
+from apps.ventas.totales import desglose_iva
+
+CONTRASENA = 'benchmark'
+
+VOLUMENES = {
+    'pequeno': {'usuarios': 60, 'clientes': 300, 'proveedores': 20, 'categorias': 12,
+                'productos': 1_000, 'pedidos': 5_000},
+    'mediano': {'usuarios': 300, 'clientes': 5_000, 'proveedores': 80, 'categorias': 40,
+                'productos': 10_000, 'pedidos': 100_000},
+    'grande': {'usuarios': 1_500, 'clientes': 50_000, 'proveedores': 300, 'categorias': 120,
+               'productos': 50_000, 'pedidos': 1_000_000},
+}
+
+ESTADOS_PEDIDO = [('Enviado', 70), ('Pendiente', 10), ('Completado', 8), ('Cancelado', 7), ('Procesando', 5)]
+MEDIOS_PAGO = [m for m, _ in DocumentoVenta.MEDIOS_PAGO]
+NOMBRES = ['Andes', 'Pacífico', 'Austral', 'Cordillera', 'Valle', 'Norte', 'Sur', 'Maipo', 'Bío Bío', 'Atacama',
+           'Araucanía', 'Los Lagos', 'Aconcagua', 'Elqui', 'Maule', 'Ñuble', 'Limarí', 'Copiapó']
+RUBROS = ['Comercial', 'Distribuidora', 'Servicios', 'Importadora', 'Ferretería', 'Constructora', 'Tecnología']
+PRODUCTOS = ['Cable', 'Tornillo', 'Panel', 'Router', 'Monitor', 'Teclado', 'Taladro', 'Pintura', 'Cemento',
+             'Lámpara', 'Switch', 'Disco', 'Memoria', 'Silla', 'Escritorio', 'Cinta', 'Adaptador', 'Batería']
+
+
+class _Elector:
+    """Elige elementos con pesos tipo Zipf (el i-ésimo pesa 1 / (i + 1) ** s)."""
+
+    def __init__(self, azar, elementos, s=1.0):
+        self.azar = azar
+        self.elementos = list(elementos)
+        self.acumulados = list(accumulate(1 / (i + 1) ** s for i in range(len(self.elementos))))
+
+    def elegir(self):
+        return self.azar.choices(self.elementos, cum_weights=self.acumulados)[0]
+
+
+def _rut(numero):
+    """RUT chileno con dígito verificador válido."""
+    suma, factor = 0, 2
+    for digito in reversed(str(numero)):
+        suma += int(digito) * factor
+        factor = 2 if factor == 7 else factor + 1
+    dv = 11 - suma % 11
+    dv = {10: 'K', 11: '0'}.get(dv, str(dv))
+    return f"{numero}-{dv}"
+
+
+def _en_lotes(total, lote):
+    for inicio in range(0, total, lote):
+        yield inicio, min(inicio + lote, total)
+
+
+class GeneradorDatos:
+
+    def __init__(self, semilla=42, dias=365, lote=5_000, tasa_notas_credito=0.05, log=None):
+        self.azar = random.Random(semilla)
+        self.dias = dias
+        self.lote = lote
+        self.tasa_notas_credito = tasa_notas_credito
+        self.log = log or (lambda mensaje: None)
+        self.ahora = timezone.now()
+        self.conteos = {}
+        # Prefijo distinto por corrida para poder sembrar varias veces la misma base
+        self.prefijo = f"bm{self.azar.randint(0, 36 ** 4):04x}"
+
+    def _contar(self, nombre, cantidad):
+        self.conteos[nombre] = self.conteos.get(nombre, 0) + cantidad
+
+    # ---------- Maestros ----------
+
+    def usuarios(self, cantidad):
+        clave = make_password(CONTRASENA)
+        vendedores = max(2, cantidad * 3 // 10)
+        roles = (['Administrador'] + ['Tesoreria'] * 2 + ['Vendedor'] * vendedores)
+        roles += ['Cliente'] * max(0, cantidad - len(roles))
+        creados = Usuario.objects.bulk_create([
+            Usuario(username=f"{self.prefijo}_{rol.lower()}_{i}", password=clave, rol=rol,
+                    first_name=self.azar.choice(NOMBRES), last_name=self.azar.choice(RUBROS),
+                    email=f"{self.prefijo}_{i}@example.com", is_staff=rol == 'Administrador')
+            for i, rol in enumerate(roles)
+        ], batch_size=self.lote)
+        self._contar('usuarios', len(creados))
+        return creados
+
+    def clientes(self, cantidad, usuarios_cliente):
+        base = self.azar.randint(10_000_000, 20_000_000)
+        creados = []
+        for inicio, fin in _en_lotes(cantidad, self.lote):
+            creados += Cliente.objects.bulk_create([
+                Cliente(
+                    user=usuarios_cliente[i] if i < len(usuarios_cliente) else None,
+                    rut=_rut(base + i),
+                    razon_social=f"{self.azar.choice(RUBROS)} {self.azar.choice(NOMBRES)} {i} SpA",
+                    giro=self.azar.choice(RUBROS),
+                    direccion=f"Av. {self.azar.choice(NOMBRES)} {self.azar.randint(100, 9999)}, Santiago",
+                    email_facturacion=f"facturas{i}@{self.prefijo}.example.com",
+                )
+                for i in range(inicio, fin)
+            ])
+        self._contar('clientes', len(creados))
+        return creados
+
+    def proveedores(self, cantidad):
+        base = self.azar.randint(70_000_000, 79_000_000)
+        creados = Proveedor.objects.bulk_create([
+            Proveedor(rut=_rut(base + i), razon_social=f"Proveedor {self.azar.choice(NOMBRES)} {i}",
+                      email_contacto=f"ventas{i}@{self.prefijo}.example.com")
+            for i in range(cantidad)
+        ])
+        self._contar('proveedores', len(creados))
+        return creados
+
+    def categorias(self, cantidad):
+        creadas = Categoria.objects.bulk_create([
+            Categoria(nombre=f"{self.prefijo} {self.azar.choice(PRODUCTOS)}s {i}", activa=self.azar.random() < 0.95)
+            for i in range(cantidad)
+        ])
+        self._contar('categorias', len(creadas))
+        return creadas
+
+    def productos(self, cantidad, categorias, proveedores):
+        elige_categoria = _Elector(self.azar, categorias, s=0.8)
+        creados = []
+        for inicio, fin in _en_lotes(cantidad, self.lote):
+            nuevos = []
+            for i in range(inicio, fin):
+                precio = Decimal(max(490, round(self.azar.lognormvariate(9.6, 1.0), -1)))
+                costo = (precio / Decimal('1.19') * Decimal(self.azar.uniform(0.45, 0.8))).quantize(Decimal('1'))
+                stock_minimo = self.azar.choice([0, 0, 5, 10, 20])
+                bajo = self.azar.random() < 0.05
+                nuevos.append(Producto(
+                    codigo=f"{self.prefijo.upper()}-{i:06d}",
+                    nombre=f"{self.azar.choice(PRODUCTOS)} {self.azar.choice(NOMBRES)} {i}",
+                    categoria=elige_categoria.elegir(),
+                    proveedor=self.azar.choice(proveedores) if self.azar.random() < 0.9 else None,
+                    precio_unitario=precio, costo_unitario=costo,
+                    stock=self.azar.randint(0, stock_minimo) if bajo else self.azar.randint(50, 5_000),
+                    stock_minimo=stock_minimo,
+                    activo=self.azar.random() < 0.92,
+                ))
+            creados += Producto.objects.bulk_create(nuevos)
+        # bulk_create no emite post_save ni pasa por save(): el índice de búsqueda se carga
+        # de una vez y el stock inicial entra al libro de inventario
+        reconstruir_indice()
+        registrar_iniciales(creados)
+        self._contar('productos', len(creados))
+        return creados
+
+    # ---------- Ventas ----------
+
+    def _fecha_pedido(self):
+        # Más volumen hacia lo reciente (triangular) y menos sábado/domingo
+        while True:
+            dias_atras = self.azar.triangular(0, self.dias, 0)
+            fecha = self.ahora - timedelta(days=dias_atras, seconds=self.azar.randint(0, 86_399))
+            if fecha.weekday() < 5 or self.azar.random() < 0.4:
+                return fecha
+
+    def _siguientes_folios(self):
+        folios = {}
+        for tipo, _ in DocumentoVenta.TIPOS_DOCUMENTO:
+            maximo = DocumentoVenta.objects.filter(tipo_documento=tipo).aggregate(m=Max('folio'))['m']
+            secuencia = SecuenciaFolio.objects.filter(tipo_documento=tipo).values_list('ultimo_folio', flat=True).first()
+            folios[tipo] = max(maximo or 0, secuencia or 0, FOLIO_INICIAL - 1) + 1
+        return folios
+
+    def ventas(self, cantidad, clientes, vendedores, productos):
+        elige_cliente = _Elector(self.azar, clientes, s=1.1)
+        elige_vendedor = _Elector(self.azar, vendedores, s=0.7)
+        elige_producto = _Elector(self.azar, [p for p in productos if p.activo] or productos, s=1.0)
+        estados, pesos = zip(*ESTADOS_PEDIDO)
+        folios = self._siguientes_folios()
+
+        for inicio, fin in _en_lotes(cantidad, self.lote):
+            with transaction.atomic():
+                self._lote_ventas(fin - inicio, elige_cliente, elige_vendedor, elige_producto, estados, pesos, folios)
+            self.log(f"  pedidos {fin}/{cantidad}")
+
+        for tipo, siguiente in folios.items():
+            SecuenciaFolio.objects.update_or_create(tipo_documento=tipo, defaults={'ultimo_folio': siguiente - 1})
+        descartar_bloques()
+
+    def _lote_ventas(self, cantidad, elige_cliente, elige_vendedor, elige_producto, estados, pesos, folios):
+        azar = self.azar
+        plan = []
+        for _ in range(cantidad):
+            lineas = {}
+            for _ in range(min(1 + int(azar.expovariate(1 / 2.5)), 20)):
+                producto = elige_producto.elegir()
+                lineas[producto.id] = (producto, lineas.get(producto.id, (producto, 0))[1] + azar.choice([1, 1, 1, 2, 2, 3, 5]))
+            plan.append((elige_cliente.elegir(), elige_vendedor.elegir(), azar.choices(estados, pesos)[0],
+                         self._fecha_pedido(), list(lineas.values())))
+
+        pedidos = Pedido.objects.bulk_create([
+            Pedido(cliente=cliente, usuario=vendedor, estado=estado,
+                   total=sum(p.precio_unitario * c for p, c in lineas),
+                   direccion_despacho=cliente.direccion)
+            for cliente, vendedor, estado, _, lineas in plan
+        ])
+        # auto_now / auto_now_add ignoran el valor al crear: las fechas se fijan con bulk_update
+        for pedido, (_, _, _, fecha, _) in zip(pedidos, plan):
+            pedido.fecha_creacion = pedido.fecha_actualizacion = fecha
+        Pedido.objects.bulk_update(pedidos, ['fecha_creacion', 'fecha_actualizacion'], batch_size=1000)
+        DetallePedido.objects.bulk_create([
+            DetallePedido(pedido=pedido, producto=producto, cantidad=cant,
+                          precio_unitario_venta=producto.precio_unitario, subtotal=producto.precio_unitario * cant)
+            for pedido, (_, _, _, _, lineas) in zip(pedidos, plan)
+            for producto, cant in lineas
+        ], batch_size=self.lote)
+
+        documentos = []
+        for pedido, (cliente, vendedor, estado, fecha, _) in zip(pedidos, plan):
+            if estado == 'Cancelado':
+                continue
+            tipo = 'Factura' if azar.random() < 0.4 else 'Boleta'
+            emision = fecha + timedelta(minutes=azar.randint(1, 120))
+            vencimiento = (emision + timedelta(days=30)).date()
+            antiguedad = (self.ahora - emision).days
+            if tipo == 'Factura' and antiguedad < 60:
+                estado_doc = azar.choices(['Emitida', 'Pago Parcial', 'Pagada'], [35, 15, 50])[0]
+            else:
+                estado_doc = 'Pagada' if azar.random() < 0.97 else 'Anulada'
+            neto, iva = desglose_iva(pedido.total)
+            documentos.append(DocumentoVenta(
+                pedido=pedido, tipo_documento=tipo, folio=folios[tipo], cliente=cliente, vendedor=vendedor,
+                neto=neto, iva=iva, total=pedido.total, estado=estado_doc, fecha_emision=emision,
+                fecha_vencimiento=vencimiento, medio_de_pago=azar.choice(MEDIOS_PAGO),
+                razon_social=cliente.razon_social, rut=cliente.rut, giro=cliente.giro, direccion=cliente.direccion,
+            ))
+            folios[tipo] += 1
+        documentos = DocumentoVenta.objects.bulk_create(documentos, batch_size=self.lote)
+
+        lineas_por_pedido = {pedido.id: lineas for pedido, (*_, lineas) in zip(pedidos, plan)}
+        DetalleDocumento.objects.bulk_create([
+            DetalleDocumento(documento=doc, producto=producto, cantidad=cant,
+                             precio_unitario_venta=producto.precio_unitario, subtotal=producto.precio_unitario * cant,
+                             costo_unitario_venta=producto.costo_unitario)
+            for doc in documentos
+            for producto, cant in lineas_por_pedido[doc.pedido_id]
+        ], batch_size=self.lote)
+
+        pagos = []
+        for doc in documentos:
+            if doc.estado == 'Pagada':
+                monto = doc.total
+            elif doc.estado == 'Pago Parcial':
+                monto = (doc.total * Decimal(azar.uniform(0.3, 0.8))).quantize(Decimal('1'))
+            else:
+                continue
+            pagos.append(Pago(documento=doc, monto_pagado=monto, metodo_pago=doc.medio_de_pago,
+                              referencia=f"BM-{doc.folio}"))
+        pagos = Pago.objects.bulk_create(pagos, batch_size=self.lote)
+        fechas_emision = {doc.id: doc.fecha_emision for doc in documentos}
+        for pago in pagos:
+            pago.fecha_pago = fechas_emision[pago.documento_id] + timedelta(days=azar.randint(0, 25))
+        Pago.objects.bulk_update(pagos, ['fecha_pago'], batch_size=1000)
+        # bulk_create no pasa por Pago.save(): monto_pagado se carga con un UPDATE por lote
+        if documentos:
+            recalcular_monto_pagado(DocumentoVenta.objects.filter(pk__range=(documentos[0].pk, documentos[-1].pk)))
+
+        self._notas_credito(documentos, lineas_por_pedido, fechas_emision)
+        self._contar('pedidos', len(pedidos))
+        self._contar('documentos', len(documentos))
+        self._contar('pagos', len(pagos))
+
+    def _notas_credito(self, documentos, lineas_por_pedido, fechas_emision):
+        azar = self.azar
+        elegidos = [d for d in documentos
+                    if d.tipo_documento == 'Factura' and d.estado == 'Pagada' and azar.random() < self.tasa_notas_credito]
+        if not elegidos:
+            return
+        notas, detalles, devueltos = [], [], []
+        for doc in elegidos:
+            producto, cantidad = azar.choice(lineas_por_pedido[doc.pedido_id])
+            devueltas = azar.randint(1, cantidad)
+            monto = producto.precio_unitario * devueltas
+            notas.append(NotaCredito(
+                factura=doc, folio=f"NC-{doc.folio}", usuario=doc.vendedor, motivo='Devolución de mercadería',
+                monto=monto, estado='Aplicada',
+                fecha_emision=(fechas_emision[doc.id] + timedelta(days=azar.randint(1, 20))).date(),
+            ))
+            detalles.append((producto, devueltas))
+            doc.estado = 'Devuelta' if monto >= doc.total else 'Devuelta Parcial'
+            devueltos.append(doc)
+        notas = NotaCredito.objects.bulk_create(notas)
+        DetalleNotaCredito.objects.bulk_create([
+            DetalleNotaCredito(nota=nota, producto=producto, descripcion=producto.nombre, cantidad=devueltas,
+                               precio_unitario=producto.precio_unitario,
+                               subtotal=producto.precio_unitario * devueltas)
+            for nota, (producto, devueltas) in zip(notas, detalles)
+        ])
+        DocumentoVenta.objects.bulk_update(devueltos, ['estado'], batch_size=1000)
+        self._contar('notas_credito', len(notas))
+
+    # ---------- Todo ----------
+
+    def generar(self, usuarios, clientes, proveedores, categorias, productos, pedidos):
+        """Genera todos los volúmenes y retorna {modelo: cantidad creada}."""
+        self.log('Usuarios, clientes y proveedores...')
+        creados = self.usuarios(usuarios)
+        vendedores = [u for u in creados if u.rol in ('Vendedor', 'Administrador')]
+        usuarios_cliente = [u for u in creados if u.rol == 'Cliente']
+        lista_clientes = self.clientes(clientes, usuarios_cliente)
+        lista_proveedores = self.proveedores(proveedores)
+
+        self.log('Catálogo...')
+        lista_productos = self.productos(productos, self.categorias(categorias), lista_proveedores)
+
+        self.log('Ventas...')
+        self.ventas(pedidos, lista_clientes, vendedores, lista_productos)
+        invalidar_catalogo()
+        return dict(self.conteos)
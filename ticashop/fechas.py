@@ -0,0 +1,28 @@
+"""
+Filtros de fecha como rangos sobre columnas DateTimeField.
+
+`campo__date=...` obliga a la base a convertir la columna en cada fila (y con
+USE_TZ, a pasarla a hora local), así que no puede usar el índice. Estos
+helpers traducen días locales a [inicio, fin) en datetimes con zona horaria.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def inicio_dia(fecha):
+    """Medianoche local (aware) del día `fecha`."""
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def rango_dias(campo, desde=None, hasta=None):
+    """
+    Lookups para filtrar `campo` entre los días locales desde y hasta
+    (inclusive). Cualquiera de los dos puede omitirse.
+    """
+    filtros = {}
+    if desde:
+        filtros[f'{campo}__gte'] = inicio_dia(desde)
+    if hasta:
+        filtros[f'{campo}__lt'] = inicio_dia(hasta + timedelta(days=1))
+    return filtros
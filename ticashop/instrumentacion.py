@@ -0,0 +1,239 @@
+"""
+Instrumentación por request: tiempo total, consultas SQL (cantidad, tiempo y
+consultas repetidas), tiempo de render de plantillas y tamaño de respuesta,
+agregados por nombre de URL.
+
+- InstrumentacionMiddleware mide cada request con un execute_wrapper sobre
+  las conexiones (funciona también con DEBUG=False).
+- PlantillasInstrumentadas es el backend de plantillas de Django con el
+  render cronometrado.
+- Cada request se escribe como una línea JSON en el logger
+  'ticashop.instrumentacion' (archivo rotativo configurado en settings) y se
+  acumula en `registro`, que muestra la página usuarios:instrumentacion.
+  El registro en memoria es por proceso.
+
+Se configura con settings.INSTRUMENTACION (ver CONFIGURACION_POR_DEFECTO).
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+from django.utils import timezone
+
+logger = logging.getLogger('ticashop.instrumentacion')
+
+CONFIGURACION_POR_DEFECTO = {
+    'ACTIVA': False,
+    # Requests con más consultas que esto quedan marcadas (y se registran como WARNING)
+    'UMBRAL_CONSULTAS': 50,
+    # Cuántas huellas de consultas repetidas se guardan por request
+    'MAX_DUPLICADAS': 5,
+    # Requests recientes que guarda el registro en memoria
+    'HISTORIAL': 200,
+    'EXCLUIR': ['/static/', '/images/', '/favicon.ico'],
+}
+
+_medicion_actual = ContextVar('medicion_instrumentacion', default=None)
+
+
+def configuracion():
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'INSTRUMENTACION', {})}
+
+
+# ========== HUELLAS DE CONSULTAS ==========
+
+_ESPACIOS = re.compile(r'\s+')
+_LISTA_IN = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def huella(sql):
+    """SQL normalizado: sin literales y con las listas IN (...) colapsadas."""
+    sql = _ESPACIOS.sub(' ', sql).strip()
+    sql = _LITERALES.sub('?', sql)
+    return _LISTA_IN.sub('IN (...)', sql)
+
+
+class Medicion:
+    __slots__ = ('consultas', 'tiempo_db', 'tiempo_plantillas', 'huellas')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.tiempo_plantillas = 0.0
+        self.huellas = Counter()
+
+
+def _envolver_consulta(execute, sql, params, many, context):
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.tiempo_db += time.perf_counter() - inicio
+        medicion.consultas += 1
+        medicion.huellas[huella(sql)] += 1
+
+
+# ========== PLANTILLAS ==========
+
+class PlantillaMedida:
+    """Envuelve una plantilla del backend y suma su tiempo de render a la medición actual."""
+
+    def __init__(self, plantilla):
+        self.plantilla = plantilla
+
+    def __getattr__(self, nombre):
+        return getattr(self.plantilla, nombre)
+
+    def render(self, context=None, request=None):
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return self.plantilla.render(context, request)
+        inicio = time.perf_counter()
+        try:
+            return self.plantilla.render(context, request)
+        finally:
+            medicion.tiempo_plantillas += time.perf_counter() - inicio
+
+
+class PlantillasInstrumentadas(DjangoTemplates):
+
+    def from_string(self, template_code):
+        return PlantillaMedida(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return PlantillaMedida(super().get_template(template_name))
+
+
+# ========== REGISTRO EN MEMORIA ==========
+
+class Registro:
+    """Acumulados por nombre de URL y últimos requests, compartidos entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.limpiar()
+
+    def limpiar(self, historial=None):
+        with self._lock:
+            self.por_url = {}
+            self.recientes = deque(maxlen=historial or CONFIGURACION_POR_DEFECTO['HISTORIAL'])
+            self.desde = timezone.now()
+
+    def agregar(self, entrada, historial):
+        with self._lock:
+            if self.recientes.maxlen != historial:
+                self.recientes = deque(self.recientes, maxlen=historial)
+            self.recientes.appendleft(entrada)
+            acumulado = self.por_url.setdefault(entrada['url'], {
+                'url': entrada['url'], 'requests': 0, 'excedidos': 0,
+                'ms_total': 0.0, 'ms_max': 0.0, 'ms_db_total': 0.0, 'ms_plantillas_total': 0.0,
+                'consultas_total': 0, 'consultas_max': 0, 'duplicadas_total': 0, 'bytes_total': 0,
+            })
+            acumulado['requests'] += 1
+            acumulado['excedidos'] += entrada['excede_umbral']
+            acumulado['ms_total'] += entrada['ms']
+            acumulado['ms_max'] = max(acumulado['ms_max'], entrada['ms'])
+            acumulado['ms_db_total'] += entrada['ms_db']
+            acumulado['ms_plantillas_total'] += entrada['ms_plantillas']
+            acumulado['consultas_total'] += entrada['consultas']
+            acumulado['consultas_max'] = max(acumulado['consultas_max'], entrada['consultas'])
+            acumulado['duplicadas_total'] += sum(d['veces'] - 1 for d in entrada['duplicadas'])
+            acumulado['bytes_total'] += entrada['bytes'] or 0
+
+    def resumen(self):
+        """Filas por URL con promedios, ordenadas por tiempo total."""
+        with self._lock:
+            filas = [dict(a) for a in self.por_url.values()]
+            recientes = list(self.recientes)
+        for fila in filas:
+            n = fila['requests']
+            fila['ms_promedio'] = fila['ms_total'] / n
+            fila['ms_db_promedio'] = fila['ms_db_total'] / n
+            fila['ms_plantillas_promedio'] = fila['ms_plantillas_total'] / n
+            fila['consultas_promedio'] = fila['consultas_total'] / n
+            fila['kb_promedio'] = fila['bytes_total'] / n / 1024
+        filas.sort(key=lambda f: f['ms_total'], reverse=True)
+        return filas, recientes
+
+
+registro = Registro()
+
+
+# ========== MIDDLEWARE ==========
+
+class InstrumentacionMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = configuracion()
+        if not config['ACTIVA'] or request.path.startswith(tuple(config['EXCLUIR'])):
+            return self.get_response(request)
+
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pila:
+                for alias in connections:
+                    pila.enter_context(connections[alias].execute_wrapper(_envolver_consulta))
+                response = self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        ms = (time.perf_counter() - inicio) * 1000
+
+        entrada = self.entrada(request, response, medicion, ms, config)
+        registro.agregar(entrada, config['HISTORIAL'])
+        if entrada['excede_umbral']:
+            logger.warning(json.dumps(entrada, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(entrada, ensure_ascii=False))
+
+        response['Server-Timing'] = (
+            f'total;dur={ms:.1f}, db;dur={medicion.tiempo_db * 1000:.1f};desc="{medicion.consultas} consultas", '
+            f'plantillas;dur={medicion.tiempo_plantillas * 1000:.1f}'
+        )
+        return response
+
+    @staticmethod
+    def tamano(response):
+        if not response.streaming:
+            return len(response.content)
+        largo = response.get('Content-Length')
+        return int(largo) if largo else None
+
+    def entrada(self, request, response, medicion, ms, config):
+        coincidencia = getattr(request, 'resolver_match', None)
+        duplicadas = [
+            {'sql': sql[:500], 'veces': veces}
+            for sql, veces in medicion.huellas.most_common(config['MAX_DUPLICADAS'])
+            if veces > 1
+        ]
+        return {
+            'fecha': timezone.now().isoformat(timespec='seconds'),
+            'url': coincidencia.view_name if coincidencia else '(sin ruta)',
+            'ruta': request.path,
+            'metodo': request.method,
+            'estado': response.status_code,
+            'usuario': getattr(getattr(request, 'user', None), 'pk', None),
+            'ms': round(ms, 2),
+            'consultas': medicion.consultas,
+            'ms_db': round(medicion.tiempo_db * 1000, 2),
+            'ms_plantillas': round(medicion.tiempo_plantillas * 1000, 2),
+            'bytes': self.tamano(response),
+            'duplicadas': duplicadas,
+            'excede_umbral': medicion.consultas > config['UMBRAL_CONSULTAS'],
+        }
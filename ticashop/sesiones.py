@@ -0,0 +1,94 @@
+"""
+Perfil de sesiones, armado desde variables de entorno (ver settings.SESSION_ENGINE).
+
+Con el motor por defecto de Django (db) cada request autenticado lee su fila
+de django_session, en el mismo archivo SQLite que los pedidos. SESIONES_MOTOR
+elige:
+
+- cached_db (por defecto): lee desde la caché 'sesiones' y solo va a la base
+  si no la encuentra; las escrituras van a ambas, así que nada se pierde si
+  la caché se vacía.
+- cache: solo caché, sin tocar la base. Si la caché se vacía o se reinicia,
+  los usuarios tienen que volver a entrar.
+- file: un archivo por sesión en SESIONES_DIRECTORIO.
+- db: el motor anterior.
+
+La caché 'sesiones' (SESIONES_CACHE) es 'locmem' (memoria del proceso, sirve
+para probar en local con runserver) o 'archivo' (FileBasedCache en
+SESIONES_DIRECTORIO, compartida por todos los procesos del servidor). Con
+varios procesos hay que usar 'archivo': con 'locmem' cada proceso guarda su
+propia copia y un logout en uno no se ve en los otros.
+
+Las sesiones vencidas de la base las borra el comando limpiar_sesiones, por
+lotes (borrar_vencidas).
+"""
+import os
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+MOTORES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'file': 'django.contrib.sessions.backends.file',
+}
+
+CACHES = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'archivo': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+
+
+def motor(entorno=None):
+    entorno = os.environ if entorno is None else entorno
+    nombre = entorno.get('SESIONES_MOTOR', 'cached_db').lower()
+    if nombre not in MOTORES:
+        raise ValueError(f"SESIONES_MOTOR debe ser uno de {', '.join(MOTORES)}, no {nombre!r}")
+    return MOTORES[nombre]
+
+
+def directorio(base_dir, entorno=None):
+    entorno = os.environ if entorno is None else entorno
+    return entorno.get('SESIONES_DIRECTORIO', str(base_dir / 'sesiones'))
+
+
+def cache_sesiones(base_dir, debug, entorno=None):
+    """Entrada 'sesiones' de CACHES: locmem por defecto en DEBUG, archivo si no."""
+    entorno = os.environ if entorno is None else entorno
+    nombre = entorno.get('SESIONES_CACHE', 'locmem' if debug else 'archivo').lower()
+    if nombre not in CACHES:
+        raise ValueError(f"SESIONES_CACHE debe ser uno de {', '.join(CACHES)}, no {nombre!r}")
+    configuracion = {'BACKEND': CACHES[nombre], 'TIMEOUT': None}
+    if nombre == 'archivo':
+        configuracion['LOCATION'] = os.path.join(directorio(base_dir, entorno), 'cache')
+        configuracion['OPTIONS'] = {'MAX_ENTRIES': 100000}
+    else:
+        configuracion['LOCATION'] = 'sesiones'
+        configuracion['OPTIONS'] = {'MAX_ENTRIES': 20000}
+    return configuracion
+
+
+# ========== LIMPIEZA ==========
+
+def borrar_vencidas(ahora=None, lote=1000, pausa=0.0):
+    """
+    Borra de django_session las sesiones vencidas, `lote` por transacción y
+    esperando `pausa` segundos entre lotes para no retener el lock de
+    escritura. Retorna cuántas borró.
+    """
+    from django.contrib.sessions.models import Session
+
+    ahora = ahora or timezone.now()
+    borradas = 0
+    while True:
+        with transaction.atomic():
+            claves = list(Session.objects.filter(expire_date__lt=ahora).values_list('session_key', flat=True)[:lote])
+            if claves:
+                Session.objects.filter(session_key__in=claves).delete()
+        borradas += len(claves)
+        if len(claves) < lote:
+            return borradas
+        if pausa:
+            time.sleep(pausa)
@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from . import base_datos, sesiones
+
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,6 +39,7 @@ CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'ticashop.instrumentacion.InstrumentacionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -49,10 +52,17 @@ ROOT_URLCONF = 'ticashop.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates con el tiempo de render medido (ver ticashop/instrumentacion.py)
+        'BACKEND': 'ticashop.instrumentacion.PlantillasInstrumentadas',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Plantillas compiladas en memoria del proceso (con DEBUG, el autoreload las descarta al editarlas)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -65,12 +75,109 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'ticashop.wsgi.application'
 
-# Base de datos SQLite para desarrollo rápido
+# Base de datos: SQLite en WAL con conexiones persistentes por defecto; DB_ENGINE=mysql
+# usa MySQL con DB_NAME/DB_USER/DB_PASSWORD/DB_HOST/DB_PORT (ver ticashop/base_datos.py).
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': base_datos.configuracion(BASE_DIR),
+}
+
+# Sesiones: SESIONES_MOTOR = cached_db (por defecto), cache, file o db. La caché 'sesiones'
+# es locmem (un proceso, por defecto con DEBUG) o archivo (compartida por los procesos,
+# por defecto sin DEBUG); ver ticashop/sesiones.py. Las vencidas las borra limpiar_sesiones.
+SESSION_ENGINE = sesiones.motor()
+SESSION_CACHE_ALIAS = 'sesiones'
+SESSION_FILE_PATH = sesiones.directorio(BASE_DIR)
+if SESSION_ENGINE == sesiones.MOTORES['file']:
+    os.makedirs(SESSION_FILE_PATH, exist_ok=True)
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'sesiones': sesiones.cache_sesiones(BASE_DIR, DEBUG),
+    # Tarjetas de producto ya renderizadas (apps/productos/tarjetas.py)
+    'plantillas': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'plantillas',
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('TARJETAS_CACHE_MAX', '20000'))},
+    },
+}
+
+# Tarjetas de la tienda: segundos que vive cada tarjeta renderizada en la caché 'plantillas'.
+# La clave cambia sola al guardar el producto o cambiar su stock disponible.
+TARJETAS_TTL = int(os.environ.get('TARJETAS_TTL', str(24 * 3600)))
+
+# Folios: cuántos folios reserva cada proceso de una vez por tipo de documento.
+# 1 = numeración correlativa estricta. Un bloque mayor evita que la emisión masiva
+# de boletas compita por la misma fila, a costa de posibles saltos de folio.
+FOLIOS_BLOQUE = {
+    'Boleta': int(os.environ.get('FOLIOS_BLOQUE_BOLETA', '1')),
+    'Factura': int(os.environ.get('FOLIOS_BLOQUE_FACTURA', '1')),
+}
+
+# Rollups diarios de ventas: si es True, los cambios del día de hoy recalculan
+# su rollup al confirmar la transacción (el resto queda para refrescar_ventas_diarias).
+VENTAS_DIARIAS_TIEMPO_REAL = os.environ.get('VENTAS_DIARIAS_TIEMPO_REAL', 'False') == 'True'
+
+# Saldos de documentos: con True, con_saldo()/saldo_pendiente leen la columna
+# DocumentoVenta.monto_pagado (mantenida por Pago.save/delete); con False suman los pagos.
+SALDO_DESNORMALIZADO = os.environ.get('SALDO_DESNORMALIZADO', 'True') == 'True'
+
+# Recordatorios de pago: días respecto al vencimiento en que se envía cada recordatorio
+# (negativos = por vencer) y cuántos días de atraso del comando se recuperan por etapa.
+RECORDATORIOS_CADENCIA = [int(d) for d in os.environ.get('RECORDATORIOS_CADENCIA', '-3,1,7,15,30').split(',')]
+RECORDATORIOS_VENTANA = int(os.environ.get('RECORDATORIOS_VENTANA', '3'))
+
+# Dashboards por rol: segundos que vive en caché cada paquete de métricas (las señales lo
+# invalidan antes si cambian los datos) y, si es > 0, cada cuántos segundos un hilo del
+# proceso recalcula los paneles pedidos recientemente.
+DASHBOARD_TTL = int(os.environ.get('DASHBOARD_TTL', '60'))
+DASHBOARD_REFRESCO = int(os.environ.get('DASHBOARD_REFRESCO', '0'))
+
+# Reservas de stock: segundos que un carrito o un pedido en borrador aparta sus unidades
+# (se renueva al modificarlos); las vencidas las libera el comando liberar_reservas.
+RESERVAS_TTL_CARRITO = int(os.environ.get('RESERVAS_TTL_CARRITO', str(30 * 60)))
+RESERVAS_TTL_PEDIDO = int(os.environ.get('RESERVAS_TTL_PEDIDO', str(4 * 3600)))
+
+# Carrito: segundos que vive en caché el resumen del badge (líneas y total). El proceso que
+# cambia el carrito o un precio lo invalida al instante; los demás procesos, al vencer.
+CARRITO_RESUMEN_TTL = int(os.environ.get('CARRITO_RESUMEN_TTL', '30'))
+
+# Importación de costos: archivos más grandes que esto (bytes) se procesan en segundo plano.
+IMPORTACION_COSTOS_MAX_SINCRONO = int(os.environ.get('IMPORTACION_COSTOS_MAX_SINCRONO', str(512 * 1024)))
+
+# Instrumentación por request (tiempos, consultas, plantillas): página usuarios:instrumentacion
+# y log JSON rotativo en logs/instrumentacion.jsonl.
+INSTRUMENTACION = {
+    'ACTIVA': os.environ.get('INSTRUMENTACION', str(DEBUG)) == 'True',
+    'UMBRAL_CONSULTAS': int(os.environ.get('INSTRUMENTACION_UMBRAL_CONSULTAS', '50')),
+}
+DIRECTORIO_LOGS = BASE_DIR / 'logs'
+if INSTRUMENTACION['ACTIVA']:
+    os.makedirs(DIRECTORIO_LOGS, exist_ok=True)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'linea_json': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'instrumentacion': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': DIRECTORIO_LOGS / 'instrumentacion.jsonl',
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'linea_json',
+        },
+    },
+    'loggers': {
+        'ticashop.instrumentacion': {
+            'handlers': ['instrumentacion'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 AUTH_PASSWORD_VALIDATORS = [